@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    Category = apps.get_model('categories', 'Category')
+    categories = {c.pk: c for c in Category.objects.all()}
+
+    def path_of(category):
+        if not category.path:
+            parent = categories.get(category.parent_id)
+            prefix = path_of(parent) if parent else '/'
+            category.path = f'{prefix}{category.pk}/'
+        return category.path
+
+    for category in categories.values():
+        path_of(category)
+    Category.objects.bulk_update(categories.values(), ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
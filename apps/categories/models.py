@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
 
 
 class Category(models.Model):
@@ -12,6 +15,10 @@ class Category(models.Model):
         verbose_name='Родительская категория'
     )
     order = models.IntegerField(default=0, verbose_name='Порядок')
+    # Материализованный путь от корня: "/1/5/". Поддерево — path__startswith
+    path = models.CharField(max_length=255, blank=True, editable=False, db_index=True)
+    # По нему воркеры без общего кэша замечают изменения дерева (apps/categories/tree.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Категория'
@@ -20,3 +27,25 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name
+
+    def build_path(self):
+        if not self.parent_id:
+            return f'/{self.pk}/'
+        parent_path = Category.objects.values_list('path', flat=True).get(pk=self.parent_id)
+        return f'{parent_path}{self.pk}/'
+
+    def update_path(self):
+        """Пересчитывает путь после сохранения и переносит поддерево, если сменился родитель"""
+        path = self.build_path()
+        if path == self.path:
+            return
+        old_path, self.path = self.path, path
+        now = timezone.now()
+        Category.objects.filter(pk=self.pk).update(path=path, updated_at=now)
+        if old_path:
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1)), updated_at=now,
+            )
+
+    def ancestor_ids(self):
+        return [int(pk) for pk in self.path.strip('/').split('/') if pk]
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Category
+from .tree import get_category_nodes
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -10,10 +11,11 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name', 'slug', 'icon', 'parent', 'children', 'listings_count']
 
+    # Дети и счётчики берутся из кэшированного дерева, без запросов на каждый узел
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategorySerializer(obj.children.all(), many=True).data
-        return []
+        node = get_category_nodes().get(obj.id)
+        return node['children'] if node else []
 
     def get_listings_count(self, obj):
-        return obj.listings.filter(status='active').count()
+        node = get_category_nodes().get(obj.id)
+        return node['listings_count'] if node else 0
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Category
+from .tree import invalidate_category_tree
+from marketplace import response_cache
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    instance.update_path()
+    invalidate_category_tree()
+    response_cache.bump('categories', 'listings')
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, **kwargs):
+    invalidate_category_tree()
+    response_cache.bump('categories', 'listings')
+
+
+@receiver(post_init, sender='listings.Listing')
+def remember_listing_state(sender, instance, **kwargs):
+    # Поля могут быть отложены через only(): тогда при сохранении дерево просто сбросится
+    instance._category_tree_state = (instance.__dict__.get('status'), instance.__dict__.get('category_id'))
+
+
+@receiver(post_save, sender='listings.Listing')
+def listing_saved(sender, instance, created, **kwargs):
+    # Счётчики меняются только при смене статуса или категории
+    state = (instance.status, instance.category_id)
+    if created or state != instance._category_tree_state:
+        invalidate_category_tree()
+        response_cache.bump('categories')
+    instance._category_tree_state = state
+
+
+@receiver(post_delete, sender='listings.Listing')
+def listing_deleted(sender, instance, **kwargs):
+    invalidate_category_tree()
+    response_cache.bump('categories')
@@ -0,0 +1,132 @@
+"""
+Дерево категорий со счётчиками активных объявлений.
+
+Строится двумя запросами (все категории + один GROUP BY по объявлениям),
+собирается в памяти и кэшируется. Кэш сбрасывается сигналами из signals.py.
+Версия дерева — хэш его содержимого: по ней строятся ETag ответов.
+
+Сигнал сбрасывает кэш только там, где его видят все воркеры. Если кэш
+'default' — память процесса, а воркеров несколько, перед каждым
+использованием дерево сверяется с БД одним агрегатом (число категорий и
+max(updated_at)): переименование или перенос в другом воркере видны сразу.
+Счётчики объявлений в этом режиме живут не дольше LOCAL_CACHE_TIMEOUT.
+"""
+import hashlib
+import json
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from marketplace.caches import is_shared
+
+from .models import Category
+
+CACHE_KEY = 'categories:tree'
+CACHE_TIMEOUT = 60 * 10
+LOCAL_CACHE_TIMEOUT = 60
+
+
+def build_category_tree():
+    Listing = apps.get_model('listings', 'Listing')
+    counts = dict(
+        Listing.objects.filter(status='active', category__isnull=False)
+        .values_list('category_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+    nodes = {}
+    paths = {}
+    for category in Category.objects.all():
+        paths[category.id] = category.path
+        nodes[category.id] = {
+            'id': category.id,
+            'name': category.name,
+            'slug': category.slug,
+            'icon': category.icon,
+            'parent': category.parent_id,
+            'children': [],
+            'listings_count': counts.get(category.id, 0),
+        }
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent'])
+        if parent:
+            parent['children'].append(node)
+        else:
+            roots.append(node)
+    return {'roots': roots, 'nodes': nodes, 'paths': paths, 'version': _digest(roots)}
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def _get_db_state():
+    state = Category.objects.aggregate(total=Count('pk'), updated=Max('updated_at'))
+    return state['total'], state['updated']
+
+
+def _get_cached_tree():
+    tree = cache.get(CACHE_KEY)
+    shared = is_shared('default')
+    # Состояние читаем до сборки: изменение между ними даст лишнюю пересборку, а не устаревшее дерево
+    state = None if shared else _get_db_state()
+    # Дерево из кэша, собранное до появления версии, строим заново
+    if tree is None or 'version' not in tree or tree.get('state') != state:
+        tree = build_category_tree()
+        tree['state'] = state
+        cache.set(CACHE_KEY, tree, CACHE_TIMEOUT if shared else LOCAL_CACHE_TIMEOUT)
+    return tree
+
+
+def get_category_tree():
+    """Корневые категории с вложенными children"""
+    return _get_cached_tree()['roots']
+
+
+def get_category_nodes():
+    """Узлы дерева по id категории"""
+    return _get_cached_tree()['nodes']
+
+
+def get_category_path(category_id):
+    """Материализованный путь категории (None — если категории нет)"""
+    path = _get_cached_tree()['paths'].get(category_id)
+    if path is None:
+        # Категорию могли создать в другом процессе: его сигнал наш кэш не сбросил
+        path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+        if path is not None:
+            invalidate_category_tree()
+    return path
+
+
+def get_tree_version():
+    return _get_cached_tree()['version']
+
+
+def get_category_version(category_id):
+    """Версия того, что объявление показывает о своей категории: узел с детьми и хлебные крошки"""
+    if category_id is None:
+        return None
+    return _digest([get_category_nodes().get(category_id), get_breadcrumbs(category_id)])
+
+
+def get_breadcrumbs(category_id):
+    """Цепочка от корня до категории: [{id, name, slug}, ...]"""
+    tree = _get_cached_tree()
+    path = tree['paths'].get(category_id)
+    if not path:
+        return []
+    crumbs = []
+    for pk in path.strip('/').split('/'):
+        node = tree['nodes'].get(int(pk))
+        if node:
+            crumbs.append({'id': node['id'], 'name': node['name'], 'slug': node['slug']})
+    return crumbs
+
+
+def invalidate_category_tree():
+    cache.delete(CACHE_KEY)
@@ -1,11 +1,25 @@
 from rest_framework import generics, permissions
+from rest_framework.response import Response
 from .models import Category
 from .serializers import CategorySerializer
+from .tree import get_category_tree, get_tree_version
+from marketplace.conditional import ConditionalGetMixin, make_etag
+from marketplace.response_cache import AnonymousResponseCacheMixin
 
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(AnonymousResponseCacheMixin, ConditionalGetMixin, generics.ListAPIView):
+    """Дерево категорий: только корневые, подкатегории — в children"""
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    cache_namespace = 'categories'
 
     def get_queryset(self):
         return Category.objects.all()
+
+    def get_validators(self, request, *args, **kwargs):
+        # Версия — хэш кэшированного дерева: проверка без запросов к БД
+        return make_etag(request, get_tree_version()), None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda *a, **kw: Response(get_category_tree()))
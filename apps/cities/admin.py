@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import City
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key', 'updated_at']
+    search_fields = ['name', 'key']
+    readonly_fields = ['key']
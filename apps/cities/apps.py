@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CitiesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.cities'
+    verbose_name = 'Города'
+
+    def ready(self):
+        from . import signals  # noqa: F401
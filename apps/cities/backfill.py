@@ -0,0 +1,56 @@
+"""
+Привязка текстового поля city к справочнику городов.
+
+Работает по различным написаниям, а не по строкам: один GROUP BY на модель,
+затем города создаются пачкой и на каждое написание уходит один UPDATE.
+Название нового города — самое частое из его написаний (при равенстве —
+кириллическое). Используется командой backfill_cities и путями, которые
+создают строки через bulk_create (импорт, generate_data): save() там
+не вызывается.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import City
+from .normalize import clean_city_name, normalize_city
+
+
+def unlinked(queryset):
+    return queryset.filter(city_ref__isnull=True).exclude(city='')
+
+
+def preferred_name(spellings):
+    """Самое частое написание; при равенстве — кириллическое, а не транслит"""
+    return max(spellings.items(), key=lambda item: (item[1], not item[0].isascii()))[0]
+
+
+def resolve_spellings(counts):
+    """{написание: число строк} -> {написание: id города}; недостающие города создаются"""
+    spellings_by_key = defaultdict(Counter)
+    for spelling, total in counts.items():
+        key = normalize_city(spelling)
+        if key:
+            spellings_by_key[key][clean_city_name(spelling)] += total
+
+    known = dict(City.objects.filter(key__in=spellings_by_key).values_list('key', 'id'))
+    City.objects.bulk_create([
+        City(key=key, name=preferred_name(spellings))
+        for key, spellings in spellings_by_key.items() if key not in known
+    ], ignore_conflicts=True)
+    known.update(City.objects.filter(key__in=set(spellings_by_key) - set(known)).values_list('key', 'id'))
+
+    return {spelling: known[normalize_city(spelling)] for spelling in counts if normalize_city(spelling)}
+
+
+def link_cities(queryset):
+    """Проставляет city_ref строкам queryset без него; возвращает число обновлённых строк"""
+    counts = dict(unlinked(queryset).order_by().values_list('city').annotate(total=Count('pk')))
+    if not counts:
+        return 0
+    updated = 0
+    with transaction.atomic():
+        for spelling, city_id in resolve_spellings(counts).items():
+            updated += unlinked(queryset).filter(city=spelling).update(city_ref_id=city_id)
+    return updated
@@ -0,0 +1,30 @@
+from django.db.models import Q
+from django_filters import CharFilter
+
+from .index import city_index
+from .models import City
+from .normalize import normalize_city
+
+
+class CityFilter(CharFilter):
+    """
+    Город по справочнику: написание нормализуется, фильтр идёт по индексированному
+    city_ref. Как и прежний icontains, «каз» находит Казань — совпадает начало
+    названия или любого его слова. id городов берутся из индекса в памяти; если
+    он ничего не знает (город только что создан в другом процессе), — тем же
+    условием по City.key подзапросом.
+    """
+
+    def __init__(self, field_name='city_ref', **kwargs):
+        super().__init__(field_name=field_name, **kwargs)
+
+    def filter(self, qs, value):
+        if value in ([], (), {}, '', None):
+            return qs
+        ids = city_index.match_ids(value)
+        if not ids:
+            key = normalize_city(value)
+            if not key:
+                return qs.none()
+            ids = City.objects.filter(Q(key__startswith=key) | Q(key__contains=f' {key}')).values('pk')
+        return qs.filter(**{f'{self.field_name}__in': ids})
@@ -0,0 +1,208 @@
+"""
+Автодополнение городов: префиксное дерево в памяти процесса.
+
+Каждый город лежит в дереве под своим ключом (normalize_city) и под хвостами
+ключа с каждого слова, поэтому «новг» находит «Нижний Новгород». Узел хранит
+id всех городов под ним и лениво отсортированный топ: популярные (больше
+объявлений и пользователей) выше. Ответ — проход по символам префикса без
+запросов к БД.
+
+Индекс загружается при старте (warm_city_index из wsgi/asgi) или при первом
+обращении. Изменения своего процесса попадают в него сразу через сигналы,
+чужих — раз в CITY_INDEX_REFRESH_INTERVAL секунд одним запросом по updated_at.
+updated_at ставится до коммита, поэтому запрос перечитывает и окно
+CITY_INDEX_REFRESH_OVERLAP секунд до последней виденной отметки: строка,
+закоммиченная позже более новых, не пропадёт до полной перестройки.
+Раз в CITY_INDEX_RELOAD_INTERVAL секунд индекс строится заново: так
+обновляется популярность и уходят города, удалённые в других процессах.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Count
+
+from .normalize import normalize_city
+
+logger = logging.getLogger(__name__)
+
+TOP_SIZE = 20
+
+
+class _Node:
+    __slots__ = ('children', 'ids', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+        self.top = None
+
+
+def _terms(key):
+    words = key.split(' ')
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class CityIndex:
+    def __init__(self, refresh_interval=None, reload_interval=None):
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._root = _Node()
+        self._cities = {}  # id -> (name, key, weight)
+        self._synced = None
+        self._loaded_at = None
+        self._refreshed_at = 0.0
+
+    def get_refresh_interval(self):
+        if self.refresh_interval is not None:
+            return self.refresh_interval
+        return getattr(settings, 'CITY_INDEX_REFRESH_INTERVAL', 30)
+
+    def get_refresh_overlap(self):
+        return getattr(settings, 'CITY_INDEX_REFRESH_OVERLAP', 60)
+
+    def get_reload_interval(self):
+        if self.reload_interval is not None:
+            return self.reload_interval
+        return getattr(settings, 'CITY_INDEX_RELOAD_INTERVAL', 600)
+
+    @property
+    def is_loaded(self):
+        return self._loaded_at is not None
+
+    def _insert(self, root, cities, city_id):
+        for term in _terms(cities[city_id][1]):
+            node = root
+            for char in term:
+                node = node.children.setdefault(char, _Node())
+                node.ids.add(city_id)
+                node.top = None
+
+    def _discard(self, city_id):
+        entry = self._cities.pop(city_id, None)
+        if entry is None:
+            return None
+        for term in _terms(entry[1]):
+            node = self._root
+            for char in term:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                node.ids.discard(city_id)
+                node.top = None
+        return entry
+
+    def load(self):
+        """Строит индекс заново: города одним запросом, популярность — двумя GROUP BY"""
+        City = apps.get_model('cities', 'City')
+        weights = {}
+        for model, condition in [('listings.Listing', {'status': 'active'}), ('users.User', {})]:
+            rows = (
+                apps.get_model(model).objects.filter(city_ref__isnull=False, **condition)
+                .order_by().values_list('city_ref_id').annotate(total=Count('pk'))
+            )
+            for city_id, total in rows:
+                weights[city_id] = weights.get(city_id, 0) + total
+
+        root, cities, synced = _Node(), {}, None
+        for city_id, name, key, updated_at in City.objects.values_list('id', 'name', 'key', 'updated_at'):
+            cities[city_id] = (name, key, weights.get(city_id, 0))
+            self._insert(root, cities, city_id)
+            synced = updated_at if synced is None else max(synced, updated_at)
+
+        with self._lock:
+            self._root, self._cities, self._synced = root, cities, synced
+            self._loaded_at = self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        """Подтягивает города, созданные или переименованные после последней загрузки"""
+        City = apps.get_model('cities', 'City')
+        rows = City.objects.order_by('updated_at').values_list('id', 'name', 'key', 'updated_at')
+        if self._synced is not None:
+            rows = rows.filter(updated_at__gte=self._synced - timedelta(seconds=self.get_refresh_overlap()))
+        rows = list(rows)
+        with self._lock:
+            for city_id, name, key, updated_at in rows:
+                # Окно перекрытия возвращает и уже известные города — их не трогаем
+                if self._cities.get(city_id, ())[:2] != (name, key):
+                    self.put(city_id, name, key)
+                self._synced = updated_at if self._synced is None else max(self._synced, updated_at)
+            self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.get_reload_interval():
+            with self._lock:
+                if self._loaded_at is None or now - self._loaded_at >= self.get_reload_interval():
+                    self.load()
+        elif now - self._refreshed_at >= self.get_refresh_interval():
+            self.refresh()
+
+    def put(self, city_id, name, key):
+        if not self.is_loaded:
+            return
+        with self._lock:
+            previous = self._discard(city_id)
+            self._cities[city_id] = (name, key, previous[2] if previous else 0)
+            self._insert(self._root, self._cities, city_id)
+
+    def remove(self, city_id):
+        with self._lock:
+            self._discard(city_id)
+
+    def _find(self, key):
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def suggest(self, query, limit=10):
+        """[{'id', 'name'}] городов, у которых с query начинается название или одно из его слов"""
+        key = normalize_city(query)
+        if not key:
+            return []
+        self.ensure_fresh()
+        node = self._find(key)
+        if node is None:
+            return []
+        top = node.top
+        if top is None:
+            with self._lock:
+                cities = self._cities
+                ranked = sorted(node.ids, key=lambda pk: (-cities[pk][2], cities[pk][0]))[:TOP_SIZE]
+                top = node.top = [{'id': pk, 'name': cities[pk][0]} for pk in ranked]
+        return top[:limit]
+
+    def match_ids(self, query):
+        """id всех городов для фильтра: совпадение названия или начала любого его слова"""
+        key = normalize_city(query)
+        if not key:
+            return []
+        self.ensure_fresh()
+        node = self._find(key)
+        if node is None:
+            return []
+        with self._lock:
+            return list(node.ids)
+
+
+city_index = CityIndex()
+
+
+def warm_city_index():
+    """Загружает индекс в фоне при старте процесса, не задерживая приём запросов"""
+
+    def load():
+        try:
+            city_index.ensure_fresh()
+        except Exception:
+            # Например, миграции ещё не применены: индекс загрузится при первом запросе
+            logger.warning('Индекс городов не загружен при старте', exc_info=True)
+
+    threading.Thread(target=load, name='city-index', daemon=True).start()
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.cities.backfill import link_cities
+from apps.cities.models import City
+from apps.listings.models import Listing
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Заполняет справочник городов из Listing.city и User.city и проставляет city_ref'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        before = City.objects.count()
+        listings = link_cities(Listing.objects.all())
+        users = link_cities(User.objects.all())
+        self.stdout.write(
+            f'Городов в справочнике: {City.objects.count()} (новых {City.objects.count() - before}); '
+            f'привязано объявлений: {listings}, пользователей: {users} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
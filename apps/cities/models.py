@@ -0,0 +1,60 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+
+from .normalize import KEY_LENGTH, clean_city_name, normalize_city
+
+
+class CityManager(models.Manager):
+    def resolve(self, name):
+        """Город из справочника по любому написанию; при первом упоминании создаётся. None — если названия нет"""
+        key = normalize_city(name)
+        if not key:
+            return None
+        city = self.filter(key=key).first()
+        if city is None:
+            try:
+                with transaction.atomic():
+                    city = self.create(key=key, name=clean_city_name(name))
+            except IntegrityError:
+                # Тот же город одновременно создал другой запрос
+                city = self.get(key=key)
+        return city
+
+
+class City(models.Model):
+    name = models.CharField(max_length=100, verbose_name='Название')
+    # Нормализованное написание (normalize_city): варианты одного города дают один ключ
+    key = models.CharField(max_length=KEY_LENGTH, unique=True, editable=False, verbose_name='Ключ')
+    # По нему индекс автодополнения подтягивает изменения из других процессов
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = CityManager()
+
+    class Meta:
+        verbose_name = 'Город'
+        verbose_name_plural = 'Города'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        if City.objects.filter(key=normalize_city(self.name)).exclude(pk=self.pk).exists():
+            raise ValidationError({'name': 'Этот город уже есть в справочнике'})
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_city(self.name)
+        super().save(*args, **kwargs)
+
+
+class CityRefMixin:
+    """Модель с текстовым city и city_ref: при save() город берётся из справочника"""
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'city' in update_fields:
+            city = City.objects.resolve(self.city)
+            self.city_ref_id = city.pk if city else None
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'city_ref'}
+        super().save(*args, **kwargs)
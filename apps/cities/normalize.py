@@ -0,0 +1,58 @@
+"""
+Нормализация названий городов.
+
+Ключ города — написание, в котором сходятся варианты: регистр, ё/е, «г.» и
+«город» в начале, дефисы и лишние пробелы, латиница и кириллица. Кириллица
+транслитерируется в латиницу, после чего расходящиеся системы транслитерации
+сводятся к одной: «Нижний Новгород», «нижний новгород», «Nizhniy Novgorod» и
+«Nizhny Novgorod» дают ключ nizhny novgorod.
+"""
+import re
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p',
+    'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch',
+    'ш': 'sh', 'щ': 'sch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    # Украинский и казахский алфавиты
+    'і': 'i', 'ї': 'yi', 'є': 'ye', 'ґ': 'g', 'ә': 'a', 'ғ': 'g', 'қ': 'k', 'ң': 'n',
+    'ө': 'o', 'ұ': 'u', 'ү': 'u', 'һ': 'h',
+}
+
+# Правила поверх латиницы: после них разные транслитерации одного названия совпадают
+LATIN_RULES = [
+    (re.compile(r"['`’ʹ]"), ''),
+    (re.compile(r'shch'), 'sch'),
+    (re.compile(r'kh'), 'h'),
+    (re.compile(r'yo'), 'e'),
+    (re.compile(r'x'), 'ks'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'\bye'), 'e'),
+    (re.compile(r'(iy|yy|ii|ij|yj)\b'), 'y'),
+]
+
+PREFIX = re.compile(r'^((г|гор|g)(\.\s*|\s+)|(город|gorod)\s+)')
+SEPARATORS = re.compile(r'[\s\-‐–—_.,()/]+')
+KEY_LENGTH = 255
+
+
+def clean_city_name(name):
+    """Написание для показа: без «г.» и лишних пробелов, с заглавной буквы"""
+    name = ' '.join((name or '').split())
+    prefix = PREFIX.match(name.lower())
+    if prefix:
+        name = name[prefix.end():]
+    if name.islower():
+        name = name[:1].upper() + name[1:]
+    return name
+
+
+def normalize_city(name):
+    """Ключ для сравнения и поиска; '' — если названия нет"""
+    value = ' '.join((name or '').split()).casefold().replace('ё', 'е')
+    value = PREFIX.sub('', value)
+    value = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in value)
+    value = SEPARATORS.sub(' ', value).strip()
+    for pattern, replacement in LATIN_RULES:
+        value = pattern.sub(replacement, value)
+    return value[:KEY_LENGTH]
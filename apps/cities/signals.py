@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .index import city_index
+from .models import City
+
+
+@receiver(post_save, sender=City)
+def city_saved(sender, instance, **kwargs):
+    city_index.put(instance.pk, instance.name, instance.key)
+
+
+@receiver(post_delete, sender=City)
+def city_deleted(sender, instance, **kwargs):
+    city_index.remove(instance.pk)
@@ -0,0 +1,22 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .index import city_index
+
+MAX_LIMIT = 20
+
+
+class CityAutocompleteView(APIView):
+    """Подсказки городов по началу названия: ?q=каз&limit=10. Отвечает из памяти, без БД"""
+    permission_classes = [permissions.AllowAny]
+    # Публичные подсказки: проверка токена стоила бы запроса на каждое нажатие клавиши
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+        suggestions = city_index.suggest(request.query_params.get('q', ''), limit)
+        return Response(suggestions, headers={'Cache-Control': 'public, max-age=300'})
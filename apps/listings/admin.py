@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Listing, ListingImage, Favorite, Message
+from .models import Listing, ListingImage, Favorite, Message, Conversation, ListingImportJob
 
 
 class ListingImageInline(admin.TabularInline):
@@ -18,3 +18,16 @@ class ListingAdmin(admin.ModelAdmin):
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ['sender', 'recipient', 'listing', 'is_read', 'created_at']
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['listing', 'buyer', 'seller', 'buyer_unread', 'seller_unread', 'last_message_at']
+    raw_id_fields = ['listing', 'buyer', 'seller', 'last_message']
+
+
+@admin.register(ListingImportJob)
+class ListingImportJobAdmin(admin.ModelAdmin):
+    list_display = ['seller', 'status', 'rows_processed', 'created_count', 'error_count', 'created_at', 'finished_at']
+    list_filter = ['status']
+    raw_id_fields = ['seller']
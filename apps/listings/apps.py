@@ -5,3 +5,6 @@ class ListingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.listings'
     verbose_name = 'Объявления'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,334 @@
+"""
+Массовый импорт и экспорт объявлений продавца.
+
+Импорт читает CSV или JSONL построчно из сохранённого файла, проверяет каждую
+строку правилами ListingDetailSerializer и вставляет объявления и фото пачками
+через bulk_create. Фото — ссылки http(s) или имена файлов в загруженном
+ZIP-архиве (колонка images, в CSV через «|»); каждое сразу пишется в хранилище
+и дальше обрабатывается обычным фоновым конвейером. Прогресс и ошибки по
+строкам пишутся в ListingImportJob после каждой пачки. Загруженные файл и
+архив удаляются из хранилища, как только задание закончено (успешно или нет).
+"""
+import csv
+import http.client
+import io
+import ipaddress
+import json
+import logging
+import posixpath
+import socket
+import ssl
+import zipfile
+from contextlib import ExitStack
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from apps.categories.models import Category
+from apps.categories.tree import invalidate_category_tree
+from apps.cities.backfill import link_cities
+from marketplace import response_cache
+from .models import Listing, ListingImage, ListingImportJob
+from .serializers import ListingDetailSerializer
+from .suggest import suggestion_index
+from .tasks import schedule_image_processing
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLUMNS = ['title', 'description', 'price', 'is_negotiable', 'category_id', 'city', 'condition']
+EXPORT_COLUMNS = ['id', *IMPORT_COLUMNS, 'status', 'views_count', 'created_at', 'images']
+
+MAX_IMAGES_PER_LISTING = 10
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RowError(Exception):
+    """Строку нельзя импортировать; errors — {поле: [сообщения]}"""
+
+    def __init__(self, errors):
+        if isinstance(errors, str):
+            errors = {'row': [errors]}
+        super().__init__(errors)
+        self.errors = errors
+
+
+def detect_format(name):
+    extension = posixpath.splitext(name.lower())[1]
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return None
+
+
+def read_rows(raw, fmt):
+    """Строки файла по одной: dict или RowError для нечитаемой строки"""
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            yield from _csv_rows(text)
+        else:
+            yield from _jsonl_rows(text)
+    finally:
+        # Файл закрывает вызывающий; прогресс читается по raw.tell()
+        text.detach()
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield RowError(f'Некорректная строка CSV: {e}')
+
+
+def _jsonl_rows(text):
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield RowError('Некорректный JSON')
+            continue
+        yield row if isinstance(row, dict) else RowError('Строка должна быть JSON-объектом')
+
+
+def _split_images(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split('|')
+    return [ref.strip() for ref in value if isinstance(ref, str) and ref.strip()]
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """Соединение с заранее проверенным адресом: повторного разрешения имени (DNS rebinding) нет"""
+
+    def __init__(self, host, address, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, host, address, **kwargs):
+        self.tls_context = ssl.create_default_context()
+        super().__init__(host, context=self.tls_context, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        # Сертификат и SNI — по имени из ссылки, подключение — по проверенному адресу
+        self.sock = self.tls_context.wrap_socket(sock, server_hostname=self.host)
+
+
+def fetch_image(url):
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise RowError(f'Некорректная ссылка на фото: {url}')
+    if not _setting('LISTING_IMPORT_ALLOW_URLS', True):
+        raise RowError('Загрузка фото по ссылкам отключена')
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        addresses = [info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)]
+    except (OSError, ValueError):
+        raise RowError(f'Не удалось найти сервер: {parsed.hostname}')
+    if not addresses or any(not ipaddress.ip_address(address).is_global for address in addresses):
+        raise RowError(f'Ссылка ведёт во внутреннюю сеть: {url}')
+
+    connection_class = _PinnedHTTPSConnection if parsed.scheme == 'https' else _PinnedHTTPConnection
+    connection = connection_class(parsed.hostname, addresses[0], port=port, timeout=10)
+    path = parsed._replace(scheme='', netloc='', fragment='').geturl() or '/'
+    try:
+        # Редиректы не выполняются: они увели бы запрос на непроверенный адрес
+        connection.request('GET', path, headers={'User-Agent': 'marketplace-import'})
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RowError(f'Не удалось скачать фото {url}: HTTP {response.status}')
+        data = response.read(MAX_IMAGE_SIZE + 1)
+    except (OSError, http.client.HTTPException) as e:
+        raise RowError(f'Не удалось скачать фото {url}: {e}')
+    finally:
+        connection.close()
+    if len(data) > MAX_IMAGE_SIZE:
+        raise RowError(f'Фото больше 10 МБ: {url}')
+    return data
+
+
+def _plain_errors(errors):
+    return {field: [str(message) for message in messages] for field, messages in errors.items()}
+
+
+class ListingImporter:
+    def __init__(self, job, archive=None, on_progress=None):
+        self.job = job
+        self.archive = archive
+        self.on_progress = on_progress
+        self.batch_size = _setting('LISTING_IMPORT_BATCH_SIZE', 500)
+        self.max_errors = _setting('LISTING_IMPORT_MAX_STORED_ERRORS', 1000)
+        # Из БД, а не из кэша дерева: в памяти процесса оно может не знать о чужих изменениях
+        self.category_ids = set(Category.objects.values_list('id', flat=True))
+        self.pending = []
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, raw, fmt):
+        for number, row in enumerate(read_rows(raw, fmt), start=1):
+            self.rows = number
+            try:
+                self.pending.append(self.build(row))
+            except RowError as e:
+                self.add_error(number, e.errors)
+            if len(self.pending) >= self.batch_size:
+                self.flush(raw)
+        self.flush(raw)
+
+    def add_error(self, number, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def build(self, row):
+        if isinstance(row, RowError):
+            raise row
+        data = {key: row[key] for key in IMPORT_COLUMNS if row.get(key) not in (None, '')}
+        serializer = ListingDetailSerializer(data=data)
+        if not serializer.is_valid():
+            raise RowError(_plain_errors(serializer.errors))
+        values = serializer.validated_data
+        if values.get('category_id') is not None and values['category_id'] not in self.category_ids:
+            raise RowError({'category_id': ['Категория не найдена']})
+
+        refs = _split_images(row.get('images'))
+        if len(refs) > MAX_IMAGES_PER_LISTING:
+            raise RowError({'images': [f'Не больше {MAX_IMAGES_PER_LISTING} фото']})
+        names = []
+        try:
+            for ref in refs:
+                names.append(self.save_image(ref))
+        except RowError:
+            for name in names:
+                default_storage.delete(name)
+            raise
+        return Listing(seller_id=self.job.seller_id, **values), names
+
+    def save_image(self, ref):
+        if ref.startswith(('http://', 'https://')):
+            data = fetch_image(ref)
+            name = posixpath.basename(urlparse(ref).path) or 'photo.jpg'
+        else:
+            if self.archive is None:
+                raise RowError(f'Фото {ref} не найдено: архив не загружен')
+            try:
+                info = self.archive.getinfo(ref)
+            except KeyError:
+                raise RowError(f'Фото {ref} не найдено в архиве')
+            if info.file_size > MAX_IMAGE_SIZE:
+                raise RowError(f'Фото больше 10 МБ: {ref}')
+            data = self.archive.read(info)
+            name = posixpath.basename(ref)
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            name += '.jpg'
+        return default_storage.save(ListingImage.image.field.upload_to + name, ContentFile(data))
+
+    def flush(self, raw):
+        if self.pending:
+            with transaction.atomic():
+                listings = Listing.objects.bulk_create([listing for listing, _ in self.pending])
+                images = ListingImage.objects.bulk_create([
+                    ListingImage(listing=listing, image=name, order=order)
+                    for listing, (_, names) in zip(listings, self.pending)
+                    for order, name in enumerate(names)
+                ])
+                # bulk_create не шлёт сигналов — ставим фото в обработку сами
+                for image in images:
+                    schedule_image_processing(image.pk)
+            for listing in listings:
+                if listing.status == 'active':
+                    suggestion_index.add_listing(listing.title, listing.created_at)
+            self.created += len(listings)
+            self.pending = []
+        self.save_progress(bytes_read=raw.tell())
+
+    def save_progress(self, **extra):
+        fields = dict(
+            rows_processed=self.rows, created_count=self.created,
+            error_count=self.error_count, errors=self.errors, **extra,
+        )
+        ListingImportJob.objects.filter(pk=self.job.pk).update(**fields)
+        if self.on_progress:
+            self.on_progress(self)
+
+
+def run_import(job_id, on_progress=None):
+    job = ListingImportJob.objects.get(pk=job_id)
+    try:
+        _run_import(job, on_progress)
+    finally:
+        # Загруженные файлы нужны только на время импорта — иначе хранилище растёт без предела
+        _delete_uploads(job)
+
+
+def _run_import(job, on_progress):
+    ListingImportJob.objects.filter(pk=job.pk).update(status='running', bytes_total=job.source.size)
+    importer = ListingImporter(job, on_progress=on_progress)
+    status = 'done'
+    try:
+        with ExitStack() as stack:
+            raw = stack.enter_context(job.source.open('rb')).file
+            if job.images_archive:
+                archive_file = stack.enter_context(job.images_archive.open('rb')).file
+                importer.archive = stack.enter_context(zipfile.ZipFile(archive_file))
+            importer.run(raw, detect_format(job.source.name))
+    except Exception as e:
+        # Например, файл не в UTF-8 или битый архив: уже вставленные пачки остаются
+        logger.exception('Импорт %s прерван', job.pk)
+        importer.add_error(importer.rows + 1, {'file': [str(e)]})
+        status = 'failed'
+    finally:
+        if importer.created:
+            # bulk_create не шлёт сигналов и не вызывает save(): город и кэши — вручную
+            link_cities(Listing.objects.filter(seller_id=job.seller_id))
+            invalidate_category_tree()
+            response_cache.bump('listings', 'categories')
+    extra = {'bytes_read': job.source.size} if status == 'done' else {}
+    importer.save_progress(status=status, finished_at=timezone.now(), **extra)
+
+
+def _delete_uploads(job):
+    for upload in (job.source, job.images_archive):
+        if not upload:
+            continue
+        try:
+            upload.delete(save=False)
+        except OSError:
+            logger.warning('Не удалось удалить файл импорта %s', upload.name, exc_info=True)
+    ListingImportJob.objects.filter(pk=job.pk).update(source='', images_archive=None)
+
+
+def export_rows(seller, request):
+    """Объявления продавца для выгрузки; фото — абсолютными ссылками"""
+    images = Prefetch('images', queryset=ListingImage.objects.only('id', 'listing_id', 'image', 'order'))
+    listings = Listing.objects.filter(seller=seller).order_by('pk').prefetch_related(images)
+    for listing in listings.iterator(chunk_size=1000):
+        row = {column: getattr(listing, column) for column in EXPORT_COLUMNS[:-1]}
+        row['images'] = [request.build_absolute_uri(image.image.url) for image in listing.images.all()]
+        yield row
@@ -0,0 +1,149 @@
+"""
+Отложенная запись просмотров объявлений (write-behind).
+
+Просмотры копятся в памяти процесса и раз в LISTING_VIEWS_FLUSH_INTERVAL секунд
+записываются в Listing.views_count одним UPDATE на все объявления сразу —
+вместо UPDATE + refresh_from_db и блокировки строки на каждый GET.
+Повторные просмотры одного зрителя в течение LISTING_VIEWS_DEDUP_WINDOW секунд
+не считаются (0 — считать все).
+
+Сбрасывает фоновый поток (start_view_flusher из wsgi/asgi), независимо от
+запросов; при штатной остановке процесса остаток пишется через atexit. Если
+процесс убит (SIGKILL, таймаут воркера), теряется не больше одного интервала.
+Без потока (команды manage.py) сброс идёт при просмотре, когда интервал истёк.
+Ошибка записи не доходит до запроса: просмотры возвращаются в буфер.
+После записи увеличивается поколение кэша ответов 'listings' (не чаще раза
+в интервал): views_count есть в ответах и их ETag, а updated_at не меняется.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+from marketplace import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, flush_interval=None, dedup_window=None):
+        self.flush_interval = flush_interval
+        self.dedup_window = dedup_window
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread = None
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'LISTING_VIEWS_FLUSH_INTERVAL', 10)
+
+    def get_dedup_window(self):
+        if self.dedup_window is not None:
+            return self.dedup_window
+        return getattr(settings, 'LISTING_VIEWS_DEDUP_WINDOW', 0)
+
+    def is_repeat(self, listing_id, viewer):
+        window = self.get_dedup_window()
+        if not window or not viewer:
+            return False
+        return not cache.add(f'listing-view:{listing_id}:{viewer}', 1, timeout=window)
+
+    def hit(self, listing_id, viewer=None):
+        """
+        Засчитывает просмотр. Возвращает число просмотров, которых ещё нет
+        в строке, прочитанной из БД до вызова (включая только что сброшенные).
+        """
+        if self.is_repeat(listing_id, viewer):
+            return self.pending(listing_id)
+
+        with self._lock:
+            self._pending[listing_id] += 1
+            unseen = self._pending[listing_id]
+            due = (
+                not self.is_running
+                and time.monotonic() - self._last_flush >= self.get_flush_interval()
+            )
+        if due:
+            self.flush()
+        return unseen
+
+    def pending(self, listing_id):
+        with self._lock:
+            return self._pending.get(listing_id, 0)
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Запускает фоновый сброс раз в get_flush_interval() секунд"""
+        with self._lock:
+            # После fork поток родителя в дочернем процессе не жив — запускаем свой
+            if self.is_running:
+                return
+            self._thread = threading.Thread(target=self._run, name='listing-views-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.get_flush_interval())
+            self.flush()
+            # У потока своё соединение с БД — закрываем его, как после запроса
+            connection.close_if_unusable_or_obsolete()
+
+    def flush(self):
+        """Записывает накопленные просмотры одним UPDATE ... CASE"""
+        from .models import Listing
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        delta = Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in pending.items()],
+            default=Value(0), output_field=IntegerField(),
+        )
+        try:
+            Listing.objects.filter(pk__in=list(pending)).update(views_count=F('views_count') + delta)
+        except Exception:
+            # Не теряем просмотры, если БД временно недоступна: запишем при следующем сбросе
+            with self._lock:
+                self._pending.update(pending)
+            logger.warning('Просмотры объявлений не записаны (%d шт.), повтор при следующем сбросе',
+                           len(pending), exc_info=True)
+            return 0
+        response_cache.bump('listings')
+        return len(pending)
+
+
+view_counter = ViewCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    view_counter.flush()
+
+
+def start_view_flusher():
+    """Фоновый сброс просмотров; вызывается при старте процесса (wsgi/asgi)"""
+    view_counter.start()
+
+
+def get_viewer_key(request):
+    """Идентификатор зрителя для дедупликации: пользователь или IP"""
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
@@ -0,0 +1,161 @@
+"""
+Фасеты поиска объявлений: счётчики для боковой панели фильтров.
+
+Считаются по той же выборке, что и лента (ListingFilter + поиск), фиксированным
+числом группирующих запросов: категории, состояние, города (по справочнику) — по одному
+GROUP BY, цены — агрегат min/max и один запрос с условными COUNT по корзинам.
+Каждый фасет не учитывает собственный фильтр: выбрав «Б/У», пользователь всё
+равно видит, сколько объявлений «Новое», а в выбранной категории — соседние.
+
+Счётчики категорий суммируются вверх по дереву (родитель включает подкатегории);
+имена и пути берутся из кэшированного дерева, без запросов.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, Min, Q
+
+from apps.categories.tree import get_category_nodes, get_category_tree
+from .models import Listing
+
+TOP_CITIES = 10
+PRICE_BUCKETS = 8
+MAX_PRICE_BUCKETS = 12
+# Разброс цен, начиная с которого корзины идут по логарифмической шкале
+LOG_SCALE_RATIO = 20
+LOG_SERIES = [(1, 2, 5), (1, 3), (1,)]
+
+# Параметры запроса, которые каждый фасет игнорирует
+OWN_PARAMS = {
+    'categories': ['category'],
+    'conditions': ['condition'],
+    'cities': ['city'],
+    'price': ['min_price', 'max_price'],
+}
+
+
+def category_facet(queryset):
+    counts = dict(
+        queryset.filter(category__isnull=False).order_by()
+        .values_list('category_id').annotate(total=Count('pk'))
+    )
+    nodes = get_category_nodes()
+    rolled = {}
+    for category_id, total in counts.items():
+        node = nodes.get(category_id)
+        while node:
+            rolled[node['id']] = rolled.get(node['id'], 0) + total
+            node = nodes.get(node['parent'])
+
+    result = []
+
+    def walk(children):
+        for node in children:
+            if rolled.get(node['id']):
+                result.append({
+                    'id': node['id'], 'name': node['name'], 'slug': node['slug'],
+                    'parent': node['parent'], 'count': rolled[node['id']],
+                })
+                walk(node['children'])
+
+    walk(get_category_tree())
+    return result
+
+
+def condition_facet(queryset):
+    counts = dict(queryset.order_by().values_list('condition').annotate(total=Count('pk')))
+    return [
+        {'value': value, 'label': label, 'count': counts[value]}
+        for value, label in Listing.CONDITION_CHOICES if counts.get(value)
+    ]
+
+
+def city_facet(queryset, limit=TOP_CITIES):
+    # По справочнику: «Москва», «москва» и «г. Москва» — один город
+    rows = (
+        queryset.filter(city_ref__isnull=False).order_by().values('city_ref_id', name=F('city_ref__name'))
+        .annotate(count=Count('pk')).order_by('-count', 'name')[:limit]
+    )
+    return [{'id': row['city_ref_id'], 'value': row['name'], 'count': row['count']} for row in rows]
+
+
+def _nice_step(raw):
+    """Наименьшее «круглое» число вида 1, 2, 5 × 10^n не меньше raw"""
+    magnitude = Decimal(10) ** raw.adjusted()
+    for multiplier in (1, 2, 5, 10):
+        if multiplier * magnitude >= raw:
+            return multiplier * magnitude
+
+
+def _log_edges(low, high, series):
+    values = []
+    magnitude = Decimal(1)
+    while not values or values[-1] <= high:
+        values.extend(multiplier * magnitude for multiplier in series)
+        magnitude *= 10
+    values = values[:next(i for i, value in enumerate(values) if value > high) + 1]
+    if low < 1:
+        return [Decimal(0), *values]
+    # Первая граница — последнее значение ряда, не превышающее low
+    first = max(i for i, value in enumerate(values) if value <= low)
+    return values[first:]
+
+
+def price_edges(low, high, buckets=PRICE_BUCKETS):
+    """
+    Границы корзин «круглыми» числами, корзина — [from, to).
+    Узкий разброс — равные шаги 1/2/5 × 10^n; широкий (цены обычно так
+    распределены) — логарифмическая шкала 1-2-5, 1-3 или по порядкам.
+    """
+    if low is None:
+        return []
+    if high > LOG_SCALE_RATIO * max(low, Decimal(1)):
+        for series in LOG_SERIES:
+            edges = _log_edges(low, high, series)
+            if len(edges) - 1 <= MAX_PRICE_BUCKETS:
+                return edges
+        return edges
+    step = _nice_step(max(high - low, Decimal(1)) / buckets)
+    edge = (low // step) * step
+    edges = [edge]
+    while edge <= high:
+        edge += step
+        edges.append(edge)
+    return edges
+
+
+def _number(value):
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def price_facet(queryset):
+    queryset = queryset.order_by()
+    stats = queryset.aggregate(low=Min('price'), high=Max('price'))
+    edges = price_edges(stats['low'], stats['high'])
+    if not edges:
+        return {'min': None, 'max': None, 'buckets': []}
+    pairs = list(zip(edges, edges[1:]))
+    counts = queryset.aggregate(**{
+        f'b{i}': Count('pk', filter=Q(price__gte=start, price__lt=end))
+        for i, (start, end) in enumerate(pairs)
+    })
+    return {
+        'min': _number(stats['low']),
+        'max': _number(stats['high']),
+        'buckets': [
+            {'from': _number(start), 'to': _number(end), 'count': counts[f'b{i}']}
+            for i, (start, end) in enumerate(pairs)
+        ],
+    }
+
+
+FACETS = {
+    'categories': category_facet,
+    'conditions': condition_facet,
+    'cities': city_facet,
+    'price': price_facet,
+}
+
+
+def compute_facets(filtered):
+    """filtered(skip) — выборка со всеми фильтрами запроса, кроме параметров skip"""
+    return {name: facet(filtered(OWN_PARAMS[name])) for name, facet in FACETS.items()}
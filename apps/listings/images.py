@@ -0,0 +1,74 @@
+"""Обработка фотографий объявлений (Pillow)"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+THUMBNAIL_SIZE = (400, 400)
+THUMBNAIL_QUALITY = 80
+
+# Оригинал ужимается до этой стороны и перекодируется без EXIF
+MAX_ORIGINAL_SIZE = 2048
+ORIGINAL_QUALITY = 85
+
+# Ширины WebP-копий для srcset
+RENDITION_WIDTHS = (320, 640, 1280)
+RENDITION_QUALITY = 80
+
+
+def _base_name(image_file):
+    return os.path.splitext(os.path.basename(image_file.name))[0]
+
+
+def open_normalized(image_file):
+    """Открывает фото, поворачивает по EXIF и приводит к RGB (EXIF при этом отбрасывается)"""
+    image_file.seek(0)
+    with Image.open(image_file) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.load()
+    return img
+
+
+def encode(img, format, quality):
+    buffer = BytesIO()
+    if format == 'WEBP':
+        img.save(buffer, format='WEBP', quality=quality, method=4)
+    else:
+        img.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_renditions(image_file):
+    """
+    Готовит все версии фото:
+    original — JPEG не больше MAX_ORIGINAL_SIZE без EXIF,
+    thumbnail — карточка ленты,
+    renditions — WebP-копии по RENDITION_WIDTHS (не шире оригинала).
+    """
+    name = _base_name(image_file)
+    img = open_normalized(image_file)
+    img.thumbnail((MAX_ORIGINAL_SIZE, MAX_ORIGINAL_SIZE))
+
+    thumb = img.copy()
+    thumb.thumbnail(THUMBNAIL_SIZE)
+
+    renditions = []
+    for width in RENDITION_WIDTHS:
+        if width >= img.width and renditions:
+            break
+        width = min(width, img.width)
+        height = round(img.height * width / img.width)
+        resized = img.resize((width, height), Image.LANCZOS)
+        content = ContentFile(encode(resized, 'WEBP', RENDITION_QUALITY), name=f'{name}_{width}.webp')
+        renditions.append({'format': 'webp', 'width': width, 'height': height, 'file': content})
+
+    return {
+        'original': ContentFile(encode(img, 'JPEG', ORIGINAL_QUALITY), name=f'{name}.jpg'),
+        'width': img.width,
+        'height': img.height,
+        'thumbnail': ContentFile(encode(thumb, 'JPEG', THUMBNAIL_QUALITY), name=f'{name}_thumb.jpg'),
+        'renditions': renditions,
+    }
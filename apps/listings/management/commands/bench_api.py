@@ -0,0 +1,198 @@
+import json
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.categories.models import Category
+from apps.listings.models import Listing, Message
+from apps.listings.serializers import ListingDetailSerializer, ListingListSerializer, MessageSerializer
+from apps.users.models import User
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Замеряет горячие эндпоинты и сериализаторы; пишет задержки и число запросов в JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', default='bench_results.json')
+        parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+        parser.add_argument('--with-cache', action='store_true',
+                            help='Не отключать кэш ответов для анонимных запросов')
+        parser.add_argument('--only', nargs='*', help='Запустить только сценарии с этими именами')
+
+    def handle(self, *args, **options):
+        listing = Listing.objects.filter(status='active').order_by('-views_count').first()
+        if listing is None:
+            raise CommandError('Нет объявлений — сначала запустите generate_data')
+        category = (
+            Category.objects.filter(parent__isnull=True)
+            .annotate(n=Count('children')).order_by('-n').first()
+        )
+        recipient = (
+            Message.objects.values('recipient').annotate(n=Count('id')).order_by('-n').first()
+        )
+        user = User.objects.get(pk=recipient['recipient']) if recipient else listing.seller
+
+        anon = APIClient()
+        auth = APIClient()
+        auth.force_authenticate(user)
+
+        scenarios = [
+            ('listings', anon, '/api/listings/'),
+            ('listings_auth', auth, '/api/listings/'),
+            ('listings_filtered', anon,
+             f'/api/listings/?category={category.pk if category else ""}&min_price=1000&max_price=50000&condition=used'),
+            ('listings_search', anon, '/api/listings/?search=велосипед'),
+            ('listings_order_price', anon, '/api/listings/?ordering=price&page=50'),
+            ('listings_order_views', anon, '/api/listings/?ordering=-views_count'),
+            ('listings_cursor', anon, '/api/listings/?cursor=&ordering=price'),
+            ('listing_detail', anon, f'/api/listings/{listing.pk}/'),
+            ('categories', anon, '/api/categories/'),
+            ('my_messages', auth, '/api/my/messages/'),
+        ]
+        serializer_scenarios = [
+            ('serializer_listing_list', self._serialize_list),
+            ('serializer_listing_detail', lambda: self._serialize_detail(listing)),
+            ('serializer_messages', lambda: self._serialize_messages(user)),
+        ]
+        only = set(options['only'] or [])
+
+        results = {}
+        timeout = None if options['with_cache'] else 0
+        cache_settings = {} if timeout is None else {'RESPONSE_CACHE_TIMEOUT': timeout}
+        with override_settings(**cache_settings):
+            for name, client, url in scenarios:
+                if only and name not in only:
+                    continue
+                results[name] = self._measure(
+                    lambda: self._get(client, url), options['iterations'], options['warmup']
+                )
+                results[name]['url'] = url
+                self._print(name, results[name])
+
+            for name, func in serializer_scenarios:
+                if only and name not in only:
+                    continue
+                results[name] = self._measure(func, options['iterations'], options['warmup'])
+                self._print(name, results[name])
+
+        report = {
+            'meta': self._meta(options),
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Результаты сохранены в {options["output"]}'))
+
+        if options['compare']:
+            self._compare(options['compare'], results)
+
+    def _get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: HTTP {response.status_code}')
+        return response
+
+    def _request(self, path):
+        request = APIRequestFactory().get(path)
+        request.user = AnonymousUser()
+        return request
+
+    def _serialize_list(self):
+        request = self._request('/api/listings/')
+        page = list(
+            Listing.objects.filter(status='active')
+            .select_related('seller', 'category').prefetch_related('images')[:20]
+        )
+        return ListingListSerializer(page, many=True, context={'request': request, 'favorite_ids': set()}).data
+
+    def _serialize_detail(self, listing):
+        request = self._request(f'/api/listings/{listing.pk}/')
+        instance = Listing.objects.select_related('seller', 'category').get(pk=listing.pk)
+        return ListingDetailSerializer(instance, context={'request': request}).data
+
+    def _serialize_messages(self, user):
+        page = list(Message.objects.filter(recipient=user).select_related('sender', 'listing', 'recipient')[:20])
+        return MessageSerializer(page, many=True).data
+
+    def _measure(self, func, iterations, warmup):
+        for _ in range(warmup):
+            func()
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(ctx.captured_queries))
+        return {
+            'iterations': iterations,
+            'queries': max(queries),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def _print(self, name, result):
+        self.stdout.write(
+            f'{name:28} p50 {result["p50_ms"]:9.2f} мс  p90 {result["p90_ms"]:9.2f} мс  '
+            f'p99 {result["p99_ms"]:9.2f} мс  запросов {result["queries"]}'
+        )
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                stderr=subprocess.DEVNULL, text=True,
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'date': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'response_cache': options['with_cache'],
+            'rows': {
+                'listings': Listing.objects.count(),
+                'active_listings': Listing.objects.filter(status='active').count(),
+                'users': User.objects.count(),
+                'messages': Message.objects.count(),
+                'categories': Category.objects.count(),
+            },
+        }
+
+    def _compare(self, path, results):
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)['results']
+        self.stdout.write('\nСравнение p50 / запросов с ' + path)
+        for name, result in results.items():
+            before = previous.get(name)
+            if not before:
+                continue
+            change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            line = (
+                f'{name:28} {before["p50_ms"]:9.2f} → {result["p50_ms"]:9.2f} мс ({change:+.0f}%)  '
+                f'запросов {before["queries"]} → {result["queries"]}'
+            )
+            style = self.style.ERROR if change > 20 or result['queries'] > before['queries'] else self.style.SUCCESS
+            self.stdout.write(style(line))
@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from apps.listings.feed import feed_values, serialize_feed
+from apps.listings.management.commands.bench_api import percentile
+from apps.listings.models import Listing
+from apps.listings.serializers import ListingListSerializer
+from marketplace.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает ленту через ListingListSerializer и быстрый путь (values() + FastJSONRenderer)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='*', default=[20, 100, 500])
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить, что ответы совпадают байт в байт')
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get('/api/listings/')
+        request.user = AnonymousUser()
+        queryset = (
+            Listing.objects.filter(status='active').select_related('seller', 'category')
+            .prefetch_related('images').order_by('-created_at')
+        )
+        if not queryset.exists():
+            raise CommandError('Нет объявлений — сначала запустите generate_data')
+
+        def serializer_path(size):
+            rows = list(queryset[:size])
+            context = {'request': request, 'favorite_ids': set()}
+            return JSONRenderer().render(ListingListSerializer(rows, many=True, context=context).data)
+
+        def fast_path(size):
+            rows = list(feed_values(queryset)[:size])
+            return FastJSONRenderer().render(serialize_feed(rows, request, set()))
+
+        for size in options['sizes']:
+            expected, actual = serializer_path(size), fast_path(size)
+            if expected != actual:
+                at = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+                raise CommandError(
+                    f'Ответы для {size} строк различаются с байта {at}:\n'
+                    f'  serializer: {expected[max(0, at - 80):at + 80]!r}\n'
+                    f'  fast:       {actual[max(0, at - 80):at + 80]!r}'
+                )
+        self.stdout.write(f'Ответы совпадают байт в байт (orjson: {"да" if orjson else "нет"})')
+        if options['check']:
+            return
+
+        for size in options['sizes']:
+            results = {}
+            for name, build in [('serializer', serializer_path), ('fast', fast_path)]:
+                timings = []
+                for _ in range(options['iterations']):
+                    started = time.perf_counter()
+                    build(size)
+                    timings.append((time.perf_counter() - started) * 1000)
+                results[name] = percentile(timings, 50)
+            for name, p50 in results.items():
+                self.stdout.write(
+                    f'{size:4} строк  {name:10} p50 {p50:8.2f} мс  {size / p50 * 1000:9.0f} строк/с'
+                )
+            self.stdout.write(f'{size:4} строк  ускорение x{results["serializer"] / results["fast"]:.1f}')
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from apps.listings.models import Listing
+from apps.listings.search import ListingSearchFilter, RelevanceOrderingFilter, get_search_backend
+from apps.listings.views import ListingListView
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость поиска объявлений: icontains против полнотекстового индекса'
+
+    def add_arguments(self, parser):
+        parser.add_argument('terms', nargs='*', default=['телефон', 'велосипед', 'диван москва'])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = ListingListView()
+        total = Listing.objects.filter(status='active').count()
+        self.stdout.write(f'Активных объявлений: {total}')
+
+        for backend_name in ['basic', get_search_backend().name]:
+            self.stdout.write(f'\n== {backend_name} ==')
+            for term in options['terms']:
+                request = Request(factory.get('/api/listings/', {'search': term}))
+                elapsed = []
+                found = 0
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    found = len(self._search(backend_name, request, view, options['page_size']))
+                    elapsed.append(time.perf_counter() - started)
+                elapsed.sort()
+                median = elapsed[len(elapsed) // 2] * 1000
+                self.stdout.write(f'{term!r:>24}: {median:8.2f} мс (медиана), найдено на странице: {found}')
+
+    def _search(self, backend_name, request, view, page_size):
+        queryset = view.get_queryset()
+        if backend_name == 'basic':
+            queryset = get_search_backend('basic').search(queryset, request.query_params['search'])
+        else:
+            queryset = ListingSearchFilter().filter_queryset(request, queryset, view)
+        queryset = RelevanceOrderingFilter().filter_queryset(request, queryset, view)
+        return list(queryset.values_list('id', flat=True)[:page_size])
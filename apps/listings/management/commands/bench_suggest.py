@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.listings.management.commands.bench_api import percentile
+from apps.listings.suggest import suggestion_index
+from apps.listings.views import ListingSuggestView
+
+
+class Command(BaseCommand):
+    help = 'Задержки /api/listings/suggest/ (p50/p95/p99) под параллельной нагрузкой, с записями в индекс'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='*', default=[1, 4, 16])
+        parser.add_argument('--requests', type=int, default=20000, help='Запросов на каждый прогон')
+        parser.add_argument('--writes-per-second', type=int, default=200,
+                            help='Сколько объявлений в секунду добавляется и снимается параллельно с чтением (0 — без записей)')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        suggestion_index.load()
+        stats = suggestion_index.stats()
+        if not stats['phrases']:
+            raise CommandError('Нет активных объявлений — сначала запустите generate_data')
+        self.stdout.write(
+            f'Индекс: {stats["phrases"]} фраз, {stats["nodes"]} узлов (лимит {stats["max_phrases"]}), '
+            f'построен за {(time.perf_counter() - started) * 1000:.0f} мс'
+        )
+
+        rng = random.Random(options['seed'])
+        phrases = suggestion_index.phrases()
+        # Префиксы как при наборе: 1–8 символов существующих фраз плюс немного промахов
+        prefixes = [rng.choice(phrases)[:rng.randint(1, 8)] for _ in range(2000)] + ['zzq', 'щщщ'] * 50
+        factory = APIRequestFactory()
+        requests = [factory.get('/api/listings/suggest/', {'q': prefix}) for prefix in prefixes]
+        view = ListingSuggestView.as_view()
+
+        def call(request):
+            # Стена — с ожиданием GIL за другими потоками; CPU — собственная работа запроса
+            wall, cpu = time.perf_counter(), time.thread_time()
+            response = view(request)
+            response.render()
+            return (time.perf_counter() - wall) * 1000, (time.thread_time() - cpu) * 1000
+
+        stop = threading.Event()
+        writes = [0]
+
+        def writer(rate):
+            # Публикация и снятие объявлений: топы пересчитываются параллельно с чтением
+            moment = timezone.now()
+            while not stop.wait(1 / rate):
+                title = rng.choice(phrases)
+                suggestion_index.add_listing(title, moment)
+                suggestion_index.remove_listing(title, moment)
+                writes[0] += 2
+
+        for threads in options['threads']:
+            stop.clear()
+            writes[0] = 0
+            rate = options['writes_per_second'] / 2
+            writer_threads = [threading.Thread(target=writer, args=(rate,), daemon=True)] if rate else []
+            for thread in writer_threads:
+                thread.start()
+            batch = [requests[i % len(requests)] for i in range(options['requests'])]
+            began = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                timings, cpu_timings = zip(*pool.map(call, batch))
+            elapsed = time.perf_counter() - began
+            stop.set()
+            for thread in writer_threads:
+                thread.join()
+            self.stdout.write(
+                f'{threads:3} потоков: p50 {percentile(timings, 50):.3f} мс  p95 {percentile(timings, 95):.3f} мс  '
+                f'p99 {percentile(timings, 99):.3f} мс  (CPU p99 {percentile(cpu_timings, 99):.3f} мс)  '
+                f'{len(timings) / elapsed:6.0f} запросов/с  '
+                f'записей в индекс: {writes[0]}'
+            )
+
+        # Запросы во время перестройки индекса: её ведёт фоновый поток, отвечает прежний индекс
+        began = time.perf_counter()
+        reload = suggestion_index.reload_in_background()
+        timings = []
+        with ThreadPoolExecutor(max_workers=max(options['threads'] or [1])) as pool:
+            while True:
+                timings.extend(wall for wall, _ in pool.map(call, requests[:200]))
+                if not reload.is_alive():
+                    break
+        self.stdout.write(
+            f'Перестройка в фоне: {(time.perf_counter() - began) * 1000:.0f} мс, запросов за это время '
+            f'{len(timings)}, p50 {percentile(timings, 50):.3f} мс  p99 {percentile(timings, 99):.3f} мс'
+        )
+
+        began = time.perf_counter()
+        for prefix in prefixes * 10:
+            suggestion_index.suggest(prefix)
+        per_lookup = (time.perf_counter() - began) / (len(prefixes) * 10) * 1e6
+        self.stdout.write(f'Поиск в индексе без DRF: {per_lookup:.1f} мкс')
@@ -0,0 +1,94 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.categories.models import Category
+from apps.listings.models import Favorite, Listing, Message
+from apps.listings.views import (
+    ListingListView, SellerListingsView, MyMessagesView, FavoritesListView,
+)
+from apps.users.models import User
+
+# Таблицы, которые нельзя читать полным сканированием
+GUARDED_TABLES = [Listing._meta.db_table, Message._meta.db_table, Favorite._meta.db_table]
+
+CHECKS = [
+    ('Лента', ListingListView, {}, {}),
+    ('Лента по цене', ListingListView, {'ordering': 'price'}, {}),
+    # Категория подставляется из БД: для несуществующей лента пустая и запроса нет
+    ('Лента категории', ListingListView, {'category': None, 'ordering': 'price'}, {}),
+    ('Объявления продавца', SellerListingsView, {}, {'seller_id': 1}),
+    ('Входящие сообщения', MyMessagesView, {}, {}),
+    ('Избранное', FavoritesListView, {}, {}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Проверяет через EXPLAIN, что горячие эндпоинты не читают таблицы полным сканированием'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        user = User(pk=1, username='explain')
+        category_id = Category.objects.order_by('pk').values_list('pk', flat=True).first()
+        failures = []
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # На маленьких таблицах планировщик честно выбирает Seq Scan —
+                # запрещаем его, чтобы проверить, что подходящий индекс вообще есть
+                cursor.execute('SET enable_seqscan = off')
+            try:
+                for title, view_class, params, kwargs in CHECKS:
+                    if 'category' in params:
+                        if category_id is None:
+                            self.stdout.write(f'{title}: ' + self.style.WARNING('пропуск, нет категорий'))
+                            continue
+                        params = {**params, 'category': category_id}
+                    http_request = factory.get('/', params)
+                    force_authenticate(http_request, user=user)
+                    view = view_class()
+                    view.setup(http_request, **kwargs)
+                    view.request = Request(http_request)
+                    view.request.user = user
+                    view.format_kwarg = None
+
+                    queryset = view.filter_queryset(view.get_queryset())
+                    for label, qs in [('страница', queryset[:20]), ('count', queryset.order_by())]:
+                        plan = qs.explain() if label == 'страница' else self._explain_count(qs)
+                        scans = self._full_scans(plan)
+                        status = self.style.ERROR('SCAN ' + ', '.join(scans)) if scans else self.style.SUCCESS('ok')
+                        self.stdout.write(f'{title} ({label}): {status}')
+                        if options['verbose_plans'] or scans:
+                            self.stdout.write(plan)
+                        if scans:
+                            failures.append(f'{title} ({label})')
+            finally:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('RESET enable_seqscan')
+
+        if failures:
+            raise CommandError('Полное сканирование: ' + '; '.join(failures))
+
+    def _explain_count(self, queryset):
+        sql, params = queryset.values('pk').query.sql_with_params()
+        prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} SELECT COUNT(*) FROM ({sql}) subquery', params)
+            return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+
+    def _full_scans(self, plan):
+        scans = []
+        for table in GUARDED_TABLES:
+            if connection.vendor == 'postgresql':
+                pattern = rf'Seq Scan on {table}\b'
+            else:
+                pattern = rf'\bSCAN {table}\b(?! USING (COVERING )?INDEX)'
+            if re.search(pattern, plan):
+                scans.append(table)
+        return scans
@@ -0,0 +1,321 @@
+import random
+import secrets
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from PIL import Image
+
+from apps.categories.models import Category
+from apps.categories.tree import invalidate_category_tree
+from apps.cities.backfill import link_cities
+from apps.listings.models import Conversation, Favorite, Listing, ListingImage, Message
+from apps.users.models import User
+from marketplace import response_cache
+
+CITIES = [
+    ('Москва', 30), ('Санкт-Петербург', 15), ('Новосибирск', 5), ('Екатеринбург', 5),
+    ('Казань', 4), ('Нижний Новгород', 3), ('Челябинск', 3), ('Самара', 3),
+    ('Омск', 2), ('Ростов-на-Дону', 2), ('Уфа', 2), ('Красноярск', 2),
+    ('Воронеж', 2), ('Пермь', 2), ('Волгоград', 2), ('Алматы', 3), ('Астана', 2),
+]
+
+CATEGORY_TREE = {
+    ('Электроника', '📱'): ['Телефоны', 'Ноутбуки', 'Планшеты', 'Наушники', 'Фототехника'],
+    ('Одежда', '👕'): ['Мужская', 'Женская', 'Детская', 'Обувь'],
+    ('Транспорт', '🚗'): ['Автомобили', 'Мотоциклы', 'Велосипеды', 'Запчасти'],
+    ('Недвижимость', '🏠'): ['Квартиры', 'Дома', 'Комнаты', 'Гаражи'],
+    ('Дом и Сад', '🪴'): ['Мебель', 'Посуда', 'Инструменты', 'Растения'],
+    ('Хобби', '🎸'): ['Книги', 'Музыка', 'Спорт', 'Коллекционирование'],
+}
+
+ADJECTIVES = ['Новый', 'Отличный', 'Почти новый', 'Б/у', 'Срочно', 'Недорого', 'Редкий', 'Рабочий']
+NOUNS = [
+    'iPhone 13', 'Samsung Galaxy', 'ноутбук Lenovo', 'велосипед горный', 'диван угловой',
+    'шкаф-купе', 'куртка зимняя', 'кроссовки Nike', 'стол письменный', 'кресло офисное',
+    'телевизор LG', 'холодильник Bosch', 'гитара акустическая', 'коляска детская',
+    'фотоаппарат Canon', 'наушники Sony', 'шины R16', 'дрель Makita', 'книги по истории',
+]
+WORDS = (
+    'состояние хорошее торг уместен самовывоз доставка есть гарантия чек коробка '
+    'документы комплект использовался аккуратно без царапин звоните пишите обмен'
+).split()
+
+STATUS_WEIGHTS = [('active', 80), ('sold', 10), ('archived', 9), ('deleted_admin', 1)]
+CONDITION_WEIGHTS = [('new', 20), ('used', 70), ('damaged', 10)]
+
+
+def _weighted(pairs):
+    values = [v for v, _ in pairs]
+    cum, total = [], 0
+    for _, w in pairs:
+        total += w
+        cum.append(total)
+    return values, cum
+
+
+@contextmanager
+def created_at_writable(*models):
+    """Разрешает задавать created_at при bulk_create (иначе auto_now_add ставит «сейчас»)"""
+    fields = [m._meta.get_field('created_at') for m in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Генерирует большой синтетический набор данных для проверки производительности'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--listings', type=int, default=100000)
+        parser.add_argument('--images-per-listing', type=int, default=3, help='Максимум фото на объявление')
+        parser.add_argument('--favorites', type=int, default=200000)
+        parser.add_argument('--messages', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=365, help='За сколько дней распределить даты')
+        parser.add_argument('--seller-skew', type=float, default=1.1,
+                            help='Показатель закона Ципфа для активности продавцов')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+
+        categories = self.create_categories()
+        user_ids = self.create_users(options['users'])
+        listing_ids = self.create_listings(options['listings'], user_ids, categories, options['seller_skew'])
+        self.create_images(listing_ids, options['images_per_listing'])
+        self.create_favorites(options['favorites'], user_ids, listing_ids)
+        self.create_messages(options['messages'], user_ids, listing_ids)
+
+        # bulk_create не вызывает save() и не отправляет сигналы — город и кэши вручную
+        link_cities(User.objects.all())
+        link_cities(Listing.objects.all())
+        invalidate_category_tree()
+        response_cache.bump('listings', 'categories')
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def log(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {count} за {elapsed:.1f} с')
+
+    def random_date(self):
+        # Свежих объявлений больше, чем старых
+        age = self.rng.expovariate(3 / self.days) % self.days
+        return self.now - timedelta(days=age, seconds=self.rng.randint(0, 86399))
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def create_categories(self):
+        started = time.perf_counter()
+        leaves = []
+        for i, ((name, icon), children) in enumerate(CATEGORY_TREE.items()):
+            root, _ = Category.objects.get_or_create(
+                slug=f'gen-{i}', defaults={'name': name, 'icon': icon, 'order': i}
+            )
+            for j, child in enumerate(children):
+                leaf, _ = Category.objects.get_or_create(
+                    slug=f'gen-{i}-{j}', defaults={'name': child, 'parent': root, 'order': j}
+                )
+                leaves.append(leaf.pk)
+        self.log('Категории', len(leaves), started)
+        return leaves
+
+    def create_users(self, total):
+        started = time.perf_counter()
+        password = make_password('password123')
+        cities, cum = _weighted(CITIES)
+        # Префикс запуска не зависит от --seed: повторный запуск и уже занятые
+        # имена в непустой БД не дают IntegrityError на уникальном username
+        run = secrets.token_hex(3)
+        ids = []
+        for size in self.batches(total):
+            users = []
+            for _ in range(size):
+                n = len(ids) + len(users)
+                users.append(User(
+                    username=f'user{run}_{n}', email=f'user{run}_{n}@example.com', password=password,
+                    city=self.rng.choices(cities, cum_weights=cum)[0],
+                ))
+            ids.extend(u.pk for u in User.objects.bulk_create(users))
+        self.log('Пользователи', len(ids), started)
+        return ids
+
+    def create_listings(self, total, user_ids, categories, skew):
+        started = time.perf_counter()
+        # Вес продавца ~ 1 / rank^skew: немногие продавцы публикуют большую часть объявлений
+        sellers = list(user_ids)
+        self.rng.shuffle(sellers)
+        seller_cum, acc = [], 0.0
+        for rank in range(1, len(sellers) + 1):
+            acc += 1 / rank ** skew
+            seller_cum.append(acc)
+        cities, city_cum = _weighted(CITIES)
+        statuses, status_cum = _weighted(STATUS_WEIGHTS)
+        conditions, condition_cum = _weighted(CONDITION_WEIGHTS)
+
+        ids = []
+        with created_at_writable(Listing):
+            for size in self.batches(total):
+                listings = []
+                for _ in range(size):
+                    status = self.rng.choices(statuses, cum_weights=status_cum)[0]
+                    listings.append(Listing(
+                        title=f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)}',
+                        description=' '.join(self.rng.choices(WORDS, k=self.rng.randint(10, 60))),
+                        # Логнормальная цена: много дешёвого, мало дорогого
+                        price=Decimal(round(self.rng.lognormvariate(8, 1.5), -1)).quantize(Decimal('1.00')),
+                        is_negotiable=self.rng.random() < 0.3,
+                        category_id=self.rng.choice(categories),
+                        seller_id=self.rng.choices(sellers, cum_weights=seller_cum)[0],
+                        city=self.rng.choices(cities, cum_weights=city_cum)[0],
+                        condition=self.rng.choices(conditions, cum_weights=condition_cum)[0],
+                        status=status,
+                        delete_reason={'sold': 'sold', 'archived': 'not_selling', 'deleted_admin': 'admin'}.get(status),
+                        views_count=int(self.rng.paretovariate(1.2) * 5),
+                        created_at=self.random_date(),
+                    ))
+                ids.extend(listing.pk for listing in Listing.objects.bulk_create(listings))
+                self.stdout.write(f'  объявления: {len(ids)}/{total}', ending='\r')
+        self.log('Объявления', len(ids), started)
+        return ids
+
+    def placeholder_images(self, count=5):
+        """Несколько общих файлов-заглушек: строки ListingImage ссылаются на них"""
+        names = []
+        for i in range(count):
+            color = tuple(self.rng.randint(0, 255) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (640, 480), color).save(buffer, format='JPEG')
+            names.append(default_storage.save(f'listings/generated_{i}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def create_images(self, listing_ids, per_listing):
+        if not per_listing:
+            return
+        started = time.perf_counter()
+        names = self.placeholder_images()
+        created = 0
+        batch = []
+        for listing_id in listing_ids:
+            for order in range(self.rng.randint(0, per_listing)):
+                batch.append(ListingImage(
+                    listing_id=listing_id, image=self.rng.choice(names),
+                    order=order, is_processed=True, width=640, height=480,
+                ))
+            if len(batch) >= self.batch_size:
+                ListingImage.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        ListingImage.objects.bulk_create(batch)
+        created += len(batch)
+        self.log('Фото', created, started)
+
+    def create_favorites(self, total, user_ids, listing_ids):
+        started = time.perf_counter()
+        created = 0
+        with created_at_writable(Favorite):
+            for size in self.batches(total):
+                favorites = [
+                    Favorite(
+                        user_id=self.rng.choice(user_ids),
+                        listing_id=self.rng.choice(listing_ids),
+                        created_at=self.random_date(),
+                    )
+                    for _ in range(size)
+                ]
+                # Повторные пары (user, listing) молча пропускаются
+                Favorite.objects.bulk_create(favorites, ignore_conflicts=True)
+                created += size
+        self.log('Избранное (попыток)', created, started)
+
+    def create_messages(self, total, user_ids, listing_ids):
+        """Сообщения внутри переписок покупатель — продавец; сводка переписок считается в конце"""
+        started = time.perf_counter()
+        created = 0
+        conversation_ids = set()
+        with created_at_writable(Message):
+            for size in self.batches(total):
+                picked = self.rng.choices(listing_ids, k=size)
+                sellers = dict(Listing.objects.filter(pk__in=set(picked)).values_list('pk', 'seller_id'))
+                threads = []
+                for listing_id in picked:
+                    buyer_id = self.rng.choice(user_ids)
+                    while buyer_id == sellers[listing_id] and len(user_ids) > 1:
+                        buyer_id = self.rng.choice(user_ids)
+                    if buyer_id != sellers[listing_id]:
+                        threads.append((listing_id, buyer_id, sellers[listing_id]))
+
+                conversations = self.get_conversations(set(threads))
+                conversation_ids.update(conversations.values())
+                messages = []
+                for key in threads:
+                    listing_id, buyer_id, seller_id = key
+                    # Чаще пишет покупатель, продавец отвечает
+                    sender_id, recipient_id = (
+                        (buyer_id, seller_id) if self.rng.random() < 0.6 else (seller_id, buyer_id)
+                    )
+                    messages.append(Message(
+                        listing_id=listing_id,
+                        conversation_id=conversations[key],
+                        sender_id=sender_id,
+                        recipient_id=recipient_id,
+                        text=' '.join(self.rng.choices(WORDS, k=self.rng.randint(3, 25))),
+                        is_read=self.rng.random() < 0.7,
+                        created_at=self.random_date(),
+                    ))
+                Message.objects.bulk_create(messages)
+                created += len(messages)
+        self.log('Сообщения', created, started)
+
+        started = time.perf_counter()
+        self.summarize_conversations(sorted(conversation_ids))
+        self.log('Переписки', len(conversation_ids), started)
+
+    def get_conversations(self, keys):
+        """{(listing, buyer, seller): id} — существующие переписки и созданные для новых пар"""
+        Conversation.objects.bulk_create(
+            [Conversation(listing_id=l, buyer_id=b, seller_id=s) for l, b, s in keys],
+            ignore_conflicts=True,
+        )
+        rows = Conversation.objects.filter(
+            listing_id__in={key[0] for key in keys}
+        ).values_list('listing_id', 'buyer_id', 'seller_id', 'id')
+        return {(l, b, s): pk for l, b, s, pk in rows if (l, b, s) in keys}
+
+    def summarize_conversations(self, conversation_ids):
+        """Последнее сообщение и непрочитанные — UPDATE с подзапросами, пачками"""
+        messages = Message.objects.filter(conversation=OuterRef('pk'))
+        last = messages.order_by('-created_at', '-id')
+
+        def unread(recipient):
+            return Coalesce(Subquery(
+                messages.filter(recipient=OuterRef(recipient), is_read=False).order_by()
+                .values('conversation').annotate(total=Count('pk')).values('total')
+            ), 0)
+
+        for start in range(0, len(conversation_ids), self.batch_size):
+            Conversation.objects.filter(pk__in=conversation_ids[start:start + self.batch_size]).update(
+                last_message=Subquery(last.values('pk')[:1]),
+                last_message_at=Subquery(last.values('created_at')[:1]),
+                buyer_unread=unread('buyer_id'),
+                seller_unread=unread('seller_id'),
+            )
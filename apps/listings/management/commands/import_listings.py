@@ -0,0 +1,50 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.listings.bulk import detect_format, run_import
+from apps.listings.models import ListingImportJob
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Импортирует объявления продавца из CSV/JSONL (фото — ссылками или из ZIP-архива)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--seller', required=True, help='Имя пользователя продавца')
+        parser.add_argument('--images', help='ZIP-архив с фото')
+
+    def handle(self, *args, **options):
+        if detect_format(options['file']) is None:
+            raise CommandError('Поддерживаются файлы .csv и .jsonl')
+        try:
+            seller = User.objects.get(username=options['seller'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["seller"]} не найден')
+
+        with open(options['file'], 'rb') as source:
+            job = ListingImportJob(seller=seller)
+            job.source.save(os.path.basename(options['file']), File(source), save=False)
+            if options['images']:
+                with open(options['images'], 'rb') as archive:
+                    job.images_archive.save(os.path.basename(options['images']), File(archive), save=False)
+            job.save()
+
+        def progress(importer):
+            self.stdout.write(
+                f'  строк: {importer.rows}, создано: {importer.created}, ошибок: {importer.error_count}',
+                ending='\r',
+            )
+
+        run_import(job.pk, on_progress=progress)
+        job.refresh_from_db()
+        self.stdout.write('')
+        for error in job.errors[:20]:
+            self.stderr.write(f'Строка {error["row"]}: {error["errors"]}')
+        style = self.style.SUCCESS if job.status == 'done' else self.style.ERROR
+        self.stdout.write(style(
+            f'Импорт #{job.pk}: {job.get_status_display()}, создано {job.created_count}, '
+            f'строк с ошибками {job.error_count}'
+        ))
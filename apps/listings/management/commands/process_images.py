@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.listings.models import ListingImage
+from apps.listings.tasks import process_listing_image
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает фото, которые ещё не уменьшены (старые загрузки, сбои фоновой обработки)'
+
+    def handle(self, *args, **options):
+        processed = 0
+        ids = ListingImage.objects.filter(is_processed=False).values_list('pk', flat=True)
+        for image_id in ids.iterator():
+            try:
+                process_listing_image(image_id)
+                processed += 1
+            except Exception as e:
+                self.stderr.write(f'Фото {image_id}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Обработано фото: {processed}'))
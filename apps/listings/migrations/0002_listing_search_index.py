@@ -0,0 +1,89 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE listings_listing ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(city, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX listings_listing_search_gin ON listings_listing USING GIN (search_vector)',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS listings_listing_search_gin',
+    'ALTER TABLE listings_listing DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE listings_listing_fts USING fts5(
+        title, description, city,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO listings_listing_fts(rowid, title, description, city)
+    SELECT id, title, description, city FROM listings_listing
+    """,
+    """
+    CREATE TRIGGER listings_listing_fts_ai AFTER INSERT ON listings_listing BEGIN
+        INSERT INTO listings_listing_fts(rowid, title, description, city)
+        VALUES (new.id, new.title, new.description, new.city);
+    END
+    """,
+    """
+    CREATE TRIGGER listings_listing_fts_ad AFTER DELETE ON listings_listing BEGIN
+        DELETE FROM listings_listing_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER listings_listing_fts_au AFTER UPDATE OF title, description, city ON listings_listing BEGIN
+        DELETE FROM listings_listing_fts WHERE rowid = old.id;
+        INSERT INTO listings_listing_fts(rowid, title, description, city)
+        VALUES (new.id, new.title, new.description, new.city);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS listings_listing_fts_ai',
+    'DROP TRIGGER IF EXISTS listings_listing_fts_ad',
+    'DROP TRIGGER IF EXISTS listings_listing_fts_au',
+    'DROP TABLE IF EXISTS listings_listing_fts',
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
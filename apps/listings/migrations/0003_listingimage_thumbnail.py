@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_listing_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='listings/thumbs/', verbose_name='Миниатюра'),
+        ),
+    ]
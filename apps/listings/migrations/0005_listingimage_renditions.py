@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_message_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ширина'),
+        ),
+        migrations.AddField(
+            model_name='listingimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Высота'),
+        ),
+        migrations.AddField(
+            model_name='listingimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, verbose_name='Версии'),
+        ),
+        migrations.AddField(
+            model_name='listingimage',
+            name='is_processed',
+            field=models.BooleanField(default=False, verbose_name='Обработано'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+BATCH_SIZE = 2000
+
+
+def _message_rows(Message, *fields):
+    rows = Message.objects.order_by('created_at', 'id').values(
+        'id', 'listing_id', 'sender_id', 'recipient_id', *fields, seller_id=models.F('listing__seller_id')
+    )
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        buyer_id = row['recipient_id'] if row['sender_id'] == row['seller_id'] else row['sender_id']
+        yield (row['listing_id'], buyer_id, row['seller_id']), row
+
+
+def backfill_conversations(apps, schema_editor):
+    """Переписки и счётчики считаются в памяти, запись — пачками, без запроса на сообщение"""
+    Message = apps.get_model('listings', 'Message')
+    Conversation = apps.get_model('listings', 'Conversation')
+
+    conversations = {}
+    for key, row in _message_rows(Message, 'created_at', 'is_read'):
+        conversation = conversations.get(key)
+        if conversation is None:
+            conversation = conversations[key] = Conversation(listing_id=key[0], buyer_id=key[1], seller_id=key[2])
+        conversation.last_message_id = row['id']
+        conversation.last_message_at = row['created_at']
+        if not row['is_read']:
+            if row['recipient_id'] == row['seller_id']:
+                conversation.seller_unread += 1
+            else:
+                conversation.buyer_unread += 1
+    Conversation.objects.bulk_create(conversations.values(), batch_size=500)
+
+    batch = []
+    for key, row in _message_rows(Message):
+        batch.append(Message(pk=row['id'], conversation_id=conversations[key].pk))
+        if len(batch) >= BATCH_SIZE:
+            Message.objects.bulk_update(batch, ['conversation'])
+            batch = []
+    Message.objects.bulk_update(batch, ['conversation'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('listings', '0005_listingimage_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время последнего сообщения')),
+                ('buyer_unread', models.PositiveIntegerField(default=0, verbose_name='Непрочитано покупателем')),
+                ('seller_unread', models.PositiveIntegerField(default=0, verbose_name='Непрочитано продавцом')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buyer_conversations', to=settings.AUTH_USER_MODEL, verbose_name='Покупатель')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='listings.message', verbose_name='Последнее сообщение')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='listings.listing', verbose_name='Объявление')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seller_conversations', to=settings.AUTH_USER_MODEL, verbose_name='Продавец')),
+            ],
+            options={
+                'verbose_name': 'Переписка',
+                'verbose_name_plural': 'Переписки',
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='listings.conversation', verbose_name='Переписка'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('listing', 'buyer', 'seller'), name='conversation_unique_participants'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['buyer', '-last_message_at'], name='conversation_buyer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['seller', '-last_message_at'], name='conversation_seller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='message_conv_created_idx'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('listings', '0006_conversation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.FileField(upload_to='imports/', verbose_name='Файл')),
+                ('images_archive', models.FileField(blank=True, null=True, upload_to='imports/', verbose_name='Архив фото')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('bytes_total', models.BigIntegerField(default=0)),
+                ('bytes_read', models.BigIntegerField(default=0)),
+                ('rows_processed', models.IntegerField(default=0, verbose_name='Обработано строк')),
+                ('created_count', models.IntegerField(default=0, verbose_name='Создано объявлений')),
+                ('error_count', models.IntegerField(default=0, verbose_name='Строк с ошибками')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Ошибки')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Продавец')),
+            ],
+            options={
+                'verbose_name': 'Импорт объявлений',
+                'verbose_name_plural': 'Импорт объявлений',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cities', '0001_initial'),
+        ('listings', '0007_listingimportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='listings', to='cities.city', verbose_name='Город (справочник)'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['city_ref', 'status', '-created_at'], name='listing_city_status_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def rename_table(old, new):
+    def rename(apps, schema_editor):
+        # Старый build.sh запускал makemigrations при деплое: таблицу могла уже
+        # переименовать (или создать заново) сгенерированная там миграция
+        tables = schema_editor.connection.introspection.table_names()
+        if old in tables and new not in tables:
+            schema_editor.alter_db_table(None, old, new)
+    return rename
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('listings', '0009_event'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameModel(old_name='Warning', new_name='UserWarning'),
+            ],
+            database_operations=[
+                migrations.RunPython(
+                    rename_table('listings_warning', 'listings_userwarning'),
+                    rename_table('listings_userwarning', 'listings_warning'),
+                ),
+            ],
+        ),
+    ]
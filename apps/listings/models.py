@@ -1,9 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from apps.categories.models import Category
+from apps.cities.models import City, CityRefMixin
 
 
-class Listing(models.Model):
+class Listing(CityRefMixin, models.Model):
     STATUS_CHOICES = [
         ('active', 'Активно'),
         ('sold', 'Продано'),
@@ -36,6 +39,11 @@ class Listing(models.Model):
         related_name='listings', verbose_name='Продавец'
     )
     city = models.CharField(max_length=100, blank=True, verbose_name='Город')
+    # Город из справочника по city: фильтры и фасеты работают с ним, а не с текстом
+    city_ref = models.ForeignKey(
+        City, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='listings', verbose_name='Город (справочник)'
+    )
     condition = models.CharField(
         max_length=20, choices=CONDITION_CHOICES,
         default='used', verbose_name='Состояние'
@@ -56,6 +64,21 @@ class Listing(models.Model):
         verbose_name = 'Объявление'
         verbose_name_plural = 'Объявления'
         ordering = ['-created_at']
+        indexes = [
+            # Лента: status='active' ORDER BY -created_at (частичный — только активные)
+            models.Index(
+                fields=['-created_at'], condition=models.Q(status='active'),
+                name='listing_active_created_idx',
+            ),
+            # Админка и «мои объявления» с фильтром по статусу
+            models.Index(fields=['status', '-created_at'], name='listing_status_created_idx'),
+            # Объявления продавца
+            models.Index(fields=['seller', 'status', '-created_at'], name='listing_seller_status_idx'),
+            # Категория + статус + сортировка/фильтр по цене
+            models.Index(fields=['category', 'status', 'price'], name='listing_cat_status_price_idx'),
+            # Фильтр по городу в ленте
+            models.Index(fields=['city_ref', 'status', '-created_at'], name='listing_city_status_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -67,6 +90,15 @@ class ListingImage(models.Model):
         related_name='images', verbose_name='Объявление'
     )
     image = models.ImageField(upload_to='listings/', verbose_name='Изображение')
+    thumbnail = models.ImageField(
+        upload_to='listings/thumbs/', blank=True, null=True,
+        verbose_name='Миниатюра'
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name='Ширина')
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name='Высота')
+    # WebP-копии разной ширины: [{'format', 'width', 'height', 'name'}, ...]
+    renditions = models.JSONField(default=list, blank=True, verbose_name='Версии')
+    is_processed = models.BooleanField(default=False, verbose_name='Обработано')
     order = models.IntegerField(default=0, verbose_name='Порядок')
 
     class Meta:
@@ -105,16 +137,77 @@ class Message(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
         related_name='received_messages', verbose_name='Получатель'
     )
+    conversation = models.ForeignKey(
+        'Conversation', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='messages', verbose_name='Переписка'
+    )
     text = models.TextField(verbose_name='Текст')
     is_read = models.BooleanField(default=False, verbose_name='Прочитано')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Входящие: recipient ORDER BY created_at
+            models.Index(fields=['recipient', 'created_at'], name='message_recipient_created_idx'),
+            # Все сообщения в админке: ORDER BY -created_at
+            models.Index(fields=['-created_at'], name='message_created_idx'),
+            # Лента переписки
+            models.Index(fields=['conversation', 'created_at'], name='message_conv_created_idx'),
+        ]
         verbose_name = 'Сообщение'
         verbose_name_plural = 'Сообщения'
 
 
+class Conversation(models.Model):
+    """Переписка покупателя с продавцом по объявлению: последнее сообщение и счётчики непрочитанных"""
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE,
+        related_name='conversations', verbose_name='Объявление'
+    )
+    buyer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='buyer_conversations', verbose_name='Покупатель'
+    )
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='seller_conversations', verbose_name='Продавец'
+    )
+    last_message = models.ForeignKey(
+        Message, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name='Последнее сообщение'
+    )
+    last_message_at = models.DateTimeField(default=timezone.now, verbose_name='Время последнего сообщения')
+    buyer_unread = models.PositiveIntegerField(default=0, verbose_name='Непрочитано покупателем')
+    seller_unread = models.PositiveIntegerField(default=0, verbose_name='Непрочитано продавцом')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_message_at']
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'buyer', 'seller'], name='conversation_unique_participants'),
+        ]
+        indexes = [
+            models.Index(fields=['buyer', '-last_message_at'], name='conversation_buyer_idx'),
+            models.Index(fields=['seller', '-last_message_at'], name='conversation_seller_idx'),
+        ]
+        verbose_name = 'Переписка'
+        verbose_name_plural = 'Переписки'
+
+    def __str__(self):
+        return f'{self.listing} — {self.buyer}'
+
+    @staticmethod
+    def participants_for(listing, sender, recipient):
+        """(buyer, seller) для сообщения: продавец — владелец объявления"""
+        seller_id = listing.seller_id
+        buyer_id = recipient.pk if sender.pk == seller_id else sender.pk
+        return buyer_id, seller_id
+
+    def unread_for(self, user):
+        return self.buyer_unread if user.pk == self.buyer_id else self.seller_unread
+
+
 class UserWarning(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
@@ -134,3 +227,60 @@ class UserWarning(models.Model):
 
     def __str__(self):
         return f'Предупреждение для {self.user.username}'
+
+
+class ListingImportJob(models.Model):
+    """Массовая загрузка объявлений из CSV/JSONL: прогресс и ошибки по строкам"""
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('done', 'Завершено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='import_jobs', verbose_name='Продавец'
+    )
+    source = models.FileField(upload_to='imports/', verbose_name='Файл')
+    images_archive = models.FileField(upload_to='imports/', blank=True, null=True, verbose_name='Архив фото')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    bytes_total = models.BigIntegerField(default=0)
+    bytes_read = models.BigIntegerField(default=0)
+    rows_processed = models.IntegerField(default=0, verbose_name='Обработано строк')
+    created_count = models.IntegerField(default=0, verbose_name='Создано объявлений')
+    error_count = models.IntegerField(default=0, verbose_name='Строк с ошибками')
+    # [{'row': N, 'errors': {...}}, ...] — не больше IMPORT_MAX_STORED_ERRORS
+    errors = models.JSONField(default=list, blank=True, verbose_name='Ошибки')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Импорт объявлений'
+        verbose_name_plural = 'Импорт объявлений'
+
+    @property
+    def progress(self):
+        if self.status == 'done':
+            return 100
+        return round(self.bytes_read * 100 / self.bytes_total) if self.bytes_total else 0
+
+
+class Event(models.Model):
+    """Событие для пользователя (DatabaseBroker): общая для всех воркеров шина и хвост для переподключения"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='+', verbose_name='Получатель'
+    )
+    type = models.CharField(max_length=50, verbose_name='Тип')
+    data = models.JSONField(encoder=DjangoJSONEncoder, verbose_name='Данные')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Хвост событий пользователя после Last-Event-ID
+            models.Index(fields=['user', 'id'], name='event_user_id_idx'),
+        ]
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
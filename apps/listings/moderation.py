@@ -0,0 +1,74 @@
+"""
+Массовая модерация: удаление объявлений и предупреждения пользователям.
+
+Объявления помечаются deleted_admin одним UPDATE, предупреждения создаются
+одним bulk_create. Ни то ни другое не шлёт сигналов, поэтому события
+пользователям, дерево категорий, подсказки поиска и кэш ответов обновляются
+здесь же.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.categories.tree import invalidate_category_tree
+from marketplace import events, response_cache
+from .models import Listing, UserWarning
+from .suggest import suggestion_index
+
+
+def moderate(admin, listings=None, user_ids=(), reason='', cascade=False):
+    """
+    Удаляет объявления из listings (QuerySet) и предупреждает пользователей
+    user_ids; с reason предупреждение получают и продавцы удалённых объявлений.
+    cascade — удалить заодно все активные объявления предупреждённых.
+    """
+    listings = (listings if listings is not None else Listing.objects.none()).exclude(status='deleted_admin')
+    with transaction.atomic():
+        warned = set(user_ids)
+        if reason:
+            warned.update(listings.values_list('seller_id', flat=True).distinct())
+
+        condition = Q(pk__in=listings.values('pk'))
+        if cascade and warned:
+            condition |= Q(seller_id__in=warned, status='active')
+        rows = list(
+            Listing.objects.filter(condition).exclude(status='deleted_admin')
+            .select_for_update().values('pk', 'seller_id', 'title', 'status', 'created_at')
+        )
+        deleted = Listing.objects.filter(pk__in=[row['pk'] for row in rows]).update(
+            status='deleted_admin', delete_reason='admin', updated_at=timezone.now(),
+        ) if rows else 0
+
+        warnings = UserWarning.objects.bulk_create([
+            UserWarning(user_id=user_id, admin=admin, reason=reason) for user_id in sorted(warned)
+        ]) if reason else []
+
+        by_seller = defaultdict(list)
+        for row in rows:
+            by_seller[row['seller_id']].append(row)
+        for seller_id, seller_rows in by_seller.items():
+            events.publish(seller_id, 'listings_status', {
+                'ids': [row['pk'] for row in seller_rows],
+                'titles': [row['title'] for row in seller_rows[:5]],
+                'count': len(seller_rows),
+                'status': 'deleted_admin', 'delete_reason': 'admin',
+            })
+        for warning in warnings:
+            events.publish(warning.user_id, 'warning', {
+                'id': warning.pk, 'reason': warning.reason, 'created_at': warning.created_at,
+            })
+
+    if deleted:
+        for row in rows:
+            if row['status'] == 'active':
+                suggestion_index.remove_listing(row['title'], row['created_at'])
+        invalidate_category_tree()
+        response_cache.bump('listings', 'categories')
+    return {
+        'listings_deleted': deleted,
+        'warnings_created': len(warnings),
+        'sellers': sorted(by_seller),
+        'warned_users': sorted(warned) if reason else [],
+    }
@@ -0,0 +1,224 @@
+"""
+Пагинация лент.
+
+По умолчанию — обычная постраничная (page=N), как и раньше.
+Если в запросе есть параметр cursor (хотя бы пустой — ?cursor=), включается
+keyset-пагинация: страница выбирается условием WHERE по значениям последней
+строки, без COUNT(*) и OFFSET, поэтому сотая страница стоит столько же, сколько
+первая. Ключ — поле сортировки клиента (price, views_count) плюс (created_at, id).
+
+?count=approx добавляет к ответу приблизительное общее количество:
+оценку планировщика в PostgreSQL или ограниченный COUNT в остальных СУБД.
+"""
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _invert(key):
+    return key[1:] if key.startswith('-') else f'-{key}'
+
+
+def _field_name(key):
+    return key.lstrip('-')
+
+
+def approximate_count(queryset, limit):
+    """Оценка размера выборки без полного COUNT(*)"""
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset[:limit].count()
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    approx_count_limit = 10000
+    invalid_cursor_message = 'Некорректный курсор'
+
+    def get_keys(self, queryset):
+        """
+        Сортировка, дополненная до уникального ключа (..., created_at, id).
+        None — если сортировку нельзя превратить в keyset (например, по релевантности).
+        """
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        keys = []
+        for key in ordering:
+            if not isinstance(key, str):
+                return None
+            name = _field_name(key)
+            if name == 'pk':
+                name, key = 'id', key.replace('pk', 'id')
+            if '__' in name:
+                return None
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.null:
+                return None
+            keys.append(key)
+
+        names = [_field_name(k) for k in keys]
+        if 'created_at' not in names:
+            keys.append('-created_at')
+        if 'id' not in names:
+            created_at = next(k for k in keys if _field_name(k) == 'created_at')
+            keys.append('-id' if created_at.startswith('-') else 'id')
+        return keys
+
+    def paginate_queryset(self, queryset, request, view=None):
+        keys = self.get_keys(queryset)
+        if keys is None:
+            return None
+
+        self.request = request
+        self.model = queryset.model
+        self.keys = keys
+        position, self.reverse = self.decode_cursor(request)
+
+        ordering = [_invert(k) for k in keys] if self.reverse else keys
+        page_queryset = queryset.order_by(*ordering)
+        if position is not None:
+            page_queryset = page_queryset.filter(self.after(ordering, position))
+
+        results = list(page_queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'approx':
+            self.count = approximate_count(queryset, self.approx_count_limit)
+        return results
+
+    def after(self, ordering, values):
+        """Условие «строго после values» для лексикографической сортировки ordering"""
+        condition = Q()
+        for i, key in enumerate(ordering):
+            step = Q(**{_field_name(k): values[j] for j, k in enumerate(ordering[:i])})
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            step &= Q(**{f'{_field_name(key)}__{lookup}': values[i]})
+            condition |= step
+        return condition
+
+    def encode_cursor(self, obj, reverse):
+        values = []
+        for key in self.keys:
+            # Быстрая лента отдаёт строки словарями из values()
+            value = obj[_field_name(key)] if isinstance(obj, dict) else getattr(obj, _field_name(key))
+            if isinstance(value, (datetime, Decimal)):
+                value = value.isoformat() if isinstance(value, datetime) else str(value)
+            values.append(value)
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            raw_values = payload['v']
+            if len(raw_values) != len(self.keys):
+                raise ValueError
+            values = [
+                self.model._meta.get_field(_field_name(key)).to_python(value)
+                for key, value in zip(self.keys, raw_values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get('r'))
+
+    def get_link(self, obj, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, '')
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class FeedPagination(PageNumberPagination):
+    """Постраничная пагинация с включаемым через ?cursor= keyset-режимом"""
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            keyset = self.keyset_class()
+            page = keyset.paginate_queryset(queryset, request, view)
+            if page is not None:
+                self.keyset = keyset
+                return page
+            # Сортировку нельзя превратить в keyset (поиск по релевантности) —
+            # отдаём обычные страницы
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
@@ -0,0 +1,177 @@
+"""
+Полнотекстовый поиск по объявлениям.
+
+Вместо цепочек LIKE '%term%' используется индекс базы данных:
+- PostgreSQL: генерируемая колонка tsvector с GIN-индексом, ранжирование ts_rank_cd;
+- SQLite: теневая таблица FTS5, синхронизируемая триггерами, ранжирование bm25;
+- basic: старое поведение через icontains (если индекс недоступен).
+
+Индекс хранит только текст (заголовок, описание, город). Статус фильтруется
+обычным WHERE, поэтому снятие с публикации сразу отражается в выдаче.
+
+Запрос разбивается на слова одинаково для всех бэкендов (search_tokens):
+каждое слово ищется как префикс, слова объединяются через AND. Кавычки и
+прочая пунктуация в синтаксис запроса не попадают.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Listing
+
+INDEXED_FIELDS = ['title', 'description', 'city']
+SQLITE_FTS_TABLE = 'listings_listing_fts'
+POSTGRES_SEARCH_CONFIG = 'russian'
+
+# Буквы и цифры; подчёркивание — разделитель, как в токенизаторах FTS5 и tsvector
+TOKEN = re.compile(r'[^\W_]+')
+
+
+def search_tokens(query):
+    return TOKEN.findall(query or '')
+
+
+class BasicSearchBackend:
+    """Поиск через icontains — работает везде, но сканирует всю таблицу"""
+    name = 'basic'
+
+    def condition(self, query):
+        condition = Q()
+        for term in search_tokens(query):
+            term_q = Q()
+            for field in INDEXED_FIELDS:
+                term_q |= Q(**{f'{field}__icontains': term})
+            condition &= term_q
+        return condition
+
+    def rank(self, query):
+        return Value(0.0, output_field=FloatField())
+
+    def search(self, queryset, query):
+        return queryset.annotate(search_rank=self.rank(query)).filter(self.condition(query))
+
+
+class PostgresSearchBackend:
+    """tsvector + GIN-индекс (колонка search_vector создаётся миграцией)"""
+    name = 'postgres'
+
+    def _vector(self):
+        return f'"{Listing._meta.db_table}"."search_vector"'
+
+    def _tsquery(self, query):
+        # Префиксные термы через AND — как в SQLite; слова уже без спецсимволов to_tsquery
+        return ' & '.join(f'{token}:*' for token in search_tokens(query))
+
+    def condition(self, query):
+        return Q(RawSQL(
+            f"{self._vector()} @@ to_tsquery('{POSTGRES_SEARCH_CONFIG}', %s)",
+            [self._tsquery(query)], output_field=BooleanField(),
+        ))
+
+    def rank(self, query):
+        return RawSQL(
+            f"ts_rank_cd({self._vector()}, to_tsquery('{POSTGRES_SEARCH_CONFIG}', %s))",
+            [self._tsquery(query)], output_field=FloatField(),
+        )
+
+    def search(self, queryset, query):
+        if not search_tokens(query):
+            return queryset.none()
+        return queryset.annotate(search_rank=self.rank(query)).filter(self.condition(query))
+
+
+class SqliteSearchBackend:
+    """FTS5 для локальной разработки (таблица и триггеры создаются миграцией)"""
+    name = 'sqlite'
+
+    def _match(self, query):
+        # Каждое слово — префиксный терм, слова объединяются через AND
+        return ' '.join(f'"{token}"*' for token in search_tokens(query))
+
+    def condition(self, query):
+        return Q(RawSQL(
+            f'"{Listing._meta.db_table}"."id" IN '
+            f'(SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s)',
+            [self._match(query)], output_field=BooleanField(),
+        ))
+
+    def rank(self, query):
+        # Используется только в комбинированных условиях (OR с полями вне индекса),
+        # где JOIN с FTS-таблицей невозможен; основной путь search() ранжирует через bm25
+        return Value(0.0, output_field=FloatField())
+
+    def search(self, queryset, query):
+        if not search_tokens(query):
+            return queryset.none()
+        # bm25 возвращает «чем меньше, тем лучше», поэтому меняем знак
+        table = Listing._meta.db_table
+        return queryset.extra(
+            select={'search_rank': f'-bm25({SQLITE_FTS_TABLE}, 10.0, 1.0, 2.0)'},
+            tables=[SQLITE_FTS_TABLE],
+            where=[f'{SQLITE_FTS_TABLE}.rowid = "{table}"."id"', f'{SQLITE_FTS_TABLE} MATCH %s'],
+            params=[self._match(query)],
+        )
+
+
+BACKENDS = {
+    'basic': BasicSearchBackend,
+    'postgres': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def get_search_backend(name=None):
+    """Возвращает бэкенд по имени из настроек; 'auto' выбирает его по СУБД"""
+    name = name or getattr(settings, 'LISTING_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        if connection.vendor == 'postgresql':
+            name = 'postgres'
+        elif connection.vendor == 'sqlite':
+            name = 'sqlite'
+        else:
+            name = 'basic'
+    return BACKENDS[name]()
+
+
+class ListingSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter, который ищет по индексу и аннотирует search_rank.
+    Поля из search_fields, не входящие в индекс (например seller__username),
+    проверяются через icontains и объединяются с совпадениями по индексу.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        query = ' '.join(terms)
+        if not search_tokens(query):
+            # Одни кавычки и знаки препинания — искать нечего, как и при пустом запросе
+            return queryset
+        backend = get_search_backend()
+        extra_fields = [f for f in getattr(view, 'search_fields', []) if f not in INDEXED_FIELDS]
+        if not extra_fields:
+            return backend.search(queryset, query)
+
+        condition = backend.condition(query)
+        for field in extra_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.annotate(search_rank=backend.rank(query)).filter(condition)
+
+
+def has_search_rank(queryset):
+    return 'search_rank' in queryset.query.annotations or 'search_rank' in queryset.query.extra_select
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """Если пользователь ищет и не выбрал сортировку — сортируем по релевантности"""
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and has_search_rank(queryset):
+            return ['-search_rank', '-created_at']
+        return super().get_ordering(request, queryset, view)
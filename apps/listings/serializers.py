@@ -1,32 +1,57 @@
+from django.db import transaction
+from django.db.models import F
 from rest_framework import serializers
-from .models import Listing, ListingImage, Favorite, Message, UserWarning
+from .models import Listing, ListingImage, Favorite, Message, UserWarning, Conversation, ListingImportJob
 from apps.users.serializers import UserSerializer
 from apps.categories.serializers import CategorySerializer
+from apps.categories.tree import get_breadcrumbs
+from marketplace.fieldsets import SparseFieldsetMixin
 
+# Заглушка, если у объявления нет фото
+NO_IMAGE_URL = "https://placehold.co/600x400?text=%D0%9D%D0%B5%D1%82+%D1%84%D0%BE%D1%82%D0%BE"
 
-class ListingImageSerializer(serializers.ModelSerializer):
+
+class ListingImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    field_sources = {'image_url': ['image'], 'srcset': ['image', 'renditions']}
 
     class Meta:
         model = ListingImage
-        fields = ['id', 'image', 'image_url', 'order']
+        fields = ['id', 'image', 'image_url', 'width', 'height', 'srcset', 'order']
         extra_kwargs = {'image': {'write_only': True}}
 
-    def get_image_url(self, obj):
+    def _absolute(self, url):
         request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_image_url(self, obj):
         if obj.image:
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
+            return self._absolute(obj.image.url)
         return None
 
+    def get_srcset(self, obj):
+        """WebP-копии в формате srcset: "url 320w, url 640w" (пусто, пока фото не обработано)"""
+        storage = obj.image.storage
+        return ', '.join(
+            f"{self._absolute(storage.url(r['name']))} {r['width']}w" for r in obj.renditions
+        )
 
-class ListingListSerializer(serializers.ModelSerializer):
+
+class ListingListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     main_image = serializers.SerializerMethodField()
     seller_name = serializers.CharField(source='seller.username', read_only=True)
     seller_city = serializers.CharField(source='seller.city', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     is_favorite = serializers.SerializerMethodField()
+    field_sources = {'main_image': ['images'], 'is_favorite': []}
+    expandable_fields = {
+        'seller': lambda: UserSerializer(read_only=True, fieldset=dict.fromkeys(UserSerializer.public_fields)),
+        'category': lambda: CategorySerializer(read_only=True),
+        'images': lambda: ListingImageSerializer(many=True, read_only=True),
+    }
 
     class Meta:
         model = Listing
@@ -37,36 +62,48 @@ class ListingListSerializer(serializers.ModelSerializer):
 
     def get_main_image(self, obj):
         request = self.context.get('request')
-        img = obj.images.first()
+        # images.all() берётся из prefetch_related, .first() сделал бы новый запрос
+        images = obj.images.all()
+        img = images[0] if images else None
         if img and img.image:
+            url = img.thumbnail.url if img.thumbnail else img.image.url
             if request:
-                return request.build_absolute_uri(img.image.url)
-            return img.image.url
-        # Заглушка, если фото нет
-        return "https://placehold.co/600x400?text=%D0%9D%D0%B5%D1%82+%D1%84%D0%BE%D1%82%D0%BE"
+                return request.build_absolute_uri(url)
+            return url
+        return NO_IMAGE_URL
 
     def get_is_favorite(self, obj):
+        favorite_ids = self.context.get('favorite_ids')
+        if favorite_ids is not None:
+            return obj.pk in favorite_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.favorited_by.filter(user=request.user).exists()
         return False
 
 
-class ListingDetailSerializer(serializers.ModelSerializer):
+class ListingDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ListingImageSerializer(many=True, read_only=True)
     seller = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     category_id = serializers.IntegerField(write_only=True, required=False)
+    breadcrumbs = serializers.SerializerMethodField()
     is_favorite = serializers.SerializerMethodField()
+    field_sources = {'breadcrumbs': ['category'], 'is_favorite': []}
 
     class Meta:
         model = Listing
         fields = ['id', 'title', 'description', 'price', 'is_negotiable',
-                  'category', 'category_id', 'seller', 'city', 'condition',
+                  'category', 'category_id', 'breadcrumbs', 'seller', 'city', 'condition',
                   'status', 'views_count', 'created_at', 'updated_at',
                   'images', 'is_favorite', 'delete_reason']
         read_only_fields = ['seller', 'views_count', 'created_at', 'updated_at']
 
+    def get_breadcrumbs(self, obj):
+        if not obj.category_id:
+            return []
+        return get_breadcrumbs(obj.category_id)
+
     def get_is_favorite(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -88,10 +125,17 @@ class ListingDetailSerializer(serializers.ModelSerializer):
         return instance
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     sender_name = serializers.CharField(source='sender.username', read_only=True)
     listing_title = serializers.CharField(source='listing.title', read_only=True)
     recipient_name = serializers.CharField(source='recipient.username', read_only=True)
+    expandable_fields = {
+        'sender': lambda: UserSerializer(read_only=True, fieldset=dict.fromkeys(UserSerializer.public_fields)),
+        'recipient': lambda: UserSerializer(read_only=True, fieldset=dict.fromkeys(UserSerializer.public_fields)),
+        'listing': lambda: ListingListSerializer(
+            read_only=True, fieldset=dict.fromkeys(['id', 'title', 'price', 'status', 'main_image']),
+        ),
+    }
 
     class Meta:
         model = Message
@@ -99,9 +143,69 @@ class MessageSerializer(serializers.ModelSerializer):
                   'recipient', 'recipient_name', 'text', 'is_read', 'created_at']
         read_only_fields = ['sender', 'created_at']
 
+    def validate(self, data):
+        """Переписка по объявлению — только между его продавцом и покупателем"""
+        sender = self.context['request'].user
+        listing, recipient = data['listing'], data['recipient']
+        if recipient.pk == sender.pk:
+            raise serializers.ValidationError('Нельзя написать самому себе')
+        if sender.pk == listing.seller_id:
+            # Продавец отвечает тому, кто уже написал ему по этому объявлению
+            if not Conversation.objects.filter(listing=listing, buyer=recipient, seller_id=sender.pk).exists():
+                raise serializers.ValidationError('Этот пользователь не писал вам по объявлению')
+        elif recipient.pk != listing.seller_id:
+            raise serializers.ValidationError('Написать по объявлению можно только его продавцу')
+        return data
+
     def create(self, validated_data):
-        validated_data['sender'] = self.context['request'].user
-        return super().create(validated_data)
+        sender = self.context['request'].user
+        validated_data['sender'] = sender
+        listing, recipient = validated_data['listing'], validated_data['recipient']
+        buyer_id, seller_id = Conversation.participants_for(listing, sender, recipient)
+
+        with transaction.atomic():
+            conversation, _ = Conversation.objects.get_or_create(
+                listing=listing, buyer_id=buyer_id, seller_id=seller_id
+            )
+            validated_data['conversation'] = conversation
+            message = super().create(validated_data)
+            # Счётчик непрочитанных растёт у получателя, атомарно через F()
+            unread_field = 'seller_unread' if recipient.pk == seller_id else 'buyer_unread'
+            Conversation.objects.filter(pk=conversation.pk).update(
+                last_message=message, last_message_at=message.created_at,
+                **{unread_field: F(unread_field) + 1},
+            )
+        return message
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """Строка входящих: собеседник, последнее сообщение и непрочитанные текущего пользователя"""
+    listing_title = serializers.CharField(source='listing.title', read_only=True)
+    other_user = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    unread = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'listing', 'listing_title', 'other_user',
+                  'last_message', 'last_message_at', 'unread']
+
+    def _user(self):
+        return self.context['request'].user
+
+    def get_other_user(self, obj):
+        other = obj.seller if self._user().pk == obj.buyer_id else obj.buyer
+        return {'id': other.pk, 'username': other.username}
+
+    def get_last_message(self, obj):
+        message = obj.last_message
+        if message is None:
+            return None
+        return {'id': message.pk, 'sender': message.sender_id,
+                'text': message.text, 'created_at': message.created_at}
+
+    def get_unread(self, obj):
+        return obj.unread_for(self._user())
 
 
 class WarningSerializer(serializers.ModelSerializer):
@@ -112,3 +216,12 @@ class WarningSerializer(serializers.ModelSerializer):
         model = UserWarning
         fields = ['id', 'user', 'user_name', 'admin', 'admin_name', 'reason', 'created_at']
         read_only_fields = ['admin', 'created_at']
+
+
+class ListingImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ListingImportJob
+        fields = ['id', 'status', 'progress', 'rows_processed', 'created_count',
+                  'error_count', 'errors', 'created_at', 'finished_at']
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from marketplace import events, response_cache
+from .models import Listing, ListingImage, Message, UserWarning
+from .suggest import suggestion_index
+from .tasks import schedule_image_processing
+
+
+def touch_listing(listing_id):
+    # Фото входят в ответ объявления — сдвигаем updated_at, от которого считается ETag
+    Listing.objects.filter(pk=listing_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ListingImage)
+def listing_image_saved(sender, instance, **kwargs):
+    if instance.image and not instance.is_processed:
+        schedule_image_processing(instance.pk)
+    touch_listing(instance.listing_id)
+    response_cache.bump('listings')
+
+
+@receiver(post_delete, sender=ListingImage)
+def listing_image_deleted(sender, instance, **kwargs):
+    touch_listing(instance.listing_id)
+    response_cache.bump('listings')
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def listing_changed(sender, **kwargs):
+    response_cache.bump('listings')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def seller_changed(sender, update_fields=None, **kwargs):
+    # Данные продавца встроены в ответы объявлений; вход (last_login) не в счёт
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    response_cache.bump('listings')
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    events.publish(instance.recipient_id, 'message', {
+        'id': instance.pk,
+        'conversation': instance.conversation_id,
+        'listing': instance.listing_id,
+        'listing_title': instance.listing.title,
+        'sender': instance.sender_id,
+        'sender_name': instance.sender.username,
+        'text': instance.text,
+        'created_at': instance.created_at,
+    })
+
+
+@receiver(post_save, sender=UserWarning)
+def warning_created(sender, instance, created, **kwargs):
+    if created:
+        events.publish(instance.user_id, 'warning', {
+            'id': instance.pk, 'reason': instance.reason, 'created_at': instance.created_at,
+        })
+
+
+@receiver(post_init, sender=Listing)
+def remember_listing_status(sender, instance, **kwargs):
+    # Поле может быть отложено через only() — не догружаем его ради сигнала
+    instance._event_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Listing)
+def listing_status_changed(sender, instance, created, **kwargs):
+    if not created and instance._event_status is not None and instance.status != instance._event_status:
+        events.publish(instance.seller_id, 'listing_status', {
+            'id': instance.pk, 'title': instance.title,
+            'status': instance.status, 'delete_reason': instance.delete_reason,
+        })
+    instance._event_status = instance.status
+
+
+@receiver(post_init, sender=Listing)
+def remember_listing_title(sender, instance, **kwargs):
+    instance._suggest_state = (instance.__dict__.get('status'), instance.__dict__.get('title'))
+
+
+@receiver(post_save, sender=Listing)
+def update_suggestions(sender, instance, created, **kwargs):
+    # Создание, снятие с публикации (ArchiveListingView), удаление админом, смена заголовка
+    old_status, old_title = instance._suggest_state
+    if not created and old_status is None:
+        return
+    was_active = not created and old_status == 'active'
+    is_active = instance.status == 'active'
+    if was_active and (not is_active or instance.title != old_title):
+        suggestion_index.remove_listing(old_title, instance.created_at)
+    if is_active and (not was_active or instance.title != old_title):
+        suggestion_index.add_listing(instance.title, instance.created_at)
+    instance._suggest_state = (instance.status, instance.title)
+
+
+@receiver(post_delete, sender=Listing)
+def listing_deleted_from_suggestions(sender, instance, **kwargs):
+    if instance._suggest_state[0] == 'active':
+        suggestion_index.remove_listing(instance._suggest_state[1], instance.created_at)
@@ -0,0 +1,224 @@
+"""
+Доставка событий пользователю.
+
+/api/my/events/ — Server-Sent Events. Обслуживается отдельным ASGI-приложением
+(маршрут в marketplace/asgi.py) в обход цепочки middleware Django: открытое
+соединение ждёт в event loop, не держит поток и закрывается сразу, как только
+клиент отключился. Авторизация — заголовок «Authorization: Token|Signed …»
+или ?ticket=: EventSource не умеет передавать заголовки, а постоянный токен в
+URL попал бы в логи доступа. Билет выдаёт POST /api/my/events/ticket/, он
+годен EVENTS_TICKET_MAX_AGE секунд и только для подключения к потоку.
+
+/api/my/events/poll/ — long-poll для клиентов без SSE и для запуска под WSGI.
+
+Без Last-Event-ID / ?after= поток начинается с текущего момента: старые
+события при каждом открытии страницы не повторяются.
+"""
+import asyncio
+import json
+import math
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.users.authentication import get_cached_user, resolve_signed_token, resolve_token
+from marketplace.events import format_sse, get_broker
+
+TICKET_SALT = 'apps.listings.events-ticket'
+
+SSE_PATH = '/api/my/events/'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _parse_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def issue_ticket(user):
+    return signing.dumps({'u': user.pk}, salt=TICKET_SALT)
+
+
+def _resolve_user(authorization, ticket):
+    keyword, _, key = authorization.partition(' ')
+    if keyword == 'Token':
+        return resolve_token(key.strip())
+    if keyword == 'Signed':
+        return resolve_signed_token(key.strip())
+    if ticket:
+        try:
+            payload = signing.loads(ticket, salt=TICKET_SALT, max_age=_setting('EVENTS_TICKET_MAX_AGE', 60))
+        except signing.BadSignature:
+            return None
+        return get_cached_user(payload.get('u'))
+    return None
+
+
+def _in_thread(func):
+    """Синхронный вызов (БД) из event loop: в общем пуле потоков, без оставленного соединения"""
+
+    def call(*args):
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(call, thread_sensitive=False)
+
+
+@_in_thread
+def stream_user_id(authorization, ticket=None):
+    user = _resolve_user(authorization, ticket)
+    return user.pk if user is not None and user.is_active else None
+
+
+@_in_thread
+def backlog_since(broker, user_id, after):
+    """(события после after, id последнего из них); без after — с текущего момента"""
+    if after is None:
+        return [], broker.latest(user_id)
+    events = broker.recent(user_id, after)
+    return events, events[-1]['id'] if events else after
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _send_json(send, status, data):
+    await send({
+        'type': 'http.response.start', 'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(data, ensure_ascii=False).encode()})
+
+
+async def sse_application(scope, receive, send):
+    headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope['headers']}
+    query = parse_qs(scope['query_string'].decode('latin1'))
+    user_id = await stream_user_id(headers.get('authorization', ''), query.get('ticket', [''])[0])
+    if user_id is None:
+        await _send_json(send, 401, {'error': 'Требуется авторизация'})
+        return
+
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    after = _parse_id(headers.get('last-event-id') or query.get('after', [''])[0])
+    try:
+        backlog, _ = await backlog_since(broker, user_id, after)
+    except Exception:
+        broker.unsubscribe(subscription)
+        raise
+    # Событие могло попасть и в хвост, и в очередь подписки — второй раз его не шлём.
+    # Отсекать по id > последнего отправленного нельзя: DatabaseBroker подбирает
+    # окном перекрытия строки, закоммиченные позже строк с большим id
+    delivered = {event['id'] for event in backlog}
+    heartbeat = _setting('EVENTS_HEARTBEAT', 20)
+    # Соединение периодически закрывается, EventSource сам переподключится с Last-Event-ID
+    deadline = time.monotonic() + _setting('EVENTS_STREAM_MAX_AGE', 300)
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+
+    async def write(body, more=True):
+        await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': more})
+
+    try:
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await write('retry: 3000\n\n' + ''.join(format_sse(event) for event in backlog))
+        while time.monotonic() < deadline:
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnect}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                getter.cancel()
+                return
+            if getter not in done:
+                getter.cancel()
+                await write(': ping\n\n')
+            elif getter.result()['id'] not in delivered:
+                await write(format_sse(getter.result()))
+        await write('', more=False)
+    finally:
+        disconnect.cancel()
+        broker.unsubscribe(subscription)
+
+
+def event_stream(request):
+    # Под ASGI этот путь перехватывает sse_application
+    return JsonResponse(
+        {'error': 'Поток событий доступен только под ASGI, используйте /api/my/events/poll/'},
+        status=501,
+    )
+
+
+class EventTicketView(APIView):
+    """Короткоживущий билет для ?ticket= потока событий (EventSource не передаёт заголовки)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({'ticket': issue_ticket(request.user), 'expires_in': _setting('EVENTS_TICKET_MAX_AGE', 60)})
+
+
+@sync_to_async
+def _session_user_id(request):
+    user = request.user
+    return user.pk if user.is_authenticated else None
+
+
+async def event_poll(request):
+    header = request.headers.get('Authorization', '')
+    if header:
+        user_id = await stream_user_id(header)
+    else:
+        user_id = await _session_user_id(request)
+    if user_id is None:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    after = _parse_id(request.headers.get('Last-Event-ID') or request.GET.get('after'))
+    limit = _setting('EVENTS_POLL_TIMEOUT', 25)
+    try:
+        timeout = float(request.GET.get('timeout', limit))
+    except ValueError:
+        timeout = 0
+    if not math.isfinite(timeout):
+        # float() пропускает nan и inf, а min() с nan возвращает nan
+        timeout = limit
+    timeout = min(timeout, limit)
+
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        events, last_id = await backlog_since(broker, user_id, after)
+        if not events:
+            event = await subscription.get(max(timeout, 0))
+            if event is not None:
+                # Даём долететь событиям той же транзакции
+                await asyncio.sleep(0)
+                # Уже отданное из хвоста опрос другого воркера может прислать повторно
+                events = [item for item in [event, *subscription.drain()] if item['id'] > last_id]
+    finally:
+        broker.unsubscribe(subscription)
+    if events:
+        last_id = max(item['id'] for item in events)
+    return JsonResponse({'events': events, 'last_id': last_id})
@@ -0,0 +1,363 @@
+"""
+Подсказки поисковой строки по заголовкам объявлений и популярным запросам.
+
+Фраза — нормализованный хвост заголовка, начиная с любого слова (не длиннее
+MAX_PHRASE_WORDS слов): из «Новый iPhone 13» получаются «новый iphone 13»
+и «iphone 13», поэтому «iph» находит «iphone 13», сколько бы разных
+прилагательных ни стояло перед ним. Вторая часть — запросы, по которым лента
+что-то нашла.
+
+Вес фразы — сумма вкладов объявлений и запросов, каждый вклад затухает вдвое
+за LISTING_SUGGEST_HALF_LIFE_DAYS: частые и свежие фразы выше. Вклады
+считаются относительно общей точки отсчёта, поэтому со временем порядок
+уже посчитанных фраз не меняется и пересчитывать их не нужно.
+
+Префиксное дерево хранит в каждом узле топ фраз своего поддерева; при изменении
+веса топы пересчитываются от листа к корню по детям, ответ — проход по
+символам префикса. Память ограничена: фраз не больше LISTING_SUGGEST_MAX_PHRASES,
+самые слабые вытесняются. Изменения своего процесса приходят через сигналы,
+других процессов — при полной перестройке раз в LISTING_SUGGEST_RELOAD_INTERVAL
+секунд. Перестройка идёт в фоновом потоке и без блокировки: подсказки до
+подмены отвечает прежний индекс.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+TOP_SIZE = 10
+MAX_PHRASE_WORDS = 4
+MAX_PHRASE_LENGTH = 60
+# Поиск, давший результаты, весит как столько же свежих объявлений с этой фразой
+QUERY_WEIGHT = 1.0
+# Вытеснение — пачкой, когда фраз на 20% больше лимита
+EVICTION_SLACK = 1.2
+# Повтор перестройки после ошибки — не раньше, чем через столько секунд
+RELOAD_RETRY_DELAY = 30
+
+NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_phrase(text):
+    value = NON_WORD.sub(' ', (text or '').casefold().replace('ё', 'е')).replace('_', ' ')
+    return ' '.join(value.split())[:MAX_PHRASE_LENGTH].strip()
+
+
+def title_phrases(title):
+    """Фразы заголовка: хвосты с каждого слова из двух и более символов с буквой"""
+    words = normalize_phrase(title).split()
+    phrases = set()
+    for i, word in enumerate(words):
+        if len(word) >= 2 and not word.isdigit():
+            phrases.add(' '.join(words[i:i + MAX_PHRASE_WORDS])[:MAX_PHRASE_LENGTH].strip())
+    return phrases
+
+
+class _Phrase:
+    """Вклады в вес фразы: объявления (и их число) и запросы"""
+    __slots__ = ('listings', 'count', 'queries')
+
+    def __init__(self):
+        self.listings = 0.0
+        self.count = 0
+        self.queries = 0.0
+
+    @property
+    def score(self):
+        return self.listings + self.queries
+
+
+class _Node:
+    __slots__ = ('children', 'phrase', 'score', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.phrase = None
+        self.score = 0.0
+        self.top = ()
+
+    def compute_top(self):
+        candidates = [(self.score, self.phrase)] if self.score > 0 else []
+        for child in self.children.values():
+            candidates.extend(child.top)
+        self.top = tuple(heapq.nlargest(TOP_SIZE, candidates))
+
+
+def _strongest(phrases, limit):
+    return dict(heapq.nlargest(limit, phrases.items(), key=lambda item: item[1].score))
+
+
+def _build_tree(phrases):
+    root = _Node()
+    for phrase, entry in phrases.items():
+        node = root
+        for char in phrase:
+            node = node.children.setdefault(char, _Node())
+        node.phrase, node.score = phrase, entry.score
+
+    def fill(node):
+        for child in node.children.values():
+            fill(child)
+        node.compute_top()
+
+    fill(root)
+    return root
+
+
+class SuggestionIndex:
+    def __init__(self, max_phrases=None, half_life_days=None, reload_interval=None):
+        self.max_phrases = max_phrases
+        self.half_life_days = half_life_days
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._root = _Node()
+        self._phrases = {}
+        self._epoch = time.time()
+        self._loaded_at = None
+        self._failed_at = None
+        self._journal = None
+        self._reload_thread = None
+
+    def get_max_phrases(self):
+        if self.max_phrases is not None:
+            return self.max_phrases
+        return getattr(settings, 'LISTING_SUGGEST_MAX_PHRASES', 20000)
+
+    def get_half_life(self):
+        days = self.half_life_days
+        if days is None:
+            days = getattr(settings, 'LISTING_SUGGEST_HALF_LIFE_DAYS', 14)
+        return days * 86400
+
+    def get_reload_interval(self):
+        if self.reload_interval is not None:
+            return self.reload_interval
+        return getattr(settings, 'LISTING_SUGGEST_RELOAD_INTERVAL', 600)
+
+    @property
+    def is_loaded(self):
+        return self._loaded_at is not None
+
+    def _weight(self, moment, epoch=None):
+        timestamp = moment.timestamp() if hasattr(moment, 'timestamp') else moment
+        return 2 ** ((timestamp - (epoch or self._epoch)) / self.get_half_life())
+
+    # --- дерево ---
+
+    def _set_score(self, phrase):
+        entry = self._phrases.get(phrase)
+        score = entry.score if entry else 0.0
+        path = [self._root]
+        node = self._root
+        for char in phrase:
+            child = node.children.get(char)
+            if child is None:
+                if score <= 0:
+                    return
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        node.phrase, node.score = phrase, score
+
+        if score <= 0:
+            # Убираем опустевшую ветку, чтобы дерево не росло от удалённых фраз
+            for depth in range(len(path) - 1, 0, -1):
+                if path[depth].score > 0 or path[depth].children:
+                    break
+                del path[depth - 1].children[phrase[depth - 1]]
+        for node in reversed(path):
+            node.compute_top()
+
+    def _evict(self):
+        """Оставляет max_phrases самых весомых фраз и перестраивает дерево"""
+        self._phrases = _strongest(self._phrases, self.get_max_phrases())
+        self._root = _build_tree(self._phrases)
+
+    def _changed(self, phrases):
+        if len(self._phrases) > self.get_max_phrases() * EVICTION_SLACK:
+            self._evict()
+        else:
+            for phrase in phrases:
+                self._set_score(phrase)
+
+    # --- загрузка ---
+
+    def _collect(self, epoch):
+        """
+        Фразы активных объявлений. Объявления идут от новых к старым, и как только
+        фраз на EVICTION_SLACK больше лимита, слабые отбрасываются: память сборки
+        ограничена, а занижен может быть только вес старых редких фраз.
+        """
+        Listing = apps.get_model('listings', 'Listing')
+        limit = self.get_max_phrases()
+        phrases = {}
+        rows = Listing.objects.filter(status='active').order_by('-created_at').values_list('title', 'created_at')
+        for title, created_at in rows.iterator(chunk_size=5000):
+            weight = self._weight(created_at, epoch)
+            for phrase in title_phrases(title):
+                entry = phrases.setdefault(phrase, _Phrase())
+                entry.listings += weight
+                entry.count += 1
+            if len(phrases) > limit * EVICTION_SLACK:
+                phrases = _strongest(phrases, limit)
+        return phrases
+
+    def load(self):
+        """
+        Строит индекс заново по активным объявлениям; популярные запросы
+        переносятся. БД читается и дерево строится без блокировки; изменения,
+        пришедшие за это время, копятся в журнале и применяются при подмене.
+        """
+        epoch = time.time()
+        with self._lock:
+            self._journal = []
+            factor = self._weight(self._epoch, epoch)
+            queries = [(phrase, entry.queries) for phrase, entry in self._phrases.items() if entry.queries]
+        try:
+            phrases = self._collect(epoch)
+            # Веса запросов — к новой точке отсчёта
+            for phrase, weight in queries:
+                phrases.setdefault(phrase, _Phrase()).queries = weight * factor
+            if len(phrases) > self.get_max_phrases():
+                phrases = _strongest(phrases, self.get_max_phrases())
+            root = _build_tree(phrases)
+
+            with self._lock:
+                self._root, self._phrases, self._epoch = root, phrases, epoch
+                for apply, args in self._journal:
+                    apply(*args)
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def reload_in_background(self):
+        """Запускает перестройку в фоновом потоке, если она ещё не идёт; возвращает поток"""
+        with self._lock:
+            # После fork поток родителя в дочернем процессе не жив — запускаем свой
+            if self._reload_thread is None or not self._reload_thread.is_alive():
+                self._reload_thread = threading.Thread(target=self._reload, name='listing-suggest', daemon=True)
+                self._reload_thread.start()
+            return self._reload_thread
+
+    def _reload(self):
+        try:
+            self.load()
+            self._failed_at = None
+        except Exception:
+            self._failed_at = time.monotonic()
+            logger.warning('Индекс подсказок не перестроен', exc_info=True)
+        finally:
+            # У потока своё соединение с БД
+            connection.close()
+
+    def ensure_fresh(self):
+        """Первую загрузку дожидаемся; устаревший индекс отвечает, пока в фоне строится новый"""
+        loaded_at = self._loaded_at
+        now = time.monotonic()
+        if loaded_at is not None and now - loaded_at < self.get_reload_interval():
+            return
+        if self._failed_at is not None and now - self._failed_at < RELOAD_RETRY_DELAY:
+            return
+        thread = self.reload_in_background()
+        if loaded_at is None:
+            thread.join()
+
+    # --- изменения ---
+
+    def add_listing(self, title, created_at):
+        self._update_listing(title, created_at, 1)
+
+    def remove_listing(self, title, created_at):
+        self._update_listing(title, created_at, -1)
+
+    def _update_listing(self, title, created_at, sign):
+        if not self.is_loaded and self._journal is None:
+            return
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self._apply_listing, (title, created_at, sign)))
+            if self.is_loaded:
+                self._apply_listing(title, created_at, sign)
+
+    def _apply_listing(self, title, created_at, sign):
+        phrases = title_phrases(title)
+        with self._lock:
+            weight = self._weight(created_at)
+            for phrase in list(phrases):
+                entry = self._phrases.get(phrase)
+                if entry is None:
+                    if sign < 0:
+                        # Фраза была вытеснена — вычитать не из чего
+                        phrases.discard(phrase)
+                        continue
+                    entry = self._phrases[phrase] = _Phrase()
+                entry.count += sign
+                if entry.count > 0:
+                    entry.listings = max(entry.listings + sign * weight, 0.0)
+                else:
+                    # Последнее объявление с фразой — обнуляем точно, без остатка от вычитания
+                    entry.count, entry.listings = 0, 0.0
+                    if not entry.queries:
+                        del self._phrases[phrase]
+            self._changed(phrases)
+
+    def record_query(self, query):
+        """Запрос, по которому лента что-то нашла"""
+        phrase = normalize_phrase(query)
+        if len(phrase) < 2 or (not self.is_loaded and self._journal is None):
+            return
+        moment = time.time()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self._apply_query, (phrase, moment)))
+            if self.is_loaded:
+                self._apply_query(phrase, moment)
+
+    def _apply_query(self, phrase, moment):
+        with self._lock:
+            entry = self._phrases.setdefault(phrase, _Phrase())
+            entry.queries += QUERY_WEIGHT * self._weight(moment)
+            self._changed([phrase])
+
+    # --- чтение ---
+
+    def suggest(self, prefix, limit=TOP_SIZE):
+        key = normalize_phrase(prefix)
+        if not key:
+            return []
+        self.ensure_fresh()
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [phrase for _, phrase in node.top[:limit]]
+
+    def phrases(self):
+        return list(self._phrases)
+
+    def stats(self):
+        nodes = 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            stack.extend(node.children.values())
+        return {'phrases': len(self._phrases), 'nodes': nodes, 'max_phrases': self.get_max_phrases()}
+
+
+suggestion_index = SuggestionIndex()
+
+
+def warm_suggestion_index():
+    """Строит индекс подсказок в фоновом потоке при старте процесса"""
+    # Ошибку (например, миграции ещё не применены) поток пишет в лог; повтор — при запросе
+    suggestion_index.reload_in_background()
@@ -0,0 +1,115 @@
+"""
+Фоновая обработка фотографий.
+
+Загрузка сохраняет файл как есть и сразу отвечает клиенту; ресайз, WebP и
+миниатюры делаются в пуле потоков процесса после коммита транзакции.
+LISTING_IMAGE_PROCESSING = 'sync' обрабатывает фото прямо в запросе
+(удобно для отладки и скриптов). Необработанные фото (например, если процесс
+перезапустился) добирает команда process_images.
+
+Массовый импорт объявлений идёт в отдельном пуле из одного потока, чтобы
+длинные задания не задерживали обработку фото.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from marketplace import response_cache
+from .images import build_renditions
+from .models import Listing, ListingImage
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = 'listings/renditions/'
+
+_executor = None
+_import_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'LISTING_IMAGE_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='listing-images')
+    return _executor
+
+
+def schedule_image_processing(image_id):
+    """Ставит фото в очередь после коммита текущей транзакции"""
+    if getattr(settings, 'LISTING_IMAGE_PROCESSING', 'thread') == 'sync':
+        transaction.on_commit(lambda: process_listing_image(image_id))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, image_id))
+
+
+def _run_in_thread(image_id):
+    close_old_connections()
+    try:
+        process_listing_image(image_id)
+    except Exception:
+        logger.exception('Не удалось обработать фото %s', image_id)
+    finally:
+        connection.close()
+
+
+def schedule_import(job_id):
+    """Запускает импорт объявлений после коммита текущей транзакции"""
+    global _import_executor
+    from .bulk import run_import
+
+    if getattr(settings, 'LISTING_IMPORT_PROCESSING', 'thread') == 'sync':
+        transaction.on_commit(lambda: run_import(job_id))
+        return
+    if _import_executor is None:
+        _import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='listing-import')
+    transaction.on_commit(lambda: _import_executor.submit(_run_import_in_thread, job_id))
+
+
+def _run_import_in_thread(job_id):
+    from .bulk import run_import
+
+    close_old_connections()
+    try:
+        run_import(job_id)
+    finally:
+        connection.close()
+
+
+def process_listing_image(image_id):
+    try:
+        img = ListingImage.objects.get(pk=image_id)
+    except ListingImage.DoesNotExist:
+        return
+    if img.is_processed or not img.image:
+        return
+
+    storage = img.image.storage
+    source_name = img.image.name
+    with img.image.open('rb') as source:
+        result = build_renditions(source)
+
+    renditions = []
+    for rendition in result['renditions']:
+        content = rendition.pop('file')
+        rendition['name'] = storage.save(RENDITIONS_DIR + content.name, content)
+        renditions.append(rendition)
+
+    original = result['original']
+    original_name = storage.save(posixpath.join(posixpath.dirname(source_name), original.name), original)
+    thumbnail = result['thumbnail']
+    thumbnail_name = storage.save(img.thumbnail.field.upload_to + thumbnail.name, thumbnail)
+
+    # update(), а не save(): не запускаем сигналы повторно
+    ListingImage.objects.filter(pk=img.pk).update(
+        image=original_name, thumbnail=thumbnail_name,
+        width=result['width'], height=result['height'],
+        renditions=renditions, is_processed=True,
+    )
+    Listing.objects.filter(pk=img.listing_id).update(updated_at=timezone.now())
+    if original_name != source_name:
+        storage.delete(source_name)
+    response_cache.bump('listings')
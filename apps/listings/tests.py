@@ -0,0 +1,555 @@
+import asyncio
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from apps.categories.models import Category
+from apps.categories.tree import get_category_nodes
+from apps.cities.index import city_index
+from apps.cities.models import City
+from marketplace.events import DatabaseBroker, InProcessBroker
+
+from .bulk import RowError, fetch_image, run_import
+from .counters import view_counter
+from .models import Conversation, Favorite, Listing, ListingImage, ListingImportJob
+from .pagination import KeysetPagination
+from . import suggest
+from .search import search_tokens
+from .streams import sse_application
+from .suggest import SuggestionIndex
+
+
+def clear_caches():
+    for alias in ('default', 'responses'):
+        caches[alias].clear()
+
+
+class ListingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.seller = User.objects.create_user(username='seller', password='pass12345')
+        cls.admin = User.objects.create_user(username='admin', password='pass12345', is_staff=True)
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def create_listings(self, count, **kwargs):
+        return [
+            Listing.objects.create(
+                title=kwargs.get('title', f'Объявление {i}'), description='Описание',
+                price=100 + i, seller=self.seller, city='Москва',
+            )
+            for i in range(count)
+        ]
+
+
+class SearchTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_listings(1, title='Новый iPhone 13')
+        self.create_listings(1, title='Велосипед горный')
+
+    def test_tokens(self):
+        self.assertEqual(search_tokens('"iph\' 13"'), ['iph', '13'])
+        self.assertEqual(search_tokens('" \' -- _'), [])
+
+    def test_prefix_search(self):
+        response = self.client.get('/api/listings/', {'search': 'ipho'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['title'] for item in response.json()['results']], ['Новый iPhone 13'])
+
+    def test_quotes_only_query_is_ignored(self):
+        self.client.force_authenticate(self.admin)
+        for url in ('/api/listings/', '/api/listings/facets/', '/api/admin/listings/'):
+            for query in ('"', "'", '" \'', '"*"'):
+                with self.subTest(url=url, query=query):
+                    response = self.client.get(url, {'search': query})
+                    self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/listings/', {'search': '"'})
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_quoted_word_is_searched(self):
+        response = self.client.get('/api/listings/', {'search': '"велосипед"'})
+        self.assertEqual([item['title'] for item in response.json()['results']], ['Велосипед горный'])
+
+
+class SuggestionIndexTests(ListingTestCase):
+    def test_changes_during_reload_are_not_blocked_or_lost(self):
+        index = SuggestionIndex()
+        index.load()
+        index.record_query('велосипед горный')
+        building, release = threading.Event(), threading.Event()
+
+        def collect(epoch):
+            building.set()
+            release.wait(5)
+            return {}
+
+        with mock.patch.object(index, '_collect', side_effect=collect):
+            thread = index.reload_in_background()
+            self.assertTrue(building.wait(5))
+            # Перестройка идёт — старый индекс принимает изменения и отвечает
+            index.add_listing('Новый велосипед', timezone.now())
+            index.record_query('велосипед детский')
+            self.assertEqual(index.suggest('нов'), ['новый велосипед'])
+            self.assertTrue(thread.is_alive())
+            release.set()
+            thread.join(5)
+
+        # В БД объявлений нет: всё, кроме прежнего запроса, пришло из журнала
+        self.assertEqual(index.suggest('нов'), ['новый велосипед'])
+        self.assertEqual(sorted(index.suggest('вело')), ['велосипед', 'велосипед горный', 'велосипед детский'])
+
+    def test_load_keeps_at_most_max_phrases(self):
+        listings = self.create_listings(20)
+        index = SuggestionIndex(max_phrases=3)
+        with mock.patch('apps.listings.suggest._strongest', wraps=suggest._strongest) as strongest:
+            index.load()
+        # Сборка не держит в памяти все фразы сразу
+        self.assertLessEqual(max(len(call.args[0]) for call in strongest.call_args_list), 3 * suggest.EVICTION_SLACK + 1)
+        self.assertEqual(len(index.phrases()), 3)
+        self.assertIn(listings[-1].title.casefold(), index.phrases())
+
+
+class FavoriteStateQueryTests(ListingTestCase):
+    """Число запросов ленты не зависит от размера страницы: «в избранном» — один запрос на страницу"""
+    PAGE_SIZES = [1, 5, 20]
+    FEED_PARAMS = [{}, {'fields': 'id,title,is_favorite,thumbnail'}, {'cursor': ''}]
+
+    def setUp(self):
+        super().setUp()
+        self.listings = self.create_listings(25)
+        # Без сигналов: обработка фото в фоне здесь не нужна
+        ListingImage.objects.bulk_create(
+            ListingImage(listing=listing, image=f'listings/{listing.pk}.jpg', thumbnail=f'listings/thumbs/{listing.pk}.jpg')
+            for listing in self.listings
+        )
+        self.favorite = self.listings[-1]
+        Favorite.objects.create(user=self.seller, listing=self.favorite)
+
+    def get_page(self, url, params, size, queries):
+        clear_caches()
+        with mock.patch.object(PageNumberPagination, 'page_size', size), \
+                mock.patch.object(KeysetPagination, 'page_size', size), \
+                self.assertNumQueries(queries):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), size)
+        return results
+
+    def check_feed(self, expected, check):
+        for params in self.FEED_PARAMS:
+            for size in self.PAGE_SIZES:
+                with self.subTest(params=params, size=size):
+                    # Keyset-страница не считает общее количество
+                    queries = expected - 1 if 'cursor' in params else expected
+                    check(self.get_page('/api/listings/', params, size, queries))
+
+    def test_anonymous_feed(self):
+        self.check_feed(4, lambda results: self.assertFalse(any(item['is_favorite'] for item in results)))
+
+    def test_authenticated_feed(self):
+        self.client.force_authenticate(self.seller)
+        self.check_feed(6, lambda results: self.assertEqual(
+            {item['id'] for item in results if item['is_favorite']}, {self.favorite.pk}
+        ))
+
+    def test_favorites_list(self):
+        Favorite.objects.bulk_create(Favorite(user=self.seller, listing=listing) for listing in self.listings[:-1])
+        self.client.force_authenticate(self.seller)
+        for size in self.PAGE_SIZES:
+            with self.subTest(size=size):
+                # Все объявления списка — избранные, отдельный запрос не нужен
+                results = self.get_page('/api/my/favorites/', {}, size, 2)
+                self.assertTrue(all(item['is_favorite'] for item in results))
+
+
+class CategoryFilterTests(ListingTestCase):
+    def test_category_missing_from_cached_tree(self):
+        parent = Category.objects.create(name='Электроника', slug='electronics')
+        listing = self.create_listings(1)[0]
+        self.client.get('/api/categories/')
+        # Как будто категорию создал другой процесс: локальный кэш дерева её не знает
+        with mock.patch('apps.categories.signals.invalidate_category_tree'):
+            child = Category.objects.create(name='Телефоны', slug='phones', parent=parent)
+        Listing.objects.filter(pk=listing.pk).update(category=child)
+
+        for category in (parent, child):
+            with self.subTest(category=category.slug):
+                response = self.client.get('/api/listings/', {'category': category.pk})
+                self.assertEqual([item['id'] for item in response.json()['results']], [listing.pk])
+
+        response = self.client.get('/api/listings/', {'category': child.pk + 100})
+        self.assertEqual(response.json()['results'], [])
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_category_changed_in_another_worker(self):
+        category = Category.objects.create(name='Электроника', slug='electronics')
+        self.client.get('/api/categories/')
+        # Другой воркер переименовал категорию: его сигнал кэш этого процесса не сбросил
+        with mock.patch('apps.categories.signals.invalidate_category_tree'):
+            category.name = 'Техника'
+            category.save()
+        self.assertEqual([item['name'] for item in self.client.get('/api/categories/').json()], ['Техника'])
+
+
+class CityFilterTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_listings(1)
+        city_index.load()
+        # Индекс — общий для процесса: следующие тесты начнут с незагруженного
+        self.addCleanup(city_index.__init__)
+
+    def create_elsewhere(self, name):
+        # Как будто город создал другой процесс: сигнал до индекса этого не дошёл
+        with mock.patch('apps.cities.signals.city_index'):
+            city = City.objects.create(name=name)
+        listing = self.create_listings(1)[0]
+        Listing.objects.filter(pk=listing.pk).update(city='', city_ref=city)
+        return listing
+
+    def test_city_missing_from_index_is_found_in_db(self):
+        listing = self.create_elsewhere('Нижний Новгород')
+        for query in ('Нижний Новгород', 'новг', 'нижн'):
+            with self.subTest(query=query):
+                response = self.client.get('/api/listings/', {'city': query})
+                self.assertEqual([item['id'] for item in response.json()['results']], [listing.pk])
+        self.assertEqual(self.client.get('/api/listings/', {'city': 'город'}).json()['results'], [])
+
+    def test_refresh_picks_up_late_commits(self):
+        self.create_elsewhere('Казань')
+        # Более новая строка уже прочитана, а «Казань» закоммичена позже неё
+        city_index._synced += timedelta(seconds=5)
+        city_index.refresh()
+        self.assertEqual([city['name'] for city in city_index.suggest('каз')], ['Казань'])
+
+
+class ResponseCacheTests(ListingTestCase):
+    def test_empty_cursor_is_not_the_plain_feed(self):
+        self.create_listings(3)
+        plain = self.client.get('/api/listings/')
+        self.assertEqual(plain.json()['count'], 3)
+
+        keyset = self.client.get('/api/listings/', {'cursor': ''})
+        self.assertEqual(keyset['X-Cache'], 'MISS')
+        # Keyset-страница не считает общее количество
+        self.assertIsNone(keyset.json()['count'])
+        self.assertNotEqual(plain['ETag'], keyset['ETag'])
+
+        self.assertEqual(self.client.get('/api/listings/', {'page': '1'})['X-Cache'], 'HIT')
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_process_local_cache_is_off_with_several_workers(self):
+        # Сброс поколения в LocMemCache не дошёл бы до других воркеров
+        self.create_listings(1)
+        for url in ('/api/listings/', '/api/listings/facets/'):
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.assertNotIn('X-Cache', self.client.get(url))
+
+
+class BulkDeleteTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.listings = self.create_listings(2)
+        self.client.force_authenticate(self.admin)
+
+    def delete(self, **data):
+        return self.client.post('/api/admin/listings/bulk-delete/', data, format='json')
+
+    def test_invalid_filter_is_reported_per_field(self):
+        response = self.delete(filter={'min_price': 'дёшево'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('min_price', response.json())
+        self.assertFalse(Listing.objects.filter(status='deleted_admin').exists())
+
+    def test_cascade_requires_warn(self):
+        for cascade in (True, 'false'):
+            with self.subTest(cascade=cascade):
+                response = self.delete(ids=[self.listings[0].pk], cascade=cascade)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Listing.objects.filter(status='deleted_admin').exists())
+
+    def test_cascade_with_warn_deletes_all_active_listings(self):
+        response = self.delete(ids=[self.listings[0].pk], warn='Спам', cascade=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['listings_deleted'], 2)
+
+
+class FeedValidatorTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listings(1)[0]
+        # Просмотры не должны дожить до atexit, когда тестовой БД уже нет
+        self.addCleanup(view_counter.flush)
+
+    def assertRevalidates(self, url, params=None):
+        etag = self.client.get(url, params)['ETag']
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_not_modified_without_listing_queries(self):
+        etag = self.assertRevalidates('/api/listings/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_views_flush_changes_etags(self):
+        feed = self.assertRevalidates('/api/listings/', {'ordering': '-views_count'})
+        detail = self.assertRevalidates(f'/api/listings/{self.listing.pk}/')
+        view_counter.flush()
+
+        self.assertNotEqual(self.client.get('/api/listings/', {'ordering': '-views_count'})['ETag'], feed)
+        response = self.client.get(f'/api/listings/{self.listing.pk}/', HTTP_IF_NONE_MATCH=detail)
+        self.assertEqual(response.status_code, 200)
+        # Два сохранённых просмотра и этот
+        self.assertEqual(response.json()['views_count'], 3)
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_several_workers_with_local_cache_validate_against_db(self):
+        etag = self.assertRevalidates('/api/listings/')
+        # Другой воркер сбросил просмотры: поколение в памяти этого процесса не изменилось
+        Listing.objects.filter(pk=self.listing.pk).update(views_count=5)
+        self.assertEqual(self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listing_change_changes_feed_etag(self):
+        etag = self.assertRevalidates('/api/listings/')
+        self.listing.price = 1
+        self.listing.save()
+        self.assertEqual(self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ImportTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def run_import(self, rows):
+        text = 'title,description,price,category_id,city\n' + ''.join(
+            f'{title},Описание,1000,{category_id},Москва\n' for title, category_id in rows
+        )
+        job = ListingImportJob.objects.create(seller=self.seller, source=ContentFile(text.encode(), name='listings.csv'))
+        run_import(job.pk)
+        job.refresh_from_db()
+        return job
+
+    def test_category_ids_are_checked_in_db(self):
+        old = Category.objects.create(name='Электроника', slug='electronics')
+        get_category_nodes()
+        # Изменения другого воркера: кэш дерева этого процесса о них не знает
+        with mock.patch('apps.categories.signals.invalidate_category_tree'):
+            new = Category.objects.create(name='Телефоны', slug='phones')
+            deleted_pk = old.pk
+            old.delete()
+
+        job = self.run_import([('Телефон', new.pk), ('Ноутбук', deleted_pk)])
+        self.assertEqual((job.status, job.created_count), ('done', 1))
+        self.assertEqual(job.errors, [{'row': 2, 'errors': {'category_id': ['Категория не найдена']}}])
+
+    def test_uploaded_files_are_deleted(self):
+        done = self.run_import([('Телефон', '')])
+        failed = ListingImportJob.objects.create(
+            seller=self.seller, source=ContentFile(b'title\n', name='listings.csv'),
+            images_archive=ContentFile(b'not a zip', name='photos.zip'),
+        )
+        run_import(failed.pk)
+        failed.refresh_from_db()
+
+        self.assertEqual((done.status, failed.status), ('done', 'failed'))
+        for job in (done, failed):
+            self.assertFalse(job.source)
+            self.assertFalse(job.images_archive)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'imports')), [])
+
+
+class QueryPlanTests(ListingTestCase):
+    def test_hot_endpoints_use_indexes(self):
+        Category.objects.create(name='Электроника', slug='electronics')
+        out = StringIO()
+        try:
+            call_command('check_query_plans', stdout=out, no_color=True)
+        except CommandError as exc:
+            self.fail(f'{exc}\n{out.getvalue()}')
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines)
+        self.assertEqual([line for line in lines if not line.endswith(': ok')], [])
+
+
+class GenerateDataTests(ListingTestCase):
+    def test_second_run_adds_users(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        options = {'users': 3, 'listings': 5, 'images_per_listing': 0, 'favorites': 2, 'messages': 2, 'stdout': StringIO()}
+        with override_settings(MEDIA_ROOT=media):
+            call_command('generate_data', **options)
+            # После удаления число пользователей меньше, чем уже выданных номеров
+            self.admin.delete()
+            call_command('generate_data', **options)
+        # seller из setUpTestData + по 3 за запуск
+        self.assertEqual(get_user_model().objects.count(), 7)
+
+
+class MessageTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.buyer = User.objects.create_user(username='buyer', password='pass12345')
+        self.other = User.objects.create_user(username='other', password='pass12345')
+        self.listing = self.create_listings(1)[0]
+
+    def send(self, sender, recipient):
+        self.client.force_authenticate(sender)
+        return self.client.post('/api/messages/', {
+            'listing': self.listing.pk, 'recipient': recipient.pk, 'text': 'Ещё продаёте?',
+        })
+
+    def test_buyer_writes_seller_and_seller_replies(self):
+        self.assertEqual(self.send(self.buyer, self.seller).status_code, 201)
+        self.assertEqual(self.send(self.seller, self.buyer).status_code, 201)
+
+        conversation = Conversation.objects.get()
+        self.assertEqual((conversation.buyer, conversation.seller), (self.buyer, self.seller))
+        self.assertEqual((conversation.buyer_unread, conversation.seller_unread), (1, 1))
+
+    def test_message_outside_listing_conversation_is_rejected(self):
+        # Покупатель пишет не продавцу, продавец — тому, кто ему не писал, и самому себе
+        for sender, recipient in [(self.buyer, self.other), (self.seller, self.other), (self.seller, self.seller)]:
+            with self.subTest(sender=sender.username, recipient=recipient.username):
+                self.assertEqual(self.send(sender, recipient).status_code, 400)
+        self.assertFalse(Conversation.objects.exists())
+
+
+class EventTests(TransactionTestCase):
+    """Long-poll работает с БД из пула потоков — данные должны быть закоммичены"""
+
+    def setUp(self):
+        clear_caches()
+        User = get_user_model()
+        self.seller = User.objects.create_user(username='seller', password='pass12345')
+        self.admin = User.objects.create_user(username='admin', password='pass12345', is_staff=True)
+        self.client = APIClient()
+
+    def test_database_broker_is_shared_between_workers(self):
+        publisher, reader = DatabaseBroker(), DatabaseBroker()
+        first = publisher.publish(self.seller.pk, 'message', {'text': 'Здравствуйте'})
+        second = publisher.publish(self.seller.pk, 'warning', {'reason': 'Спам'})
+
+        self.assertGreater(second['id'], first['id'])
+        self.assertEqual(reader.latest(self.seller.pk), second['id'])
+        self.assertEqual(reader.recent(self.seller.pk, first['id']), [second])
+        self.assertEqual(reader.recent(self.admin.pk, 0), [])
+
+    def test_token_is_not_accepted_in_query_string(self):
+        token = Token.objects.create(user=self.seller)
+        response = self.client.get('/api/my/events/poll/', {'token': token.key, 'timeout': 0})
+        self.assertEqual(response.status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.client.get('/api/my/events/poll/', {'timeout': 0})
+        self.assertEqual(response.status_code, 200)
+
+    def stream(self, broker, after, on_open):
+        """Открывает SSE-поток; on_open вызывается, когда клиент получил хвост"""
+        token = Token.objects.create(user=self.seller)
+        scope = {'headers': [(b'authorization', f'Token {token.key}'.encode())], 'query_string': f'after={after}'.encode()}
+        bodies = []
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                if not bodies:
+                    on_open()
+                bodies.append(message['body'].decode())
+
+        with mock.patch('apps.listings.streams.get_broker', return_value=broker), \
+                override_settings(EVENTS_STREAM_MAX_AGE=0.3, EVENTS_HEARTBEAT=0.1):
+            asyncio.run(sse_application(scope, receive, send))
+        return [int(pk) for pk in re.findall(r'^id: (\d+)$', ''.join(bodies), re.M)]
+
+    def test_stream_delivers_late_committed_event(self):
+        broker = InProcessBroker()
+        first = broker.publish(self.seller.pk, 'message', {'text': 'Первое'})
+        # Строку с меньшим id закоммитили позже — опрос БД отдаёт её после first
+        late = {'id': first['id'] - 1, 'type': 'message', 'data': {'text': 'Позднее'}}
+
+        ids = self.stream(broker, '', lambda: broker.dispatch(self.seller.pk, late))
+        self.assertEqual(ids, [late['id']])
+
+    def test_stream_does_not_repeat_backlog(self):
+        broker = InProcessBroker()
+        first = broker.publish(self.seller.pk, 'message', {'text': 'Первое'})
+
+        def on_open():
+            broker.dispatch(self.seller.pk, first)
+            broker.publish(self.seller.pk, 'message', {'text': 'Второе'})
+
+        ids = self.stream(broker, 0, on_open)
+        self.assertEqual(ids, [first['id'], first['id'] + 1])
+
+    @override_settings(EVENTS_POLL_TIMEOUT=0.1)
+    def test_poll_timeout_must_be_finite(self):
+        token = Token.objects.create(user=self.seller)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        for value in ('nan', 'inf', '-inf'):
+            with self.subTest(timeout=value):
+                response = self.client.get('/api/my/events/poll/', {'timeout': value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['events'], [])
+
+    def test_ticket_requires_authentication(self):
+        self.assertEqual(self.client.post('/api/my/events/ticket/').status_code, 401)
+        self.client.force_authenticate(self.seller)
+        self.assertIn('ticket', self.client.post('/api/my/events/ticket/').json())
+
+
+class FetchImageTests(TestCase):
+    def resolve(self, *addresses):
+        return mock.patch('socket.getaddrinfo', side_effect=[
+            [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 80)) for address in addresses],
+            # Второй ответ DNS (rebinding) не должен использоваться
+            [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 80))],
+        ])
+
+    def test_connects_to_the_checked_address(self):
+        with self.resolve('93.184.216.34') as getaddrinfo, \
+                mock.patch('socket.create_connection', side_effect=OSError('offline')) as connect:
+            with self.assertRaises(RowError):
+                fetch_image('http://images.example/photo.jpg')
+        self.assertEqual(getaddrinfo.call_count, 1)
+        self.assertEqual(connect.call_args.args[0], ('93.184.216.34', 80))
+
+    def test_internal_address_is_rejected(self):
+        for addresses in [('10.0.0.5',), ('93.184.216.34', '127.0.0.1')]:
+            with self.subTest(addresses=addresses), self.resolve(*addresses), \
+                    mock.patch('socket.create_connection') as connect:
+                with self.assertRaisesMessage(RowError, 'внутреннюю сеть'):
+                    fetch_image('http://images.example/photo.jpg')
+                connect.assert_not_called()
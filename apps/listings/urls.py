@@ -1,30 +1,54 @@
 from django.urls import path
+from .streams import EventTicketView, event_stream, event_poll
 from .views import (
-    ListingListView, ListingCreateView, ListingDetailView,
+    ListingListView, ListingFacetsView, ListingSuggestView, ListingCreateView, ListingDetailView,
     MyListingsView, FavoriteToggleView, FavoritesListView,
     MessageCreateView, MyMessagesView, SellerListingsView,
     ArchiveListingView, MyWarningsView,
     AdminListingListView, AdminDeleteListingView,
     AdminMessagesView, AdminUsersView, AdminSendWarningView, AdminWarningListView,
+    AdminBulkDeleteListingsView, AdminBulkWarnView, AdminMessagesExportView, AdminUsersExportView, AdminWarningsExportView,
+    AdminCacheStatsView, AdminMetricsView,
+    ListingImportView, ListingImportJobView, ListingExportView,
+    ConversationListView, ConversationMessagesView, MarkConversationsReadView, UnreadCountView,
 )
 
 urlpatterns = [
     path('listings/', ListingListView.as_view(), name='listing-list'),
+    path('listings/facets/', ListingFacetsView.as_view(), name='listing-facets'),
+    path('listings/suggest/', ListingSuggestView.as_view(), name='listing-suggest'),
     path('listings/create/', ListingCreateView.as_view(), name='listing-create'),
     path('listings/<int:pk>/', ListingDetailView.as_view(), name='listing-detail'),
     path('listings/<int:pk>/favorite/', FavoriteToggleView.as_view(), name='favorite-toggle'),
     path('listings/<int:pk>/archive/', ArchiveListingView.as_view(), name='listing-archive'),
     path('my/listings/', MyListingsView.as_view(), name='my-listings'),
+    path('my/listings/import/', ListingImportView.as_view(), name='my-listings-import'),
+    path('my/listings/export/', ListingExportView.as_view(), name='my-listings-export'),
+    path('my/imports/<int:pk>/', ListingImportJobView.as_view(), name='my-import-job'),
     path('my/favorites/', FavoritesListView.as_view(), name='my-favorites'),
     path('my/messages/', MyMessagesView.as_view(), name='my-messages'),
+    path('my/conversations/', ConversationListView.as_view(), name='my-conversations'),
+    path('my/conversations/unread/', UnreadCountView.as_view(), name='my-conversations-unread'),
+    path('my/conversations/read/', MarkConversationsReadView.as_view(), name='my-conversations-read'),
+    path('conversations/<int:pk>/messages/', ConversationMessagesView.as_view(), name='conversation-messages'),
+    path('my/events/', event_stream, name='my-events'),
+    path('my/events/poll/', event_poll, name='my-events-poll'),
+    path('my/events/ticket/', EventTicketView.as_view(), name='my-events-ticket'),
     path('my/warnings/', MyWarningsView.as_view(), name='my-warnings'),
     path('messages/', MessageCreateView.as_view(), name='message-create'),
     path('sellers/<int:seller_id>/listings/', SellerListingsView.as_view(), name='seller-listings'),
     # Admin endpoints
     path('admin/listings/', AdminListingListView.as_view(), name='admin-listings'),
+    path('admin/listings/bulk-delete/', AdminBulkDeleteListingsView.as_view(), name='admin-bulk-delete-listings'),
     path('admin/listings/<int:pk>/delete/', AdminDeleteListingView.as_view(), name='admin-delete-listing'),
     path('admin/messages/', AdminMessagesView.as_view(), name='admin-messages'),
+    path('admin/messages/export/', AdminMessagesExportView.as_view(), name='admin-messages-export'),
     path('admin/users/', AdminUsersView.as_view(), name='admin-users'),
+    path('admin/users/export/', AdminUsersExportView.as_view(), name='admin-users-export'),
+    path('admin/users/bulk-warn/', AdminBulkWarnView.as_view(), name='admin-bulk-warn'),
     path('admin/users/<int:user_id>/warn/', AdminSendWarningView.as_view(), name='admin-warn'),
     path('admin/warnings/', AdminWarningListView.as_view(), name='admin-warnings'),
+    path('admin/warnings/export/', AdminWarningsExportView.as_view(), name='admin-warnings-export'),
+    path('admin/cache-stats/', AdminCacheStatsView.as_view(), name='admin-cache-stats'),
+    path('admin/metrics/', AdminMetricsView.as_view(), name='admin-metrics'),
 ]
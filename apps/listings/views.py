@@ -1,12 +1,37 @@
-from rest_framework import generics, status, permissions, filters
+import zipfile
+
+from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django_filters import FilterSet, NumberFilter, CharFilter
-from django.db.models import F
-from .models import Listing, Favorite, Message, UserWarning
-from .serializers import ListingListSerializer, ListingDetailSerializer, MessageSerializer, WarningSerializer
+from django_filters import FilterSet, NumberFilter, CharFilter, DateTimeFilter, utils as filter_utils
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, PositiveIntegerField, Q, Sum, When
+from django.shortcuts import get_object_or_404
+from .models import Listing, Favorite, Message, UserWarning, Conversation, ListingImportJob
+from .serializers import (
+    ListingListSerializer, ListingDetailSerializer, MessageSerializer, WarningSerializer,
+    ConversationSerializer, ListingImportJobSerializer,
+)
+from .bulk import EXPORT_COLUMNS, detect_format, export_rows
+from .moderation import moderate
+from .tasks import schedule_import
+from .search import ListingSearchFilter, RelevanceOrderingFilter
+from .suggest import TOP_SIZE as SUGGEST_TOP_SIZE, suggestion_index
+from .pagination import FeedPagination
+from .counters import view_counter, get_viewer_key
+from .facets import compute_facets
+from .feed import FastFeedMixin
 from apps.users.models import User
+from apps.categories.tree import get_category_path, get_category_version, get_tree_version
+from apps.cities.filters import CityFilter
+from marketplace import metrics, response_cache
+from marketplace.conditional import ConditionalGetMixin, make_etag
+from marketplace.exports import FORMATS, streaming_export
+from marketplace.fieldsets import SparseFieldsetViewMixin
+from marketplace.renderers import FEED_RENDERER_CLASSES
+from marketplace.response_cache import AnonymousResponseCacheMixin
 from apps.users.serializers import UserSerializer
 
 
@@ -17,22 +42,85 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.seller == request.user
 
 
+class FavoriteStateMixin:
+    """
+    Определяет «в избранном» для всей страницы одним запросом и передаёт
+    множество id в сериализатор (вместо exists() на каждое объявление).
+    """
+    all_favorites = False
+
+    def get_serializer(self, *args, **kwargs):
+        if args and kwargs.get('many'):
+            kwargs.setdefault('context', self.get_serializer_context())
+            kwargs['context']['favorite_ids'] = self.get_favorite_ids(args[0])
+        return super().get_serializer(*args, **kwargs)
+
+    def get_favorite_ids(self, listings):
+        return self.favorite_ids_for([listing.pk for listing in listings])
+
+    def favorite_ids_for(self, ids):
+        user = self.request.user
+        if not user.is_authenticated:
+            return set()
+        if self.all_favorites:
+            return set(ids)
+        return set(Favorite.objects.filter(
+            user=user, listing_id__in=ids
+        ).values_list('listing_id', flat=True))
+
+
 class ListingFilter(FilterSet):
     min_price = NumberFilter(field_name='price', lookup_expr='gte')
     max_price = NumberFilter(field_name='price', lookup_expr='lte')
-    city = CharFilter(field_name='city', lookup_expr='icontains')
-    category = NumberFilter(field_name='category__id')
+    city = CityFilter()
+    category = NumberFilter(method='filter_category')
     condition = CharFilter(field_name='condition')
 
     class Meta:
         model = Listing
         fields = ['min_price', 'max_price', 'city', 'category', 'condition', 'status']
 
-
-class ListingListView(generics.ListAPIView):
+    def filter_category(self, queryset, name, value):
+        """Категория вместе со всеми подкатегориями (по материализованному пути)"""
+        path = get_category_path(int(value))
+        if path is None:
+            return queryset.none()
+        return queryset.filter(category__path__startswith=path)
+
+
+class FeedValidatorsMixin(ConditionalGetMixin):
+    """
+    Слабый ETag ленты: версия дерева категорий, состояние избранного пользователя
+    и версия объявлений. Если кэш ответов общий для воркеров, версия объявлений —
+    его поколение 'listings' (его двигают изменения объявлений и продавцов и сброс
+    просмотров), без запросов. Иначе поколение в памяти процесса не знает об
+    изменениях в других воркерах, и версия — агрегат отфильтрованной выборки:
+    число строк, max(updated_at) объявлений и продавцов и сумма просмотров.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        if response_cache.is_enabled():
+            parts = [response_cache.get_generation('listings')]
+        else:
+            state = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+                total=Count('pk'), updated=Max('updated_at'), sellers=Max('seller__updated_at'),
+                views=Sum('views_count'),
+            )
+            parts = [state['total'], state['updated'], state['sellers'], state['views']]
+        parts.append(get_tree_version())
+        if request.user.is_authenticated:
+            favorites = Favorite.objects.filter(user=request.user).aggregate(total=Count('pk'), last=Max('created_at'))
+            parts += [request.user.pk, favorites['total'], favorites['last']]
+        return make_etag(request, *parts, weak=True), None
+
+
+class ListingListView(AnonymousResponseCacheMixin, FeedValidatorsMixin, SparseFieldsetViewMixin, FastFeedMixin,
+                      FavoriteStateMixin, generics.ListAPIView):
     serializer_class = ListingListSerializer
+    pagination_class = FeedPagination
+    renderer_classes = FEED_RENDERER_CLASSES
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ListingSearchFilter, RelevanceOrderingFilter]
     filterset_class = ListingFilter
     search_fields = ['title', 'description', 'city']
     ordering_fields = ['price', 'created_at', 'views_count']
@@ -41,6 +129,69 @@ class ListingListView(generics.ListAPIView):
     def get_queryset(self):
         return Listing.objects.filter(status='active').select_related('seller', 'category').prefetch_related('images')
 
+    def list(self, request, *args, **kwargs):
+        response = self.cached_response(request, super().list, *args, **kwargs)
+        self.record_search(request, response)
+        return response
+
+    def record_search(self, request, response):
+        # Первая страница поиска, который что-то нашёл, поднимает запрос в подсказках
+        query = request.query_params.get('search', '')
+        if not query or {'page', 'cursor'} & set(request.query_params) or response.status_code != 200:
+            return
+        if response.data.get('results'):
+            suggestion_index.record_query(query)
+
+
+class ListingSuggestView(APIView):
+    """Подсказки поисковой строки: ?q=ipho&limit=8 — фразы из заголовков и популярных запросов"""
+    permission_classes = [permissions.AllowAny]
+    # Запрос на каждое нажатие клавиши: без проверки токена и без БД
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), SUGGEST_TOP_SIZE)
+        except ValueError:
+            return Response({'error': 'limit должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+        suggestions = suggestion_index.suggest(request.query_params.get('q', ''), limit)
+        return Response(suggestions, headers={'Cache-Control': 'public, max-age=60'})
+
+
+class ListingFacetsView(generics.GenericAPIView):
+    """
+    Счётчики для фильтров ленты: категории (с подкатегориями), состояние,
+    города и гистограмма цен. Параметры — те же, что у ListingListView.
+    Ответ не зависит от пользователя и кэшируется для всех по нормализованному запросу.
+    """
+    permission_classes = [permissions.AllowAny]
+    search_fields = ListingListView.search_fields
+
+    def get(self, request):
+        filterset = ListingFilter(request.query_params, queryset=Listing.objects.none(), request=request)
+        if not filterset.is_valid():
+            raise filter_utils.translate_validation(filterset.errors)
+
+        cache = response_cache.get_cache() if response_cache.is_enabled() else None
+        key = response_cache.make_key('listings', request)
+        data = cache.get(key) if cache is not None else None
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        base = ListingSearchFilter().filter_queryset(request, Listing.objects.filter(status='active'), self)
+
+        def filtered(skip):
+            params = request.query_params.copy()
+            for name in skip:
+                params.pop(name, None)
+            return ListingFilter(params, queryset=base, request=request).qs
+
+        data = compute_facets(filtered)
+        if cache is None:
+            return Response(data)
+        cache.set(key, data, response_cache.get_timeout())
+        return Response(data, headers={'X-Cache': 'MISS'})
+
 
 class ListingCreateView(generics.CreateAPIView):
     serializer_class = ListingDetailSerializer
@@ -51,19 +202,52 @@ class ListingCreateView(generics.CreateAPIView):
         return ctx
 
 
-class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ListingDetailView(AnonymousResponseCacheMixin, ConditionalGetMixin, SparseFieldsetViewMixin,
+                        generics.RetrieveUpdateDestroyAPIView):
     queryset = Listing.objects.all()
     serializer_class = ListingDetailSerializer
 
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Строгий ETag одним запросом без связанных строк: updated_at объявления
+        (фото его тоже обновляют) и продавца, сброшенные просмотры, версия
+        категории, «в избранном».
+        """
+        row = Listing.objects.filter(pk=kwargs['pk']).values(
+            'updated_at', 'views_count', 'category_id', seller_updated_at=F('seller__updated_at'),
+        ).first()
+        if row is None:
+            return None
+        parts = [kwargs['pk'], row['updated_at'], row['seller_updated_at'], row['views_count'],
+                 get_category_version(row['category_id'])]
+        last_modified = max(row['updated_at'], row['seller_updated_at'])
+        if request.user.is_authenticated:
+            parts += [request.user.pk, Favorite.objects.filter(user=request.user, listing_id=kwargs['pk']).exists()]
+            # Добавление в избранное не двигает updated_at — только ETag
+            last_modified = None
+        return make_etag(request, *parts), last_modified
+
+    def on_not_modified(self, request, *args, **kwargs):
+        view_counter.hit(kwargs['pk'], get_viewer_key(request))
+
     def get_permissions(self):
         if self.request.method == 'GET':
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated(), IsOwnerOrReadOnly()]
 
     def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, self.retrieve_fresh, *args, **kwargs)
+
+    def on_cache_hit(self, request, data, *args, **kwargs):
+        # Ответ из кэша, но просмотр всё равно засчитываем
+        view_counter.hit(data['id'], get_viewer_key(request))
+
+    def retrieve_fresh(self, request, *args, **kwargs):
         instance = self.get_object()
-        Listing.objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
-        instance.refresh_from_db()
+        # Сохранённые просмотры + ещё не сброшенные в БД
+        hits = view_counter.hit(instance.pk, get_viewer_key(request))
+        if 'views_count' not in instance.get_deferred_fields():
+            instance.views_count += hits
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -73,11 +257,12 @@ class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
         return ctx
 
 
-class MyListingsView(generics.ListAPIView):
+class MyListingsView(SparseFieldsetViewMixin, FastFeedMixin, FavoriteStateMixin, generics.ListAPIView):
     serializer_class = ListingListSerializer
+    renderer_classes = FEED_RENDERER_CLASSES
 
     def get_queryset(self):
-        return Listing.objects.filter(seller=self.request.user).select_related('category').prefetch_related('images')
+        return Listing.objects.filter(seller=self.request.user).select_related('seller', 'category').prefetch_related('images')
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -85,6 +270,46 @@ class MyListingsView(generics.ListAPIView):
         return ctx
 
 
+class ListingImportView(APIView):
+    """Массовая загрузка: file — CSV/JSONL, images — необязательный ZIP с фото. Выполняется в фоне"""
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        source = request.FILES.get('file')
+        if not source:
+            return Response({'error': 'Файл не найден'}, status=status.HTTP_400_BAD_REQUEST)
+        if detect_format(source.name) is None:
+            return Response({'error': 'Поддерживаются файлы .csv и .jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+        archive = request.FILES.get('images')
+        if archive and not zipfile.is_zipfile(archive):
+            return Response({'error': 'Фото нужно загрузить ZIP-архивом'}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = ListingImportJob.objects.create(seller=request.user, source=source, images_archive=archive)
+        schedule_import(job.pk)
+        return Response(ListingImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ListingImportJobView(generics.RetrieveAPIView):
+    """Прогресс и ошибки импорта"""
+    serializer_class = ListingImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ListingImportJob.objects.filter(seller=self.request.user)
+
+
+class ListingExportView(APIView):
+    """Потоковая выгрузка своих объявлений: ?output=csv|jsonl"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in FORMATS:
+            return Response({'error': 'Формат: csv или jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+        return streaming_export(request, export_rows(request.user, request), EXPORT_COLUMNS, fmt, 'listings')
+
+
 class ArchiveListingView(APIView):
     """Пользователь удаляет своё объявление с указанием причины"""
     permission_classes = [permissions.IsAuthenticated]
@@ -119,8 +344,10 @@ class FavoriteToggleView(APIView):
         return Response({'status': 'added'})
 
 
-class FavoritesListView(generics.ListAPIView):
+class FavoritesListView(SparseFieldsetViewMixin, FastFeedMixin, FavoriteStateMixin, generics.ListAPIView):
     serializer_class = ListingListSerializer
+    renderer_classes = FEED_RENDERER_CLASSES
+    all_favorites = True
 
     def get_queryset(self):
         listing_ids = Favorite.objects.filter(
@@ -143,24 +370,113 @@ class MessageCreateView(generics.CreateAPIView):
         return ctx
 
 
-class MyMessagesView(generics.ListAPIView):
+class MyMessagesView(SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = MessageSerializer
+    pagination_class = FeedPagination
+    renderer_classes = FEED_RENDERER_CLASSES
 
     def get_queryset(self):
         return Message.objects.filter(
             recipient=self.request.user
-        ).select_related('sender', 'listing')
+        ).select_related('sender', 'recipient', 'listing')
+
+
+class ConversationListView(generics.ListAPIView):
+    """Входящие: по строке на переписку, свежие сверху"""
+    serializer_class = ConversationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        return Conversation.objects.filter(
+            Q(buyer=user) | Q(seller=user)
+        ).select_related('listing', 'buyer', 'seller', 'last_message').order_by('-last_message_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['unread_total'] = unread_total(request.user)
+        return response
+
+
+def unread_total(user):
+    """Сумма непрочитанных по всем перепискам пользователя одним запросом"""
+    totals = Conversation.objects.filter(Q(buyer=user) | Q(seller=user)).aggregate(
+        total=Sum(Case(
+            When(buyer=user, then=F('buyer_unread')),
+            default=F('seller_unread'),
+        ))
+    )
+    return totals['total'] or 0
 
 
-class SellerListingsView(generics.ListAPIView):
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_total': unread_total(request.user)})
+
+
+class ConversationMessagesView(SparseFieldsetViewMixin, generics.ListAPIView):
+    """Сообщения одной переписки (только для её участников)"""
+    serializer_class = MessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
+    renderer_classes = FEED_RENDERER_CLASSES
+
+    def get_queryset(self):
+        user = self.request.user
+        conversation = get_object_or_404(
+            Conversation.objects.filter(Q(buyer=user) | Q(seller=user)), pk=self.kwargs['pk']
+        )
+        return conversation.messages.select_related('sender', 'recipient', 'listing')
+
+
+class MarkConversationsReadView(APIView):
+    """
+    Отмечает переписки прочитанными: {"conversations": [id, ...]} или все сразу.
+    Сообщения и счётчики обновляются двумя UPDATE без выборки строк.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        ids = request.data.get('conversations')
+        if ids is not None and (
+            not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)
+        ):
+            return Response({'error': 'conversations должен быть списком id'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        conversations = Conversation.objects.filter(Q(buyer=user) | Q(seller=user))
+        messages = Message.objects.filter(recipient=user, is_read=False)
+        if ids is not None:
+            conversations = conversations.filter(pk__in=ids)
+            messages = messages.filter(conversation__in=ids)
+
+        with transaction.atomic():
+            marked = messages.update(is_read=True)
+            conversations.update(
+                buyer_unread=Case(When(buyer=user, then=0), default=F('buyer_unread'),
+                                  output_field=PositiveIntegerField()),
+                seller_unread=Case(When(seller=user, then=0), default=F('seller_unread'),
+                                   output_field=PositiveIntegerField()),
+            )
+        return Response({'status': 'ok', 'marked': marked, 'unread_total': unread_total(user)})
+
+
+class SellerListingsView(FeedValidatorsMixin, SparseFieldsetViewMixin, FastFeedMixin, FavoriteStateMixin,
+                         generics.ListAPIView):
     serializer_class = ListingListSerializer
+    pagination_class = FeedPagination
+    renderer_classes = FEED_RENDERER_CLASSES
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
         seller_id = self.kwargs['seller_id']
         return Listing.objects.filter(
             seller_id=seller_id, status='active'
-        ).select_related('category').prefetch_related('images')
+        ).select_related('seller', 'category').prefetch_related('images')
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -175,11 +491,11 @@ class IsAdminUser(permissions.BasePermission):
         return request.user and request.user.is_authenticated and (request.user.is_staff or request.user.is_superuser)
 
 
-class AdminListingListView(generics.ListAPIView):
+class AdminListingListView(FavoriteStateMixin, generics.ListAPIView):
     """Админ видит все объявления"""
     serializer_class = ListingListSerializer
     permission_classes = [IsAdminUser]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ListingSearchFilter, RelevanceOrderingFilter]
     filterset_class = ListingFilter
     search_fields = ['title', 'description', 'city', 'seller__username']
     ordering = ['-created_at']
@@ -209,19 +525,147 @@ class AdminDeleteListingView(APIView):
         return Response({'status': 'ok', 'message': 'Объявление удалено'})
 
 
+def _id_list(value):
+    return isinstance(value, list) and all(isinstance(i, int) and not isinstance(i, bool) for i in value)
+
+
+class AdminBulkDeleteListingsView(APIView):
+    """
+    Массовое удаление объявлений: {"ids": [...]} или {"filter": {...}} в терминах
+    ListingFilter. С "warn": "<причина>" продавцы получают предупреждение,
+    с "cascade": true (только вместе с "warn") удаляются и все их активные объявления.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+        reason = (request.data.get('warn') or '').strip()
+        cascade = request.data.get('cascade', False)
+        if (ids is None) == (filters is None):
+            return Response({'error': 'Укажите ids или filter'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(cascade, bool):
+            return Response({'error': 'cascade должен быть true или false'}, status=status.HTTP_400_BAD_REQUEST)
+        if cascade and not reason:
+            # Каскад применяется к предупреждённым продавцам — без warn их нет
+            return Response({'error': 'cascade работает только вместе с warn'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if ids is not None:
+            if not _id_list(ids) or not ids:
+                return Response({'error': 'ids должен быть непустым списком id'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            listings = Listing.objects.filter(pk__in=ids)
+        else:
+            if not isinstance(filters, dict) or not filters:
+                return Response({'error': 'filter должен быть непустым объектом'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            unknown = set(filters) - set(ListingFilter.base_filters)
+            if unknown:
+                return Response({'error': f'Неизвестные фильтры: {", ".join(sorted(unknown))}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            filterset = ListingFilter(data=filters, queryset=Listing.objects.all())
+            if not filterset.is_valid():
+                raise filter_utils.translate_validation(filterset.errors)
+            listings = filterset.qs
+
+        summary = moderate(request.user, listings, reason=reason, cascade=cascade)
+        return Response({'status': 'ok', **summary})
+
+
+class AdminBulkWarnView(APIView):
+    """
+    Предупреждение сразу нескольким пользователям: {"users": [...], "reason": "..."};
+    с "cascade": true удаляются все их активные объявления
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        user_ids = request.data.get('users')
+        reason = (request.data.get('reason') or '').strip()
+        cascade = request.data.get('cascade', False)
+        if not _id_list(user_ids) or not user_ids:
+            return Response({'error': 'users должен быть непустым списком id'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not reason:
+            return Response({'error': 'Укажите причину'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(cascade, bool):
+            return Response({'error': 'cascade должен быть true или false'}, status=status.HTTP_400_BAD_REQUEST)
+
+        existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        summary = moderate(request.user, user_ids=existing, reason=reason, cascade=cascade)
+        return Response({'status': 'ok', 'not_found': sorted(set(user_ids) - existing), **summary})
+
+
+class AdminExportMixin:
+    """
+    GET ?output=csv|jsonl — вся выборка списка с теми же фильтрами, потоком и
+    без пагинации. export_fields: колонка → путь для .values()
+    """
+    export_fields = {}
+    export_name = None
+    export_chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in FORMATS:
+            return Response({'error': 'Формат: csv или jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(
+            *[column for column, path in self.export_fields.items() if column == path],
+            **{column: F(path) for column, path in self.export_fields.items() if column != path},
+        ).iterator(chunk_size=self.export_chunk_size)
+        return streaming_export(request, rows, list(self.export_fields), fmt, self.export_name)
+
+
+class AdminMessageFilter(FilterSet):
+    created_after = DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = DateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Message
+        fields = ['sender', 'recipient', 'listing', 'conversation', 'is_read', 'created_after', 'created_before']
+
+
 class AdminMessagesView(generics.ListAPIView):
     """Админ видит все сообщения"""
     serializer_class = MessageSerializer
+    pagination_class = FeedPagination
     permission_classes = [IsAdminUser]
+    filterset_class = AdminMessageFilter
+    search_fields = ['text']
 
     def get_queryset(self):
         return Message.objects.all().select_related('sender', 'recipient', 'listing').order_by('-created_at')
 
 
+class AdminMessagesExportView(AdminExportMixin, AdminMessagesView):
+    export_name = 'messages'
+    export_fields = {
+        'id': 'id', 'created_at': 'created_at',
+        'sender_id': 'sender_id', 'sender_name': 'sender__username',
+        'recipient_id': 'recipient_id', 'recipient_name': 'recipient__username',
+        'listing_id': 'listing_id', 'listing_title': 'listing__title',
+        'conversation_id': 'conversation_id', 'is_read': 'is_read', 'text': 'text',
+    }
+
+
+class AdminUserFilter(FilterSet):
+    city = CityFilter()
+    joined_after = DateTimeFilter(field_name='date_joined', lookup_expr='gte')
+    joined_before = DateTimeFilter(field_name='date_joined', lookup_expr='lt')
+
+    class Meta:
+        model = User
+        fields = ['is_active', 'is_staff', 'city', 'joined_after', 'joined_before']
+
+
 class AdminUsersView(generics.ListAPIView):
     """Админ видит всех пользователей"""
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
+    filterset_class = AdminUserFilter
+    search_fields = ['username', 'email', 'first_name', 'last_name', 'phone']
 
     def get_queryset(self):
         return User.objects.all().order_by('-date_joined')
@@ -232,6 +676,16 @@ class AdminUsersView(generics.ListAPIView):
         return ctx
 
 
+class AdminUsersExportView(AdminExportMixin, AdminUsersView):
+    export_name = 'users'
+    export_fields = {
+        column: column for column in [
+            'id', 'username', 'email', 'first_name', 'last_name', 'phone', 'city',
+            'rating', 'reviews_count', 'is_active', 'is_staff', 'date_joined', 'last_login',
+        ]
+    }
+
+
 class AdminSendWarningView(APIView):
     """Админ отправляет предупреждение пользователю"""
     permission_classes = [IsAdminUser]
@@ -250,18 +704,59 @@ class AdminSendWarningView(APIView):
         return Response({'status': 'ok', 'message': f'Предупреждение отправлено пользователю {user.username}'})
 
 
+class AdminWarningFilter(FilterSet):
+    created_after = DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = DateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = UserWarning
+        fields = ['user', 'admin', 'created_after', 'created_before']
+
+
 class AdminWarningListView(generics.ListAPIView):
     """Список всех предупреждений"""
     serializer_class = WarningSerializer
     permission_classes = [IsAdminUser]
+    filterset_class = AdminWarningFilter
+    search_fields = ['reason', 'user__username']
 
     def get_queryset(self):
         return UserWarning.objects.all().select_related('user', 'admin')
 
 
+class AdminWarningsExportView(AdminExportMixin, AdminWarningListView):
+    export_name = 'warnings'
+    export_fields = {
+        'id': 'id', 'created_at': 'created_at',
+        'user_id': 'user_id', 'user_name': 'user__username',
+        'admin_id': 'admin_id', 'admin_name': 'admin__username',
+        'reason': 'reason',
+    }
+
+
 class MyWarningsView(generics.ListAPIView):
     """Предупреждения текущего пользователя"""
     serializer_class = WarningSerializer
 
     def get_queryset(self):
         return UserWarning.objects.filter(user=self.request.user)
+
+
+class AdminCacheStatsView(APIView):
+    """Статистика кэша ответов (попадания/промахи) для мониторинга"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.get_stats())
+
+
+class AdminMetricsView(APIView):
+    """Метрики запросов по эндпоинтам (текущий процесс); DELETE — сбросить"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.registry.snapshot())
+
+    def delete(self, request):
+        metrics.registry.reset()
+        return Response({'status': 'ok'})
@@ -0,0 +1,194 @@
+"""
+Аутентификация по токену без запроса к БД на каждый вызов API.
+
+CachedTokenAuthentication — замена DRF TokenAuthentication: соответствие
+токен → id пользователя и сам пользователь кэшируются в памяти процесса
+(короткий TTL) и в общем кэше 'default' (длинный TTL).
+Сброс: удаление токена (LogoutView) и любое сохранение пользователя, кроме
+обновления last_login (смена профиля, деактивация), — в памяти своего
+процесса и в общем кэше. Кэш других процессов живёт не дольше
+AUTH_LOCAL_CACHE_TIMEOUT. Если 'default' — память процесса (LocMemCache, по
+умолчанию), он не общий и сброс до других воркеров не доходит, поэтому его
+TTL тоже ограничен AUTH_LOCAL_CACHE_TIMEOUT; длинный TTL работает с общим
+бэкендом (CACHE_BACKEND — Redis, Memcached, база или файлы).
+
+SignedTokenAuthentication — подписанный токен без хранения в БД
+(заголовок «Authorization: Signed <token>»): в нём id пользователя и хэш
+пароля, поэтому смена пароля отзывает все такие токены. Отозвать один
+токен нельзя — срок жизни ограничен AUTH_SIGNED_TOKEN_MAX_AGE.
+"""
+import copy
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from marketplace.caches import is_process_local
+
+from .models import User
+
+SIGNED_TOKEN_SALT = 'apps.users.signed-token'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LocalCache:
+    """Словарь с TTL в памяти процесса"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None or item[1] < time.monotonic():
+            return None
+        return item[0]
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            if len(self._data) >= self.max_size:
+                self._data.clear()
+            self._data[key] = (value, time.monotonic() + timeout)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalCache()
+
+
+def _token_key(key):
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _shared_timeout():
+    local_timeout = _setting('AUTH_LOCAL_CACHE_TIMEOUT', 5)
+    if is_process_local('default'):
+        return local_timeout
+    return max(_setting('AUTH_CACHE_TIMEOUT', 300), local_timeout)
+
+
+def _remember(key, value):
+    local_cache.set(key, value, _setting('AUTH_LOCAL_CACHE_TIMEOUT', 5))
+    cache.set(key, value, _shared_timeout())
+
+
+def _lookup(key):
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value, _setting('AUTH_LOCAL_CACHE_TIMEOUT', 5))
+    return value
+
+
+def get_cached_user(user_id):
+    user = _lookup(_user_key(user_id))
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        _remember(_user_key(user_id), user)
+    # Экземпляр из кэша общий для потоков процесса — каждому запросу своя копия
+    return copy.copy(user)
+
+
+def resolve_token(key):
+    """Пользователь по ключу токена (None, если токена нет)"""
+    user_id = _lookup(_token_key(key))
+    if user_id is not None:
+        return get_cached_user(user_id)
+
+    token = Token.objects.select_related('user').filter(key=key).first()
+    if token is None:
+        return None
+    _remember(_token_key(key), token.user_id)
+    _remember(_user_key(token.user_id), token.user)
+    return copy.copy(token.user)
+
+
+def invalidate_token(key):
+    local_cache.delete(_token_key(key))
+    cache.delete(_token_key(key))
+
+
+def invalidate_user(user_id):
+    local_cache.delete(_user_key(user_id))
+    cache.delete(_user_key(user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = resolve_token(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Недействительный токен.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('Пользователь неактивен или удалён.')
+        return user, key
+
+
+def _password_fingerprint(user):
+    return hashlib.sha256(user.password.encode()).hexdigest()[:16]
+
+
+def issue_signed_token(user):
+    return signing.dumps({'u': user.pk, 'p': _password_fingerprint(user)}, salt=SIGNED_TOKEN_SALT, compress=True)
+
+
+def resolve_signed_token(key):
+    """Пользователь по подписанному токену (None — подпись неверна, срок истёк или пароль сменён)"""
+    try:
+        payload = signing.loads(
+            key, salt=SIGNED_TOKEN_SALT,
+            max_age=_setting('AUTH_SIGNED_TOKEN_MAX_AGE', 7 * 24 * 3600),
+        )
+    except signing.BadSignature:
+        return None
+    user = get_cached_user(payload.get('u'))
+    if user is None or not constant_time_compare(payload.get('p', ''), _password_fingerprint(user)):
+        return None
+    return user
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    keyword = 'Signed'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Некорректный заголовок авторизации.')
+
+        try:
+            user = resolve_signed_token(auth[1].decode())
+        except UnicodeDecodeError:
+            user = None
+        if user is None:
+            raise exceptions.AuthenticationFailed('Недействительный или просроченный токен.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('Пользователь неактивен или удалён.')
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,59 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.listings.management.commands.bench_api import percentile
+from apps.users.authentication import (
+    CachedTokenAuthentication, SignedTokenAuthentication, issue_signed_token, local_cache,
+)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает стоимость аутентификации одного запроса: DRF Token, кэшированный и подписанный токен'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        token = Token.objects.select_related('user').filter(user__is_active=True).first()
+        if token is None:
+            raise CommandError('Нет токенов — войдите хотя бы одним пользователем')
+        signed = issue_signed_token(token.user)
+
+        def cold():
+            local_cache.clear()
+            cache.clear()
+
+        # cold — кэши пусты, shared — прогрет только общий кэш (как после другого воркера), warm — всё прогрето
+        scenarios = [
+            ('drf_token', TokenAuthentication(), f'Token {token.key}', None),
+            ('cached_token_cold', CachedTokenAuthentication(), f'Token {token.key}', cold),
+            ('cached_token_shared', CachedTokenAuthentication(), f'Token {token.key}', local_cache.clear),
+            ('cached_token_warm', CachedTokenAuthentication(), f'Token {token.key}', None),
+            ('signed_token_warm', SignedTokenAuthentication(), f'Signed {signed}', None),
+        ]
+        factory = APIRequestFactory()
+        for name, authenticator, header, before in scenarios:
+            timings, queries = [], []
+            authenticator.authenticate(Request(factory.get('/', HTTP_AUTHORIZATION=header)))
+            for _ in range(options['iterations']):
+                if before:
+                    before()
+                request = Request(factory.get('/', HTTP_AUTHORIZATION=header))
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    user, _ = authenticator.authenticate(request)
+                    timings.append((time.perf_counter() - started) * 1_000_000)
+                queries.append(len(ctx.captured_queries))
+            assert user.pk == token.user_id
+            self.stdout.write(
+                f'{name:22} p50 {percentile(timings, 50):8.1f} мкс  p99 {percentile(timings, 99):8.1f} мкс  '
+                f'запросов к БД {sum(queries) / len(queries):.2f}'
+            )
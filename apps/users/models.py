@@ -1,15 +1,23 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from apps.cities.models import City, CityRefMixin
 
-class User(AbstractUser):
+
+class User(CityRefMixin, AbstractUser):
     phone = models.CharField(max_length=20, blank=True, verbose_name='Телефон')
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name='Аватар')
     city = models.CharField(max_length=100, blank=True, verbose_name='Город')
+    city_ref = models.ForeignKey(
+        City, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='users', verbose_name='Город (справочник)'
+    )
     bio = models.TextField(blank=True, verbose_name='О себе')
     rating = models.FloatField(default=0, verbose_name='Рейтинг')
     reviews_count = models.IntegerField(default=0, verbose_name='Кол-во отзывов')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Версия профиля для ETag; вход (save(update_fields=['last_login'])) её не меняет
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Пользователь'
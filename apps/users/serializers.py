@@ -1,10 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from marketplace.fieldsets import SparseFieldsetMixin
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     avatar_url = serializers.SerializerMethodField()
+    field_sources = {'avatar_url': ['avatar', 'username']}
+    # Что видно о продавце в ?expand= чужих объектов: без контактов и служебных флагов
+    public_fields = ['id', 'username', 'first_name', 'last_name', 'avatar_url',
+                     'city', 'rating', 'reviews_count', 'date_joined']
 
     class Meta:
         model = User
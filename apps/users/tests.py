@@ -0,0 +1,44 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from .authentication import local_cache, resolve_token
+from .models import User
+
+
+class CachedTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(username='buyer', password='pass12345')
+        self.key = Token.objects.create(user=self.user).key
+
+    def revoke_elsewhere(self):
+        # Токен удалён в другом воркере: его сигнал кэш этого процесса не сбросил
+        with mock.patch('apps.users.signals.invalidate_token'):
+            Token.objects.filter(key=self.key).delete()
+
+    def later(self, seconds):
+        now, monotonic = time.time(), time.monotonic()
+        return mock.patch.multiple(time, time=lambda: now + seconds, monotonic=lambda: monotonic + seconds)
+
+    @override_settings(AUTH_LOCAL_CACHE_TIMEOUT=5, AUTH_CACHE_TIMEOUT=300)
+    def test_process_local_cache_is_capped_to_local_timeout(self):
+        self.assertEqual(resolve_token(self.key), self.user)
+        self.revoke_elsewhere()
+        self.assertEqual(resolve_token(self.key), self.user)
+        with self.later(6):
+            self.assertIsNone(resolve_token(self.key))
+
+    @override_settings(
+        AUTH_LOCAL_CACHE_TIMEOUT=5, AUTH_CACHE_TIMEOUT=300,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'auth_test'}},
+    )
+    def test_shared_cache_keeps_long_timeout(self):
+        with mock.patch('apps.users.authentication.cache') as shared:
+            shared.get.return_value = None
+            resolve_token(self.key)
+        self.assertEqual({call.args[2] for call in shared.set.call_args_list}, {300})
@@ -3,6 +3,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from marketplace.conditional import ConditionalGetMixin, make_etag
+from marketplace.fieldsets import SparseFieldsetViewMixin
+from .authentication import issue_signed_token
 from .models import User
 from .serializers import UserSerializer, RegisterSerializer, LoginSerializer
 
@@ -19,6 +22,7 @@ class RegisterView(generics.CreateAPIView):
         token, _ = Token.objects.get_or_create(user=user)
         return Response({
             'token': token.key,
+            'signed_token': issue_signed_token(user),
             'user': UserSerializer(user, context={'request': request}).data
         }, status=status.HTTP_201_CREATED)
 
@@ -34,6 +38,7 @@ class LoginView(APIView):
         token, _ = Token.objects.get_or_create(user=user)
         return Response({
             'token': token.key,
+            'signed_token': issue_signed_token(user),
             'user': UserSerializer(user, context={'request': request}).data
         })
 
@@ -44,10 +49,14 @@ class LogoutView(APIView):
         return Response({'message': 'Вышли из системы'})
 
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class ProfileView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
+    def get_validators(self, request, *args, **kwargs):
+        user = request.user
+        return make_etag(request, user.pk, user.updated_at), user.updated_at
+
     def get_object(self):
         return self.request.user
 
@@ -106,11 +115,17 @@ class UpdateAvatarView(APIView):
         })
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     serializer_class = UserSerializer
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
 
+    def get_validators(self, request, *args, **kwargs):
+        updated_at = User.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return make_etag(request, kwargs['pk'], updated_at), updated_at
+
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx['request'] = self.request
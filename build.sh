@@ -14,6 +14,12 @@ python manage.py makemigrations listings
 # Применяем миграции к базе данных Render
 python manage.py migrate
 
+# Таблицы для кэшей в БД (CACHE_BACKEND / RESPONSE_CACHE_BACKEND = DatabaseCache)
+python manage.py createcachetable
+
+# Привязываем города объявлений и пользователей к справочнику (повторно — без изменений)
+python manage.py backfill_cities
+
 # Собираем статические файлы для WhiteNoise
 python manage.py collectstatic --no-input
 
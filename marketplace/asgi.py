@@ -0,0 +1,23 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketplace.settings')
+
+django_application = get_asgi_application()
+
+from apps.cities.index import warm_city_index  # noqa: E402  (после django.setup())
+from apps.listings.counters import start_view_flusher  # noqa: E402
+from apps.listings.suggest import warm_suggestion_index  # noqa: E402
+from apps.listings.streams import SSE_PATH, sse_application  # noqa: E402
+
+warm_city_index()
+warm_suggestion_index()
+start_view_flusher()
+
+
+async def application(scope, receive, send):
+    # SSE обслуживается без middleware Django: долгие соединения не должны держать потоки
+    if scope['type'] == 'http' and scope['path'] == SSE_PATH:
+        await sse_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
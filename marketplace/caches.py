@@ -0,0 +1,29 @@
+"""
+Общие и локальные кэши.
+
+Сигналы сбрасывают ключи кэша (поколения кэша ответов, дерево категорий) только
+в том процессе, где произошло изменение. Если бэкенд алиаса держит данные в
+памяти процесса, а воркеров несколько (WEB_CONCURRENCY), остальные воркеры о
+сбросе не узнают: такие кэши не используются или сверяются с БД.
+"""
+from django.conf import settings
+
+LOCAL_MEMORY_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+DUMMY_BACKEND = 'django.core.cache.backends.dummy.DummyCache'
+PROCESS_LOCAL_BACKENDS = {LOCAL_MEMORY_BACKEND, DUMMY_BACKEND}
+
+
+def get_backend(alias):
+    return settings.CACHES[alias]['BACKEND']
+
+
+def is_process_local(alias):
+    return get_backend(alias) in PROCESS_LOCAL_BACKENDS
+
+
+def is_shared(alias):
+    """Сброс ключа видят все воркеры: общий бэкенд или единственный процесс с кэшем в памяти"""
+    backend = get_backend(alias)
+    if backend == DUMMY_BACKEND:
+        return False
+    return backend != LOCAL_MEMORY_BACKEND or getattr(settings, 'WEB_CONCURRENCY', 1) <= 1
@@ -0,0 +1,54 @@
+"""
+Условные GET-запросы: ETag и Last-Modified.
+
+Представление описывает версию ответа в get_validators() — одним лёгким
+запросом (updated_at строки, max(updated_at) выборки) или вовсе без запросов
+(версия дерева категорий). Если If-None-Match или If-Modified-Since
+совпадают, 304 уходит до основного queryset'а и сериализатора.
+В ETag подмешиваются строка запроса и Accept: ?fields=, ?format=compact и
+Browsable API дают разные тела по одному и тому же URL.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+
+from .response_cache import normalize_query
+
+
+def make_etag(request, *parts, weak=False):
+    raw = '|'.join(map(str, [*parts, normalize_query(request.query_params), request.META.get('HTTP_ACCEPT', '')]))
+    etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest()[:32])
+    return f'W/{etag}' if weak else etag
+
+
+class ConditionalGetMixin:
+    def get_validators(self, request, *args, **kwargs):
+        """(etag, last_modified или None); None — отвечать без проверки"""
+        return None
+
+    def on_not_modified(self, request, *args, **kwargs):
+        pass
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            if response.status_code == 304:
+                self.on_not_modified(request, *args, **kwargs)
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Браузер хранит ответ, но каждый раз сверяет версию; тело зависит от пользователя
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
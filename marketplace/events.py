@@ -0,0 +1,256 @@
+"""
+Доставка событий пользователю в реальном времени (SSE и long-poll).
+
+Сигналы публикуют событие после коммита транзакции: publish(user_id, 'message', {...}).
+Брокер раздаёт его открытым подпискам получателя и держит хвост последних
+событий, чтобы переподключившийся клиент (Last-Event-ID / ?after=) ничего не
+пропустил.
+
+Брокер выбирается настройкой EVENTS_BROKER:
+- DatabaseBroker (по умолчанию) — общая шина через таблицу listings_event:
+  событие из любого воркера доходит до подписок во всех воркерах, id событий
+  общие, поэтому Last-Event-ID работает при переподключении к другому воркеру;
+- InProcessBroker — в памяти процесса, только для запуска в один воркер
+  (runserver, тесты): события других процессов он не видит.
+Интерфейс: publish / subscribe / unsubscribe / recent / latest.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Идентификаторы InProcessBroker растут и после перезапуска процесса
+_ids = itertools.count(int(time.time() * 1000))
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Subscription:
+    """Очередь событий одного соединения; наполняется из любого потока"""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать — старые события он доберёт из recent()
+            pass
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+
+class LocalSubscribers:
+    """Подписки соединений этого процесса"""
+    queue_size = 100
+    backlog_size = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def dispatch(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def connections(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class InProcessBroker(LocalSubscribers):
+    max_backlog_users = 10000
+
+    def __init__(self):
+        super().__init__()
+        self._backlog = OrderedDict()
+
+    def publish(self, user_id, type, data):
+        event = {'id': next(_ids), 'type': type, 'data': data}
+        with self._lock:
+            backlog = self._backlog.pop(user_id, None) or deque(maxlen=self.backlog_size)
+            backlog.append(event)
+            self._backlog[user_id] = backlog
+            while len(self._backlog) > self.max_backlog_users:
+                self._backlog.popitem(last=False)
+        self.dispatch(user_id, event)
+        return event
+
+    def recent(self, user_id, after):
+        with self._lock:
+            backlog = list(self._backlog.get(user_id, ()))
+        return [event for event in backlog if event['id'] > after]
+
+    def latest(self, user_id):
+        with self._lock:
+            backlog = self._backlog.get(user_id)
+            return backlog[-1]['id'] if backlog else 0
+
+
+def _as_event(row):
+    return {'id': row['id'], 'type': row['type'], 'data': row['data']}
+
+
+class DatabaseBroker(LocalSubscribers):
+    """
+    publish пишет строку (id выдаёт БД — он общий для всех процессов) и сразу
+    раздаёт событие подпискам своего процесса. Один поток на процесс, пока
+    есть подписки, раз в EVENTS_POLL_INTERVAL секунд забирает новые строки и
+    раздаёт их своим подпискам. Строки, закоммиченные не в порядке id,
+    подбираются окном EVENTS_POLL_OVERLAP секунд (уже разосланные id
+    запоминаются). Строки старше EVENTS_RETENTION удаляются.
+    """
+    prune_interval = 60
+
+    def __init__(self):
+        super().__init__()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._watermark = None
+        self._seen = {}
+        self._pruned_at = 0.0
+
+    def get_model(self):
+        return apps.get_model('listings', 'Event')
+
+    def publish(self, user_id, type, data):
+        row = self.get_model().objects.create(user_id=user_id, type=type, data=data)
+        event = {'id': row.pk, 'type': type, 'data': data}
+        with self._lock:
+            self._seen[row.pk] = time.monotonic()
+        self.dispatch(user_id, event)
+        self.prune()
+        return event
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        with self._lock:
+            # После fork поток родителя в дочернем процессе не жив — запускаем свой
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='events-poller', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return subscription
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self.connections():
+                # Подписок нет — не опрашиваем БД; при следующей начнём с окна перекрытия
+                self._watermark = None
+                connection.close()
+                self._wakeup.wait()
+                continue
+            try:
+                self.poll()
+            except Exception:
+                logger.warning('Не удалось получить события из БД', exc_info=True)
+                connection.close()
+            time.sleep(_setting('EVENTS_POLL_INTERVAL', 1))
+
+    def poll(self):
+        """Раздаёт подпискам процесса события, появившиеся в БД после прошлого опроса"""
+        overlap = _setting('EVENTS_POLL_OVERLAP', 5)
+        condition = Q(created_at__gte=timezone.now() - timedelta(seconds=overlap))
+        if self._watermark is not None:
+            condition |= Q(id__gt=self._watermark)
+        rows = list(self.get_model().objects.filter(condition).order_by('id').values('id', 'user_id', 'type', 'data'))
+
+        now = time.monotonic()
+        with self._lock:
+            fresh = [row for row in rows if row['id'] not in self._seen]
+            for row in fresh:
+                self._seen[row['id']] = now
+            # Запоминаем id не дольше, чем строку может вернуть окно перекрытия
+            self._seen = {pk: seen_at for pk, seen_at in self._seen.items() if now - seen_at < overlap * 2}
+        for row in fresh:
+            self.dispatch(row['user_id'], _as_event(row))
+        if rows:
+            self._watermark = max(self._watermark or 0, rows[-1]['id'])
+        self.prune()
+
+    def prune(self):
+        if time.monotonic() - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = time.monotonic()
+        retention = timedelta(seconds=_setting('EVENTS_RETENTION', 3600))
+        self.get_model().objects.filter(created_at__lt=timezone.now() - retention).delete()
+
+    def recent(self, user_id, after):
+        rows = self.get_model().objects.filter(user_id=user_id, id__gt=after).order_by('-id')
+        return [_as_event(row) for row in reversed(rows.values('id', 'type', 'data')[:self.backlog_size])]
+
+    def latest(self, user_id):
+        return self.get_model().objects.filter(user_id=user_id).aggregate(last=Max('id'))['last'] or 0
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(_setting('EVENTS_BROKER', 'marketplace.events.DatabaseBroker'))()
+
+
+def publish(user_id, type, data):
+    """Отправляет событие пользователю после коммита текущей транзакции"""
+
+    def send():
+        try:
+            get_broker().publish(user_id, type, data)
+        except Exception:
+            # Изменение уже закоммичено — ошибка доставки не должна ронять запрос
+            logger.warning('Событие %s для пользователя %s не опубликовано', type, user_id, exc_info=True)
+
+    transaction.on_commit(send)
+
+
+def format_sse(event):
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'id: {event["id"]}\nevent: {event["type"]}\ndata: {data}\n\n'
@@ -0,0 +1,214 @@
+"""
+Разреженные наборы полей в ответах API.
+
+?fields=id,title,seller.username — только перечисленные поля; вложенные
+сериализаторы ограничиваются через точку (seller.username, images.image_url).
+?expand=seller — добавить (или подставить вместо id) вложенный объект из
+expandable_fields сериализатора.
+
+Queryset сужается под оставшиеся поля: only() по их колонкам,
+select_related/prefetch_related — только для нужных связей. Колонки
+полей-методов сериализатор перечисляет в field_sources; если источник
+какого-то поля неизвестен, queryset остаётся как есть.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def parse_fieldset(value):
+    """'id,seller.username' → {'id': None, 'seller': {'username': None}}; None — поле целиком"""
+    if not value:
+        return None
+    tree = {}
+    for item in value.split(','):
+        parts = [part for part in item.strip().split('.') if part]
+        node = tree
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None
+            elif part in node and node[part] is None:
+                break
+            else:
+                node = node.setdefault(part, {})
+    return tree or None
+
+
+def parse_expand(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def _target(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+class SparseFieldsetMixin:
+    """
+    Примесь к ModelSerializer: аргументы fieldset (см. parse_fieldset) и expand.
+    expandable_fields: имя → функция, возвращающая вложенный сериализатор;
+    field_sources: поле-метод → пути ORM, которые оно читает.
+    """
+    expandable_fields = {}
+    field_sources = {}
+
+    def __init__(self, *args, fieldset=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in set(expand) & set(self.expandable_fields):
+            self.fields[name] = self.expandable_fields[name]()
+            if fieldset is not None:
+                fieldset.setdefault(name, None)
+        if fieldset is not None:
+            self.apply_fieldset(fieldset)
+
+    def apply_fieldset(self, fieldset):
+        for name in list(self.fields):
+            if name not in fieldset:
+                self.fields.pop(name)
+            elif fieldset[name] and isinstance(_target(self.fields[name]), SparseFieldsetMixin):
+                _target(self.fields[name]).apply_fieldset(fieldset[name])
+
+    def query_plan(self, prefix=''):
+        """(колонки для only(), пути select_related, пути prefetch_related) или None"""
+        model = self.Meta.model
+        columns, select, prefetch = set(), set(), set()
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in self.field_sources:
+                    return None
+                sources = self.field_sources[name]
+            elif field.source == '*':
+                return None
+            else:
+                sources = [field.source.replace('.', '__')]
+
+            for source in sources:
+                resolved = _resolve(model, source)
+                if resolved is None:
+                    return None
+                column, relation, many = resolved
+                if many:
+                    prefetch.add(prefix + relation)
+                    continue
+                if relation:
+                    select.add(prefix + relation)
+                if column:
+                    columns.add(prefix + column)
+
+            if isinstance(field, serializers.BaseSerializer):
+                path = field.source.replace('.', '__')
+                if prefix + path in prefetch:
+                    continue
+                nested = _target(field)
+                if isinstance(nested, SparseFieldsetMixin):
+                    plan = nested.query_plan(f'{prefix}{path}__')
+                    if plan is None:
+                        return None
+                    columns |= plan[0]
+                    select |= plan[1]
+                    prefetch |= plan[2]
+                else:
+                    # Чужой сериализатор: связанная строка нужна целиком
+                    related_model = _related_model(model, path)
+                    if related_model is None:
+                        return None
+                    columns |= {f'{prefix}{path}__{f.name}' for f in related_model._meta.concrete_fields}
+                select.add(prefix + path)
+        # Поля связей, пройденных через select_related, должны загружаться
+        for path in list(select):
+            parts = path.split('__')
+            columns |= {'__'.join(parts[:i]) for i in range(1, len(parts) + 1)}
+        return columns, select, prefetch
+
+
+def _resolve(model, path):
+    """
+    Путь ORM → (колонка для only(), путь для select_related, многозначная ли связь).
+    Для многозначной связи путь — то, что нужно передать в prefetch_related.
+    """
+    parts = path.split('__')
+    for i, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many:
+            return None, '__'.join(parts[:i + 1]), True
+        if field.is_relation and i < len(parts) - 1:
+            model = field.related_model
+            continue
+        if not field.concrete:
+            return None
+        return path, '__'.join(parts[:i]), False
+    return None
+
+
+def _related_model(model, path):
+    for part in path.split('__'):
+        try:
+            model = model._meta.get_field(part).related_model
+        except FieldDoesNotExist:
+            return None
+        if model is None:
+            return None
+    return model
+
+
+def _ordering_columns(queryset):
+    model = queryset.model
+    names = [key for key in queryset.query.order_by if isinstance(key, str)]
+    names += list(model._meta.ordering)
+    # Ключ keyset-пагинации лент — (…, created_at, id)
+    names.append('created_at')
+    columns = set()
+    for key in names:
+        name = key.lstrip('-')
+        if '__' in name or name in ('?', 'pk'):
+            continue
+        try:
+            if model._meta.get_field(name).concrete:
+                columns.add(name)
+        except FieldDoesNotExist:
+            pass
+    return columns
+
+
+def trim_queryset(queryset, serializer):
+    plan = _target(serializer).query_plan()
+    if plan is None:
+        return queryset
+    columns, select, prefetch = plan
+    columns |= _ordering_columns(queryset)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    return queryset.only(*sorted(columns))
+
+
+class SparseFieldsetViewMixin:
+    """?fields= и ?expand= для GET-запросов GenericAPIView"""
+
+    def get_fieldset_kwargs(self):
+        request = self.request
+        if request is None or request.method != 'GET':
+            return {}
+        fieldset = parse_fieldset(request.query_params.get('fields'))
+        expand = parse_expand(request.query_params.get('expand'))
+        kwargs = {}
+        if fieldset is not None:
+            kwargs['fieldset'] = fieldset
+        if expand:
+            kwargs['expand'] = expand
+        return kwargs
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fieldset_kwargs())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset_kwargs():
+            queryset = trim_queryset(queryset, self.get_serializer())
+        return queryset
@@ -0,0 +1,205 @@
+"""
+Инструментирование запросов: число SQL-запросов, время БД и сериализаторов,
+размер ответа и повторяющиеся запросы (признак N+1).
+
+Включается настройкой REQUEST_METRICS_ENABLED. Для каждого запроса добавляется
+заголовок Server-Timing, а по каждому эндпоинту (метод + класс представления)
+копится скользящая гистограмма, которую читает /api/admin/metrics/.
+Статистика живёт в памяти процесса: у каждого воркера gunicorn — своя.
+"""
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Границы корзин гистограммы, мс
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+WINDOW = 1000
+TOP_DUPLICATES = 5
+
+_current = ContextVar('request_metrics', default=None)
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+
+def fingerprint(sql):
+    """Один и тот же запрос с разным числом параметров в IN (...) считается одинаковым"""
+    return _IN_LIST.sub('(...)', sql)[:300]
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth', 'fingerprints')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.fingerprints = Counter()
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.durations = deque(maxlen=WINDOW)
+        self.queries = deque(maxlen=WINDOW)
+        self.db_times = deque(maxlen=WINDOW)
+        self.serializer_times = deque(maxlen=WINDOW)
+        self.sizes = deque(maxlen=WINDOW)
+        self.duplicates = Counter()
+        self.max_repeats = {}
+
+    def add(self, duration, stats, size):
+        self.count += 1
+        for i, edge in enumerate(BUCKETS):
+            if duration <= edge:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.durations.append(duration)
+        self.queries.append(stats.queries)
+        self.db_times.append(stats.db_time * 1000)
+        self.serializer_times.append(stats.serializer_time * 1000)
+        self.sizes.append(size)
+        for sql, repeats in stats.duplicates().items():
+            self.duplicates[sql] += 1
+            self.max_repeats[sql] = max(self.max_repeats.get(sql, 0), repeats)
+
+    def summary(self):
+        ordered = sorted(self.durations)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 2)
+
+        def mean(values):
+            return round(sum(values) / len(values), 2) if values else 0
+
+        return {
+            'count': self.count,
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'p99_ms': pct(99),
+            'mean_ms': mean(self.durations),
+            'mean_queries': mean(self.queries),
+            'mean_db_ms': mean(self.db_times),
+            'mean_serializer_ms': mean(self.serializer_times),
+            'mean_size_bytes': mean(self.sizes),
+            'histogram': {
+                **{f'le_{edge}': n for edge, n in zip(BUCKETS, self.buckets)},
+                'inf': self.buckets[-1],
+            },
+            'duplicate_queries': [
+                {'sql': sql, 'requests': n, 'max_repeats': self.max_repeats[sql]}
+                for sql, n in self.duplicates.most_common(TOP_DUPLICATES)
+            ],
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, duration, stats, size):
+        with self._lock:
+            self._endpoints.setdefault(endpoint, EndpointStats()).add(duration, stats, size)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _timed(method):
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return method(self, *args, **kwargs)
+        # Меряем только внешний сериализатор, вложенные уже входят в его время
+        stats.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stats.serializer_depth -= 1
+            if stats.serializer_depth == 0:
+                stats.serializer_time += time.perf_counter() - started
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def install_serializer_timer():
+    from rest_framework import serializers
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not hasattr(cls.to_representation, '__wrapped__'):
+            cls.to_representation = _timed(cls.to_representation)
+
+
+def get_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'view_class', None) or match.func
+    return f'{request.method} {getattr(view, "__name__", match.view_name)}'
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timer()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = (time.perf_counter() - started) * 1000
+
+        endpoint = get_endpoint(request)
+        if endpoint is None:
+            return response
+
+        size = 0 if response.streaming else len(response.content)
+        registry.record(endpoint, duration, stats, size)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'ser;dur={stats.serializer_time * 1000:.1f}',
+            f'total;dur={duration:.1f}',
+        ])
+        duplicates = stats.duplicates()
+        if duplicates:
+            response['X-Duplicate-Queries'] = str(sum(duplicates.values()) - len(duplicates))
+        return response
@@ -0,0 +1,140 @@
+"""
+Общий кэш ответов API для анонимных GET-запросов.
+
+Ключ — пространство имён, его поколение, путь и нормализованная строка запроса
+(параметры отсортированы, page=1 отброшен). Пустые значения остаются в ключе:
+?cursor= включает keyset-режим, и такой ответ не совпадает с обычной лентой.
+Кэшируются данные ответа до рендеринга, поэтому повторный запрос не трогает
+БД и сериализаторы.
+
+Инвалидация — по TTL и по событиям: bump('listings') увеличивает поколение,
+и все старые ключи пространства перестают находиться. Поколение начинается с
+метки времени, поэтому после вытеснения ключа или очистки кэша номера не
+повторяются — на этом держатся и ETag лент. Бэкенд — алиас 'responses' из
+CACHES. bump() меняет поколение только в этом бэкенде: в памяти процесса
+(LocMemCache) его не увидят другие воркеры и будут отдавать старые ответы.
+Поэтому при нескольких воркерах (WEB_CONCURRENCY > 1) кэш ответов работает
+только с общим бэкендом (база, Redis), а с локальным отключается.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .caches import is_shared
+
+CACHE_ALIAS = 'responses'
+NAMESPACES = ('listings', 'categories')
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def is_enabled():
+    return is_shared(CACHE_ALIAS)
+
+
+def get_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+
+
+def normalize_query(query_params):
+    items = []
+    for key in sorted(query_params):
+        for value in sorted(query_params.getlist(key)):
+            if key == 'page' and value == '1':
+                continue
+            items.append((key, value))
+    return urlencode(items)
+
+
+def _first_generation():
+    return time.time_ns() // 1000
+
+
+def get_generation(namespace):
+    cache = get_cache()
+    key = f'resp:gen:{namespace}'
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _first_generation(), timeout=None)
+        generation = cache.get(key, 0)
+    return generation
+
+
+def bump(*namespaces):
+    """Сбрасывает кэш пространств имён (ключи старого поколения больше не читаются)"""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = f'resp:gen:{namespace}'
+        cache.add(key, _first_generation(), timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _first_generation(), timeout=None)
+
+
+def make_key(namespace, request):
+    digest = hashlib.sha1(
+        f'{request.path}?{normalize_query(request.query_params)}'.encode()
+    ).hexdigest()
+    return f'resp:{namespace}:{get_generation(namespace)}:{digest}'
+
+
+def _count(namespace, outcome):
+    cache = get_cache()
+    key = f'resp:stats:{namespace}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    stats = {}
+    for namespace in NAMESPACES:
+        hits = cache.get(f'resp:stats:{namespace}:hit', 0)
+        misses = cache.get(f'resp:stats:{namespace}:miss', 0)
+        total = hits + misses
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else None,
+            'generation': get_generation(namespace),
+        }
+    return stats
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Кэширует ответы list/retrieve для неавторизованных пользователей.
+    on_cache_hit() вызывается при попадании — например, чтобы всё равно засчитать просмотр.
+    """
+    cache_namespace = 'listings'
+
+    def cached_response(self, request, build, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated or not is_enabled():
+            return build(request, *args, **kwargs)
+
+        key = make_key(self.cache_namespace, request)
+        data = get_cache().get(key)
+        if data is not None:
+            _count(self.cache_namespace, 'hit')
+            self.on_cache_hit(request, data, *args, **kwargs)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _count(self.cache_namespace, 'miss')
+        response = build(request, *args, **kwargs)
+        if response.status_code == 200:
+            get_cache().set(key, response.data, get_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def on_cache_hit(self, request, data, *args, **kwargs):
+        pass
@@ -24,10 +24,12 @@ INSTALLED_APPS = [
     'django_filters',
     'apps.users',
     'apps.categories',
+    'apps.cities',
     'apps.listings',
 ]
 
 MIDDLEWARE = [
+    'marketplace.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -58,6 +60,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'marketplace.wsgi.application'
+ASGI_APPLICATION = 'marketplace.asgi.application'
 
 DATABASE_URL = config('DATABASE_URL', default=None)
 if DATABASE_URL:
@@ -90,15 +93,63 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# В STATIC_ROOT остаются только файлы с хешем в имени: их WhiteNoise отдаёт с вечным кэшем
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Число воркеров gunicorn: он сам берёт --workers из этой переменной. По нему
+# видно, можно ли полагаться на кэши в памяти процесса (marketplace/caches.py)
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# При WEB_CONCURRENCY > 1 оба кэша должны быть общими (база — DatabaseCache и
+# python manage.py createcachetable, или Redis): сброс в LocMemCache доходит
+# только до своего воркера. С локальным бэкендом кэш ответов отключается, а
+# дерево категорий сверяется с БД на каждом запросе.
+CACHES = {
+    # Общий кэш (аутентификация, дерево категорий, дедупликация просмотров). В памяти
+    # процесса он у каждого воркера свой — для нескольких воркеров лучше Redis или база
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    },
+    # Кэш ответов API для анонимных пользователей (можно FileBasedCache или Redis)
+    'responses': {
+        'BACKEND': config('RESPONSE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('RESPONSE_CACHE_LOCATION', default='responses'),
+    },
+}
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+
+# Метрики запросов (Server-Timing, гистограммы по эндпоинтам в /api/admin/metrics/)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=False, cast=bool)
+
+# События в реальном времени (/api/my/events/): брокер, пинг и время жизни SSE-соединения, с.
+# DatabaseBroker — общий для всех воркеров; InProcessBroker — только при одном воркере
+EVENTS_BROKER = config('EVENTS_BROKER', default='marketplace.events.DatabaseBroker')
+EVENTS_HEARTBEAT = 20
+EVENTS_STREAM_MAX_AGE = 300
+EVENTS_POLL_TIMEOUT = 25
+# DatabaseBroker: опрос таблицы событий, окно перекрытия и срок хранения хвоста, с
+EVENTS_POLL_INTERVAL = 1
+EVENTS_POLL_OVERLAP = 5
+EVENTS_RETENTION = 3600
+# Срок билета для ?ticket= (EventSource не передаёт заголовок Authorization), с
+EVENTS_TICKET_MAX_AGE = 60
+
+# Кэш аутентификации по токену: общий кэш и память процесса, с; срок подписанных токенов.
+# С CACHE_BACKEND в памяти процесса общий TTL тоже AUTH_LOCAL_CACHE_TIMEOUT
+AUTH_CACHE_TIMEOUT = 300
+AUTH_LOCAL_CACHE_TIMEOUT = 5
+AUTH_SIGNED_TOKEN_MAX_AGE = 7 * 24 * 3600
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.users.authentication.CachedTokenAuthentication',
+        'apps.users.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -109,10 +160,45 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'marketplace.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# Полнотекстовый поиск объявлений: auto | postgres | sqlite | basic
+LISTING_SEARCH_BACKEND = config('LISTING_SEARCH_BACKEND', default='auto')
+
+# Просмотры объявлений: как часто сбрасывать счётчики в БД и окно
+# дедупликации повторных просмотров одного зрителя (секунды, 0 — выключено)
+LISTING_VIEWS_FLUSH_INTERVAL = config('LISTING_VIEWS_FLUSH_INTERVAL', default=10, cast=int)
+LISTING_VIEWS_DEDUP_WINDOW = config('LISTING_VIEWS_DEDUP_WINDOW', default=0, cast=int)
+
+# Обработка загруженных фото: thread — в фоне после ответа, sync — прямо в запросе
+LISTING_IMAGE_PROCESSING = config('LISTING_IMAGE_PROCESSING', default='thread')
+LISTING_IMAGE_WORKERS = config('LISTING_IMAGE_WORKERS', default=2, cast=int)
+
+# Массовый импорт объявлений: thread — в фоне, sync — прямо в запросе; размер пачки bulk_create
+LISTING_IMPORT_PROCESSING = config('LISTING_IMPORT_PROCESSING', default='thread')
+LISTING_IMPORT_BATCH_SIZE = 500
+LISTING_IMPORT_ALLOW_URLS = config('LISTING_IMPORT_ALLOW_URLS', default=True, cast=bool)
+
+# Ленты объявлений без ?fields=/?expand= собираются из values(), минуя ListingListSerializer
+LISTING_FEED_FAST_PATH = config('LISTING_FEED_FAST_PATH', default=True, cast=bool)
+
+# Индекс автодополнения городов: как часто подтягивать изменения из БД и строить заново (секунды)
+CITY_INDEX_REFRESH_INTERVAL = config('CITY_INDEX_REFRESH_INTERVAL', default=30, cast=int)
+CITY_INDEX_RELOAD_INTERVAL = config('CITY_INDEX_RELOAD_INTERVAL', default=600, cast=int)
+# Окно перечитывания по updated_at: города из транзакций, закоммиченных не по порядку (секунды)
+CITY_INDEX_REFRESH_OVERLAP = config('CITY_INDEX_REFRESH_OVERLAP', default=60, cast=int)
+
+# Подсказки поиска: лимит фраз в памяти, период полураспада веса (дни), полная перестройка (секунды)
+LISTING_SUGGEST_MAX_PHRASES = config('LISTING_SUGGEST_MAX_PHRASES', default=20000, cast=int)
+LISTING_SUGGEST_HALF_LIFE_DAYS = config('LISTING_SUGGEST_HALF_LIFE_DAYS', default=14, cast=float)
+LISTING_SUGGEST_RELOAD_INTERVAL = config('LISTING_SUGGEST_RELOAD_INTERVAL', default=600, cast=int)
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 LOGIN_URL = '/login/'
@@ -0,0 +1,60 @@
+"""
+HTML-оболочка SPA.
+
+Стили и код лежат в static/css/app.css и static/js/app.js: после collectstatic
+WhiteNoise отдаёт их с хешем содержимого в имени, вечным Cache-Control и
+заранее сжатыми .br/.gz. Сама оболочка (index.html со ссылками на эти файлы)
+рендерится один раз на процесс и дальше отдаётся готовыми байтами — обычными
+или gzip — с ETag: браузер каждый раз сверяет версию и получает 304, пока
+не выйдет новый деплой. В DEBUG шаблон рендерится на каждый запрос, чтобы
+правки были видны сразу.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.text import compress_string
+from django.views import View
+
+accepts_gzip = re.compile(r'\bgzip\b')
+
+_shell = None
+
+
+def render_shell():
+    body = render_to_string('index.html').encode()
+    digest = hashlib.sha1(body).hexdigest()[:32]
+    return {
+        'identity': (body, f'"{digest}"'),
+        'gzip': (compress_string(body), f'"{digest}-gzip"'),
+    }
+
+
+def get_shell():
+    global _shell
+    if _shell is None or settings.DEBUG:
+        _shell = render_shell()
+    return _shell
+
+
+class SpaShellView(View):
+    """Отдаёт index.html на любой маршрут SPA"""
+    http_method_names = ['get', 'head']
+
+    def get(self, request, *args, **kwargs):
+        encoding = 'gzip' if accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')) else 'identity'
+        body, etag = get_shell()[encoding]
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='text/html; charset=utf-8')
+            response['Content-Length'] = len(body)
+            if encoding == 'gzip':
+                response['Content-Encoding'] = 'gzip'
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
@@ -2,14 +2,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import TemplateView
+
+from .spa import SpaShellView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('apps.listings.urls')),
     path('api/auth/', include('apps.users.urls')),
     path('api/categories/', include('apps.categories.urls')),
+    path('api/cities/', include('apps.cities.urls')),
     # Все остальные маршруты — SPA
-    path('', TemplateView.as_view(template_name='index.html')),
-    path('<path:path>', TemplateView.as_view(template_name='index.html')),
+    path('', SpaShellView.as_view()),
+    path('<path:path>', SpaShellView.as_view()),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
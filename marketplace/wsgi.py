@@ -4,3 +4,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketplace.settings')
 
 application = get_wsgi_application()
+
+from apps.cities.index import warm_city_index  # noqa: E402  (после django.setup())
+from apps.listings.counters import start_view_flusher  # noqa: E402
+from apps.listings.suggest import warm_suggestion_index  # noqa: E402
+
+warm_city_index()
+warm_suggestion_index()
+start_view_flusher()
@@ -0,0 +1,882 @@
+// ===== STATE =====
+let token = localStorage.getItem('token') || null;
+let user = JSON.parse(localStorage.getItem('user') || 'null');
+let curCat = '';
+let curPage = 1;
+let curQ = '';
+let delListingId = null;
+let delReason = null;
+let warnUserId = null;
+let detListing = null;
+let postImgs = [];
+
+const API = '';
+
+// ===== INIT =====
+document.addEventListener('DOMContentLoaded', () => {
+  updateNav();
+  loadCats();
+  loadListings();
+});
+
+// ===== NAV =====
+function updateNav() {
+  const authEl = document.getElementById('nav-auth');
+  const userEl = document.getElementById('nav-user');
+  const postBtn = document.getElementById('btn-post');
+  const adminBtn = document.getElementById('btn-admin');
+  if (user && token) {
+    authEl.style.display = 'none';
+    userEl.style.display = 'block';
+    postBtn.style.display = 'inline-flex';
+    const letter = (user.first_name || user.username || 'U')[0].toUpperCase();
+    document.getElementById('nav-av-letter').textContent = letter;
+    const navAv = document.getElementById('nav-av');
+    if (user.avatar_url) {
+      navAv.innerHTML = `<img src="${user.avatar_url}" alt="">`;
+    } else {
+      navAv.innerHTML = `<span>${letter}</span>`;
+    }
+    if (user.is_staff || user.is_superuser) {
+      adminBtn.style.display = 'inline-flex';
+    }
+  } else {
+    authEl.style.display = 'block';
+    userEl.style.display = 'none';
+    postBtn.style.display = 'none';
+    adminBtn.style.display = 'none';
+  }
+  connectEvents();
+}
+
+// ===== EVENTS (SSE) =====
+// Токен в URL попал бы в логи: поток открывается по короткому билету, а после
+// закрытия соединения — по новому, продолжая с последнего полученного события
+let events = null;
+let eventsToken = null;
+let lastEventId = '';
+function connectEvents() {
+  if (eventsToken === token) return;
+  if (events) { events.close(); events = null; }
+  eventsToken = token;
+  lastEventId = '';
+  if (!token || !window.EventSource) return;
+  openEvents(token);
+}
+
+async function openEvents(forToken) {
+  let ticket;
+  try {
+    const r = await fetch('/api/my/events/ticket/', {method: 'POST', headers: {'Authorization': `Token ${forToken}`}});
+    if (!r.ok) return;
+    ticket = (await r.json()).ticket;
+  } catch(e) {
+    setTimeout(() => eventsToken === forToken && openEvents(forToken), 10000);
+    return;
+  }
+  if (eventsToken !== forToken) return;
+  const after = lastEventId ? `&after=${encodeURIComponent(lastEventId)}` : '';
+  const source = events = new EventSource(`/api/my/events/?ticket=${encodeURIComponent(ticket)}${after}`);
+  source.onerror = () => {
+    // Браузер не переподключается сам, если ответ не 200 (билет истёк)
+    if (source.readyState === EventSource.CLOSED && events === source) {
+      events = null;
+      setTimeout(() => eventsToken === forToken && openEvents(forToken), 3000);
+    }
+  };
+  ['message', 'warning', 'listing_status', 'listings_status'].forEach(type =>
+    source.addEventListener(type, e => { lastEventId = e.lastEventId; }));
+  bindEventToasts(source);
+}
+
+function bindEventToasts(events) {
+  events.addEventListener('message', e => {
+    const m = JSON.parse(e.data);
+    toast(`💬 Новое сообщение от ${m.sender_name}: ${m.listing_title}`, 'inf');
+  });
+  events.addEventListener('warning', e => {
+    toast(`⚠️ Предупреждение: ${JSON.parse(e.data).reason}`, 'err');
+  });
+  events.addEventListener('listing_status', e => {
+    toast(`📋 Статус объявления «${JSON.parse(e.data).title}» изменён`, 'inf');
+  });
+  events.addEventListener('listings_status', e => {
+    toast(`📋 Администратор удалил ваши объявления: ${JSON.parse(e.data).count}`, 'err');
+  });
+}
+
+function toggleDD() {
+  document.getElementById('dd').classList.toggle('on');
+}
+function closeDD() {
+  document.getElementById('dd').classList.remove('on');
+}
+document.addEventListener('click', e => {
+  if (!document.getElementById('nav-user').contains(e.target)) closeDD();
+});
+
+// ===== PAGES =====
+function showPage(id) {
+  ['home-pg','profile-pg','admin-pg'].forEach(p => {
+    const el = document.getElementById(p);
+    if (el) el.style.display = p === id ? (p === 'home-pg' ? 'block' : 'block') : 'none';
+    if (el && p !== 'home-pg') el.classList.toggle('on', p === id);
+  });
+  document.getElementById('hero').style.display = id === 'home-pg' ? 'block' : 'none';
+  document.getElementById('cats').style.display = id === 'home-pg' ? 'block' : 'none';
+}
+
+function goHome() { showPage('home-pg'); window.scrollTo(0,0); }
+function goProfile() { showPage('profile-pg'); loadProfile(); window.scrollTo(0,68); }
+function goAdmin() { showPage('admin-pg'); loadAdminData(); window.scrollTo(0,68); }
+function goMyListings() { goProfile(); setTimeout(()=>{ document.querySelector('.ptab').click(); },100); }
+function goFavorites() { goProfile(); setTimeout(()=>{ document.querySelectorAll('.ptab')[1].click(); },100); }
+
+// ===== CATEGORIES =====
+async function loadCats() {
+  try {
+    const r = await fetch('/api/categories/');
+    const cats = await r.json();
+    const list = document.getElementById('cats-list');
+    cats.forEach(c => {
+      const btn = document.createElement('button');
+      btn.className = 'cp';
+      btn.dataset.id = c.id;
+      btn.innerHTML = `<span>${c.icon||'📦'}</span>${c.name}`;
+      btn.onclick = () => filterCat(btn, c.id);
+      list.appendChild(btn);
+
+      // Populate post form select
+      [c, ...(c.children||[])].forEach(sc => {
+        const opt = document.createElement('option');
+        opt.value = sc.id; opt.textContent = sc === c ? sc.name : `— ${sc.name}`;
+        document.getElementById('p-cat').appendChild(opt);
+      });
+    });
+  } catch(e) {}
+}
+
+function filterCat(btn, id) {
+  document.querySelectorAll('.cp').forEach(b => b.classList.remove('on'));
+  btn.classList.add('on');
+  curCat = id;
+  curPage = 1;
+  const name = id ? btn.textContent.trim() : '';
+  document.getElementById('cur-cat-name').textContent = name ? `— ${name}` : '';
+  loadListings();
+}
+
+// ===== LISTINGS =====
+async function loadListings() {
+  showSkeletons();
+  let url = `/api/listings/?page=${curPage}`;
+  if (curCat) url += `&category=${curCat}`;
+  if (curQ) url += `&search=${encodeURIComponent(curQ)}`;
+  const cond = document.getElementById('f-cond')?.value;
+  const sort = document.getElementById('f-sort')?.value;
+  if (cond) url += `&condition=${cond}`;
+  if (sort) url += `&ordering=${sort}`;
+
+  try {
+    const headers = token ? {'Authorization':`Token ${token}`} : {};
+    const r = await fetch(url, {headers});
+    const data = await r.json();
+    const items = data.results || data;
+    const count = data.count || items.length;
+    document.getElementById('res-count').textContent = count;
+    document.getElementById('stat-listings').textContent = count > 999 ? Math.floor(count/1000)+'K+' : count;
+    renderGrid(items);
+    renderPag(data.count, data.next, data.previous);
+  } catch(e) {
+    document.getElementById('grid').innerHTML = '<div class="empty"><div class="empty-ico">😔</div><h3>Ошибка загрузки</h3><p>Проверьте соединение</p></div>';
+  }
+}
+
+function showSkeletons() {
+  const g = document.getElementById('grid');
+  g.innerHTML = Array(8).fill(`<div class="skel"><div class="skimg"></div><div class="skb"><div class="skl lg"></div><div class="skl md"></div><div class="skl sm"></div></div></div>`).join('');
+}
+
+function renderGrid(items) {
+  const g = document.getElementById('grid');
+  if (!items.length) {
+    g.innerHTML = '<div class="empty"><div class="empty-ico">🔍</div><h3>Ничего не найдено</h3><p>Попробуйте изменить параметры поиска</p></div>';
+    return;
+  }
+  g.innerHTML = items.map((l,i) => `
+    <div class="card" style="animation-delay:${i*0.04}s" onclick="openDet(${l.id})">
+      <div class="ci2">
+        ${l.main_image
+          ? `<img src="${l.main_image}" alt="${l.title}" loading="lazy" onerror="this.parentElement.innerHTML='<div class=cph><svg viewBox=&quot;0 0 24 24&quot; fill=none stroke=currentColor stroke-width=1.5><rect x=3 y=3 width=18 height=18 rx=2/><path d=&quot;M3 9h18M9 21V9&quot;/></svg><span>Нет фото</span></div>'">`
+          : `<div class="cph"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.5"><rect x="3" y="3" width="18" height="18" rx="2"/><path d="M3 9h18M9 21V9"/></svg><span>Нет фото</span></div>`
+        }
+        <span class="cbadge ${l.condition}">${condLabel(l.condition)}</span>
+        <button class="cfav ${l.is_favorite?'on':''}" onclick="event.stopPropagation();toggleFav(this,${l.id})" title="В избранное">
+          <svg viewBox="0 0 24 24" fill="${l.is_favorite?'currentColor':'none'}" stroke="currentColor" stroke-width="2"><path d="M20.84 4.61a5.5 5.5 0 0 0-7.78 0L12 5.67l-1.06-1.06a5.5 5.5 0 0 0-7.78 7.78l1.06 1.06L12 21.23l7.78-7.78 1.06-1.06a5.5 5.5 0 0 0 0-7.78z"/></svg>
+        </button>
+      </div>
+      <div class="cbody">
+        <div class="cprice ${l.price==0?'free':''}">${l.price==0?'Бесплатно':fmtPrice(l.price)}</div>
+        <div class="ctitle">${l.title}</div>
+        <div class="cmeta">
+          <span>${l.city||'Не указан'}</span>
+          <span class="cmd"></span>
+          <span>${timeAgo(l.created_at)}</span>
+          <span class="cmd"></span>
+          <span>👁 ${l.views_count}</span>
+        </div>
+      </div>
+    </div>`).join('');
+}
+
+function condLabel(c) {
+  return {new:'Новое',used:'Б/У',damaged:'Ремонт'}[c]||c;
+}
+
+function renderPag(total, next, prev) {
+  const p = document.getElementById('pag');
+  if (!total || total <= 20) { p.innerHTML=''; return; }
+  const pages = Math.ceil(total/20);
+  let html = `<button class="pgb" onclick="changePage(${curPage-1})" ${!prev?'disabled':''}>‹</button>`;
+  for (let i=1;i<=pages;i++) {
+    if (i===1||i===pages||Math.abs(i-curPage)<=1) {
+      html+=`<button class="pgb ${i===curPage?'on':''}" onclick="changePage(${i})">${i}</button>`;
+    } else if (Math.abs(i-curPage)===2) {
+      html+=`<span style="color:var(--t3);padding:0 4px">…</span>`;
+    }
+  }
+  html+=`<button class="pgb" onclick="changePage(${curPage+1})" ${!next?'disabled':''}>›</button>`;
+  p.innerHTML = html;
+}
+
+function changePage(p) { curPage=p; loadListings(); window.scrollTo(0,300); }
+
+function applyFilters() { curPage=1; loadListings(); }
+
+function doSearch() {
+  const q = document.getElementById('hero-q').value || document.getElementById('nav-q').value;
+  curQ = q;
+  curPage = 1;
+  goHome();
+  loadListings();
+}
+
+// ===== FAVORITES =====
+async function toggleFav(btn, id) {
+  if (!token) { openAuth('login'); return; }
+  btn.classList.toggle('on');
+  const svgPath = btn.querySelector('svg path');
+  const isOn = btn.classList.contains('on');
+  if(svgPath) svgPath.setAttribute('fill', isOn?'currentColor':'none');
+  try {
+    await api(`/api/listings/${id}/favorite/`, 'POST');
+    toast(isOn?'Добавлено в избранное':'Удалено из избранного', isOn?'ok':'inf');
+  } catch(e) {}
+}
+
+// ===== DETAIL =====
+async function openDet(id) {
+  try {
+    const headers = token ? {'Authorization':`Token ${token}`} : {};
+    const r = await fetch(`/api/listings/${id}/`,{headers});
+    const l = await r.json();
+    detListing = l;
+
+    // Main image
+    const imgs = l.images||[];
+    const firstImg = imgs[0]?.image_url || 'https://placehold.co/600x400?text=%D0%9D%D0%B5%D1%82+%D1%84%D0%BE%D1%82%D0%BE';
+    const mainImg = document.getElementById('det-main-img');
+    mainImg.src=firstImg; mainImg.alt=l.title;
+
+    // Thumbnails
+    const thumbs = document.getElementById('det-thumbs');
+    thumbs.innerHTML = imgs.slice(0,5).map((img,i)=>`
+      <div class="dth ${i===0?'on':''}" onclick="switchImg(this,'${img.image_url}')">
+        <img src="${img.image_url}" alt="">
+      </div>`).join('');
+
+    document.getElementById('det-price').textContent = l.price==0?'Бесплатно':fmtPrice(l.price);
+    document.getElementById('det-title').textContent = l.title;
+    document.getElementById('det-desc').textContent = l.description;
+    document.getElementById('det-badges').innerHTML = `
+      <span class="db">${condLabel(l.condition)}</span>
+      ${l.city?`<span class="db">📍 ${l.city}</span>`:''}
+      ${l.category?.name?`<span class="db">${l.category.name}</span>`:''}
+      <span class="db">👁 ${l.views_count}</span>`;
+
+    // Seller
+    const s = l.seller||{};
+    const selAv = document.getElementById('det-sel-av');
+    if (s.avatar_url) selAv.innerHTML=`<img src="${s.avatar_url}" style="width:100%;height:100%;object-fit:cover;border-radius:50%">`;
+    else selAv.textContent=(s.first_name||s.username||'?')[0].toUpperCase();
+    document.getElementById('det-sel-name').textContent=s.first_name?`${s.first_name} ${s.last_name||''}`.trim():s.username;
+    document.getElementById('det-sel-meta').textContent=`На сайте с ${new Date(s.date_joined).toLocaleDateString('ru')}`;
+
+    document.getElementById('det-phone-btn').textContent='📞 Показать номер';
+    document.getElementById('det-ov').classList.add('on');
+    document.body.style.overflow='hidden';
+  } catch(e) { toast('Ошибка загрузки','err'); }
+}
+
+function switchImg(th, url) {
+  document.getElementById('det-main-img').src=url;
+  document.querySelectorAll('.dth').forEach(t=>t.classList.remove('on'));
+  th.classList.add('on');
+}
+
+function closeDet() {
+  document.getElementById('det-ov').classList.remove('on');
+  document.body.style.overflow='';
+}
+
+function revealPhone() {
+  if (!token) { openAuth('login'); return; }
+  const phone = detListing?.seller?.phone;
+  const btn = document.getElementById('det-phone-btn');
+  if (phone) btn.textContent=`📞 ${phone}`;
+  else btn.textContent='Телефон не указан';
+}
+
+// ===== MESSAGE =====
+function openMsgModal() {
+  if (!token) { openAuth('login'); return; }
+  closeDet();
+  document.getElementById('msg-ov').classList.add('on');
+  document.body.style.overflow='hidden';
+}
+function closeMsg() { document.getElementById('msg-ov').classList.remove('on'); document.body.style.overflow=''; }
+
+async function sendMsg() {
+  const text = document.getElementById('msg-text').value.trim();
+  if (!text) { toast('Напишите сообщение','err'); return; }
+  if (!detListing) return;
+  try {
+    await api('/api/messages/','POST',{
+      listing: detListing.id,
+      recipient: detListing.seller.id,
+      text
+    });
+    document.getElementById('msg-text').value='';
+    closeMsg();
+    toast('Сообщение отправлено ✓','ok');
+  } catch(e) { toast('Ошибка отправки','err'); }
+}
+
+// ===== AUTH =====
+function openAuth(mode='login') {
+  switchAuth(mode);
+  document.getElementById('auth-ov').classList.add('on');
+  document.body.style.overflow='hidden';
+}
+function closeAuth() {
+  document.getElementById('auth-ov').classList.remove('on');
+  document.body.style.overflow='';
+}
+function switchAuth(mode) {
+  document.getElementById('form-login').style.display=mode==='login'?'block':'none';
+  document.getElementById('form-reg').style.display=mode==='register'?'block':'none';
+  document.getElementById('tab-login').classList.toggle('on',mode==='login');
+  document.getElementById('tab-reg').classList.toggle('on',mode==='register');
+}
+
+async function doLogin() {
+  const btn=document.getElementById('btn-login');
+  btn.disabled=true; btn.textContent='Входим...';
+  try {
+    const data = await apiPublic('/api/auth/login/','POST',{
+      username:document.getElementById('l-user').value,
+      password:document.getElementById('l-pass').value
+    });
+    token=data.token; user=data.user;
+    localStorage.setItem('token',token);
+    localStorage.setItem('user',JSON.stringify(user));
+    closeAuth(); updateNav();
+    toast(`Добро пожаловать, ${user.first_name||user.username}! 👋`,'ok');
+    loadListings();
+  } catch(e) {
+    toast(e.message||'Неверный логин или пароль','err');
+  } finally { btn.disabled=false; btn.textContent='Войти'; }
+}
+
+async function doRegister() {
+  const btn=document.getElementById('btn-reg');
+  btn.disabled=true; btn.textContent='Регистрируемся...';
+  try {
+    const data = await apiPublic('/api/auth/register/','POST',{
+      username:document.getElementById('r-user').value,
+      email:document.getElementById('r-email').value,
+      first_name:document.getElementById('r-first').value,
+      last_name:document.getElementById('r-last').value,
+      phone:document.getElementById('r-phone').value,
+      city:document.getElementById('r-city').value,
+      password:document.getElementById('r-pass').value,
+      password2:document.getElementById('r-pass2').value,
+    });
+    token=data.token; user=data.user;
+    localStorage.setItem('token',token);
+    localStorage.setItem('user',JSON.stringify(user));
+    closeAuth(); updateNav();
+    toast('Регистрация успешна! Добро пожаловать 🎉','ok');
+  } catch(e) {
+    toast(e.message||'Ошибка регистрации','err');
+  } finally { btn.disabled=false; btn.textContent='Зарегистрироваться'; }
+}
+
+function doLogout() {
+  token=null; user=null;
+  localStorage.removeItem('token'); localStorage.removeItem('user');
+  updateNav(); goHome(); loadListings();
+  toast('Вы вышли из аккаунта','inf');
+}
+
+// ===== POST LISTING =====
+function openPostModal() {
+  if (!token) { openAuth('login'); return; }
+  document.getElementById('post-ov').classList.add('on');
+  document.body.style.overflow='hidden';
+}
+function closePost() {
+  document.getElementById('post-ov').classList.remove('on');
+  document.body.style.overflow='';
+}
+
+function handleImgSelect(e) {
+  [...e.target.files].forEach(addImg);
+}
+function handleDrop(e) {
+  e.preventDefault();
+  document.getElementById('drop-zone').classList.remove('over');
+  [...e.dataTransfer.files].forEach(addImg);
+}
+function addImg(file) {
+  if (postImgs.length>=8) { toast('Максимум 8 фото','inf'); return; }
+  postImgs.push(file);
+  const url=URL.createObjectURL(file);
+  const div=document.createElement('div');
+  div.className='ipi';
+  const idx=postImgs.length-1;
+  div.innerHTML=`<img src="${url}"><button onclick="removeImg(${idx})">✕</button>`;
+  document.getElementById('img-prev').appendChild(div);
+}
+function removeImg(idx) {
+  postImgs.splice(idx,1);
+  const prev=document.getElementById('img-prev');
+  const items=[...prev.querySelectorAll('.ipi')];
+  items[idx]?.remove();
+}
+
+async function doPost() {
+  const title=document.getElementById('p-title').value.trim();
+  const price=document.getElementById('p-price').value;
+  const desc=document.getElementById('p-desc').value.trim();
+  if (!title||!price||!desc) { toast('Заполните все обязательные поля','err'); return; }
+
+  const btn=document.getElementById('btn-post-sub');
+  btn.disabled=true; btn.textContent='Публикуем...';
+
+  const fd=new FormData();
+  fd.append('title',title);
+  fd.append('price',price);
+  fd.append('description',desc);
+  fd.append('condition',document.getElementById('p-cond').value);
+  fd.append('city',document.getElementById('p-city').value||user?.city||'');
+  fd.append('is_negotiable',document.getElementById('p-neg').checked);
+  const cat=document.getElementById('p-cat').value;
+  if(cat) fd.append('category_id',cat);
+  postImgs.forEach(f=>fd.append('images',f));
+
+  try {
+    const r=await fetch('/api/listings/create/',{method:'POST',headers:{'Authorization':`Token ${token}`},body:fd});
+    if(!r.ok){const e=await r.json();throw new Error(Object.values(e).flat().join(', '));}
+    closePost();
+    postImgs=[];
+    document.getElementById('img-prev').innerHTML='';
+    document.getElementById('p-title').value='';
+    document.getElementById('p-price').value='';
+    document.getElementById('p-desc').value='';
+    toast('Объявление опубликовано! 🎉','ok');
+    loadListings();
+  } catch(e) { toast(e.message||'Ошибка','err'); }
+  finally { btn.disabled=false; btn.textContent='Разместить объявление'; }
+}
+
+// ===== PROFILE =====
+async function loadProfile() {
+  if (!token) { openAuth('login'); return; }
+  try {
+    const [prof, myListings, favs, msgs] = await Promise.all([
+      api('/api/auth/profile/'),
+      api('/api/my/listings/'),
+      api('/api/my/favorites/'),
+      api('/api/my/messages/'),
+    ]);
+
+    // Update stored user
+    user=prof; localStorage.setItem('user',JSON.stringify(user));
+    updateNav();
+
+    const name = prof.first_name?`${prof.first_name} ${prof.last_name||''}`.trim():prof.username;
+    document.getElementById('prof-name').textContent=name;
+    document.getElementById('prof-username').textContent=`@${prof.username}`;
+
+    const profAv = document.getElementById('profav') || document.querySelector('.profav');
+    const letter = (prof.first_name||prof.username||'U')[0].toUpperCase();
+    document.getElementById('prof-av-letter').textContent=letter;
+    if (prof.avatar_url) {
+      document.querySelector('.profav').style.cssText+='background:var(--bg3)';
+      document.getElementById('prof-av-letter').style.display='none';
+      const img=document.createElement('img');
+      img.src=prof.avatar_url; img.alt='avatar';
+      img.style.cssText='position:absolute;inset:0;width:100%;height:100%;object-fit:cover;border-radius:50%';
+      const editDiv=document.querySelector('.profav-edit');
+      document.querySelector('.profav').insertBefore(img, editDiv);
+    }
+
+    const listItems = myListings.results||myListings;
+    const favItems = favs.results||favs;
+    const msgItems = msgs.results||msgs;
+
+    document.getElementById('prof-listings').textContent=listItems.length;
+    document.getElementById('prof-favs').textContent=favItems.length;
+    document.getElementById('prof-msgs').textContent=msgItems.length;
+
+    // Settings fields
+    document.getElementById('s-first').value=prof.first_name||'';
+    document.getElementById('s-last').value=prof.last_name||'';
+    document.getElementById('s-email').value=prof.email||'';
+    document.getElementById('s-phone').value=prof.phone||'';
+    document.getElementById('s-city').value=prof.city||'';
+    document.getElementById('s-bio').value=prof.bio||'';
+
+    // My listings tab
+    document.getElementById('pt-listings').innerHTML = listItems.length
+      ? listItems.map(l => myListingCard(l)).join('')
+      : '<div class="empty"><div class="empty-ico">📋</div><h3>Нет объявлений</h3><p>Разместите первое объявление</p></div>';
+
+    // Favorites tab
+    document.getElementById('pt-favs').innerHTML = favItems.length
+      ? `<div id="grid" style="display:grid;grid-template-columns:repeat(auto-fill,minmax(240px,1fr));gap:14px">${favItems.map((l,i)=>`
+          <div class="card" style="animation-delay:${i*0.04}s" onclick="openDet(${l.id})">
+            <div class="ci2">
+              ${l.main_image?`<img src="${l.main_image}" alt="${l.title}" loading="lazy">`:`<div class="cph"><span>Нет фото</span></div>`}
+              <span class="cbadge ${l.condition}">${condLabel(l.condition)}</span>
+            </div>
+            <div class="cbody">
+              <div class="cprice">${fmtPrice(l.price)}</div>
+              <div class="ctitle">${l.title}</div>
+              <div class="cmeta"><span>${l.city||''}</span></div>
+            </div>
+          </div>`).join('')}</div>`
+      : '<div class="empty"><div class="empty-ico">❤️</div><h3>Нет избранных</h3><p>Добавьте интересные объявления</p></div>';
+
+    // Messages tab
+    document.getElementById('pt-msgs').innerHTML = msgItems.length
+      ? msgItems.map(m=>`
+          <div class="adm-msg">
+            <div class="adm-msg-h">
+              <span class="adm-msg-from">От: ${m.sender_name}</span>
+              <span class="adm-msg-time">${new Date(m.created_at).toLocaleString('ru')}</span>
+            </div>
+            <div class="adm-msg-listing">📋 ${m.listing_title||''}</div>
+            <div class="adm-msg-text">${m.text}</div>
+          </div>`).join('')
+      : '<div class="empty"><div class="empty-ico">💬</div><h3>Нет сообщений</h3><p>Вам пока никто не писал</p></div>';
+
+    // Warnings for user
+    try {
+      const warns = await api('/api/my/warnings/');
+      const warnItems = warns.results||warns;
+      const warnEl = document.getElementById('prof-warnings');
+      warnEl.innerHTML = warnItems.map(w=>`
+        <div class="warn-banner">
+          <div class="warn-banner-icon">⚠️</div>
+          <div class="warn-banner-text">
+            <div class="warn-banner-title">Предупреждение от администратора</div>
+            <div class="warn-banner-msg">${w.reason}</div>
+          </div>
+        </div>`).join('');
+    } catch(e) {}
+
+  } catch(e) { toast('Ошибка загрузки профиля','err'); }
+}
+
+function myListingCard(l) {
+  const statusMap = {active:['active','Активно'],sold:['sold','Продано'],archived:['archived','Архив'],deleted_admin:['archived','Удалено']};
+  const [sc,sl]=statusMap[l.status]||['archived','—'];
+  return `<div class="my-card" style="margin-bottom:10px">
+    <div class="mc-img" style="height:110px">
+      ${l.main_image?`<img src="${l.main_image}" alt="${l.title}" style="width:100%;height:100%;object-fit:cover">`:`<div style="width:100%;height:100%;background:var(--bg3);display:flex;align-items:center;justify-content:center;color:var(--t3);font-size:24px">📷</div>`}
+    </div>
+    <div class="mc-body">
+      <div class="mc-title" onclick="openDet(${l.id})">${l.title}</div>
+      <div class="mc-price">${fmtPrice(l.price)}</div>
+      <div class="mc-meta">
+        <span class="mc-status ${sc}">${sl}</span>
+        <span>👁 ${l.views_count}</span>
+        <span>${timeAgo(l.created_at)}</span>
+      </div>
+      <div class="mc-actions">
+        ${l.status==='active'?`<button class="mc-del" onclick="openDelModal(${l.id})">🗑 Снять</button>`:''}
+      </div>
+    </div>
+  </div>`;
+}
+
+// ===== AVATAR UPLOAD =====
+function triggerAvatarUpload() {
+  document.getElementById('avatar-input').click();
+}
+
+async function uploadAvatar(e) {
+  const file = e.target.files[0];
+  if (!file) return;
+  const fd = new FormData();
+  fd.append('avatar', file);
+  try {
+    const r = await fetch('/api/auth/profile/avatar/', {
+      method:'POST',
+      headers:{'Authorization':`Token ${token}`},
+      body: fd
+    });
+    const data = await r.json();
+    if (!r.ok) throw new Error(data.error||'Ошибка');
+    toast('Фото профиля обновлено ✓','ok');
+    // Refresh profile
+    user.avatar_url = data.avatar_url;
+    localStorage.setItem('user', JSON.stringify(user));
+    updateNav();
+    loadProfile();
+  } catch(ex) { toast(ex.message||'Ошибка загрузки фото','err'); }
+}
+
+// ===== SETTINGS =====
+async function saveSettings() {
+  try {
+    const data = await api('/api/auth/profile/','PATCH',{
+      first_name:document.getElementById('s-first').value,
+      last_name:document.getElementById('s-last').value,
+      email:document.getElementById('s-email').value,
+      phone:document.getElementById('s-phone').value,
+      city:document.getElementById('s-city').value,
+      bio:document.getElementById('s-bio').value,
+    });
+    user={...user,...data};
+    localStorage.setItem('user',JSON.stringify(user));
+    updateNav();
+    toast('Настройки сохранены ✓','ok');
+  } catch(e) { toast('Ошибка сохранения','err'); }
+}
+
+// ===== DELETE LISTING =====
+function openDelModal(id) {
+  delListingId=id; delReason=null;
+  document.querySelectorAll('.reason-btn').forEach(b=>b.classList.remove('on'));
+  document.getElementById('btn-confirm-del').disabled=true;
+  document.getElementById('del-ov').classList.add('on');
+  document.body.style.overflow='hidden';
+}
+function closeDel() {
+  document.getElementById('del-ov').classList.remove('on');
+  document.body.style.overflow='';
+}
+function selectReason(btn, reason) {
+  document.querySelectorAll('.reason-btn').forEach(b=>b.classList.remove('on'));
+  btn.classList.add('on');
+  delReason=reason;
+  document.getElementById('btn-confirm-del').disabled=false;
+}
+async function confirmDelete() {
+  if (!delListingId||!delReason) return;
+  try {
+    await api(`/api/listings/${delListingId}/archive/`,'POST',{reason:delReason});
+    closeDel();
+    toast('Объявление снято с публикации','ok');
+    loadProfile();
+  } catch(e) { toast('Ошибка','err'); }
+}
+
+// ===== ADMIN =====
+async function loadAdminData() {
+  loadAdminListings();
+  loadAdminUsers();
+  loadAdminMsgs();
+  loadAdminWarns();
+}
+
+async function loadAdminListings() {
+  const q = document.getElementById('adm-search-q')?.value||'';
+  try {
+    const data = await api(`/api/admin/listings/${q?`?search=${q}`:''}`);
+    const items = data.results||data;
+    document.getElementById('at-listings-list').innerHTML = items.length
+      ? items.map(l=>`
+        <div class="adm-listing">
+          <div class="adm-listing-img">
+            ${l.main_image?`<img src="${l.main_image}" alt="">`:'<div style="width:100%;height:100%;background:var(--bg3);display:flex;align-items:center;justify-content:center;font-size:20px">📷</div>'}
+          </div>
+          <div class="adm-listing-info">
+            <div class="adm-listing-title">${l.title}</div>
+            <div class="adm-listing-meta">💰 ${fmtPrice(l.price)} · 👤 ${l.seller_name} · 📍 ${l.city||'—'} · 
+              <span style="color:${l.status==='active'?'var(--gr)':l.status==='sold'?'var(--bl)':'var(--t3)'}">${l.status}</span>
+              · ${timeAgo(l.created_at)}</div>
+          </div>
+          ${l.status==='active'?`<button class="adm-del" onclick="adminDeleteListing(${l.id})">🗑 Удалить</button>`:'<span style="color:var(--t3);font-size:13px">Неактивно</span>'}
+        </div>`).join('')
+      : '<div class="empty"><div class="empty-ico">📋</div><h3>Нет объявлений</h3></div>';
+  } catch(e) { document.getElementById('at-listings-list').innerHTML='<p style="color:var(--rd)">Ошибка загрузки</p>'; }
+}
+
+async function loadAdminUsers() {
+  try {
+    const data = await api('/api/admin/users/');
+    const items = data.results||data;
+    document.getElementById('at-users-list').innerHTML = items.length
+      ? items.map(u=>`
+        <div class="adm-user">
+          <div class="adm-user-av">
+            ${u.avatar_url?`<img src="${u.avatar_url}" alt="">`:(u.first_name||u.username||'?')[0].toUpperCase()}
+          </div>
+          <div class="adm-user-info">
+            <div class="adm-user-name">${u.first_name?`${u.first_name} ${u.last_name||''}`.trim():u.username}
+              ${u.is_staff?'<span style="color:var(--bl);font-size:11px;margin-left:5px">STAFF</span>':''}
+            </div>
+            <div class="adm-user-meta">@${u.username} · ${u.email||'—'} · ${u.city||'—'} · Зарегистрирован ${new Date(u.date_joined).toLocaleDateString('ru')}</div>
+          </div>
+          <button class="adm-warn" onclick="openWarnModal(${u.id},'${u.username}')">⚠️ Предупреждение</button>
+        </div>`).join('')
+      : '<div class="empty"><div class="empty-ico">👥</div><h3>Нет пользователей</h3></div>';
+  } catch(e) {}
+}
+
+async function loadAdminMsgs() {
+  try {
+    const data = await api('/api/admin/messages/');
+    const items = data.results||data;
+    document.getElementById('at-msgs-list').innerHTML = items.length
+      ? items.map(m=>`
+        <div class="adm-msg">
+          <div class="adm-msg-h">
+            <span class="adm-msg-from">От: ${m.sender_name} → ${m.recipient_name}</span>
+            <span class="adm-msg-time">${new Date(m.created_at).toLocaleString('ru')}</span>
+          </div>
+          <div class="adm-msg-listing">📋 ${m.listing_title||'—'}</div>
+          <div class="adm-msg-text">${m.text}</div>
+        </div>`).join('')
+      : '<div class="empty"><div class="empty-ico">💬</div><h3>Нет сообщений</h3></div>';
+  } catch(e) {}
+}
+
+async function loadAdminWarns() {
+  try {
+    const data = await api('/api/admin/warnings/');
+    const items = data.results||data;
+    document.getElementById('at-warns-list').innerHTML = items.length
+      ? items.map(w=>`
+        <div class="adm-warn-item">
+          <div class="adm-warn-h">
+            <span class="adm-warn-user">⚠️ ${w.user_name}</span>
+            <span class="adm-warn-time">${new Date(w.created_at).toLocaleString('ru')}</span>
+          </div>
+          <div class="adm-warn-text">${w.reason}</div>
+          <div style="font-size:12px;color:var(--t3);margin-top:4px">Выдал: ${w.admin_name}</div>
+        </div>`).join('')
+      : '<div class="empty"><div class="empty-ico">⚠️</div><h3>Нет предупреждений</h3></div>';
+  } catch(e) {}
+}
+
+async function adminDeleteListing(id) {
+  if (!confirm('Удалить объявление?')) return;
+  try {
+    const r=await fetch(`/api/admin/listings/${id}/delete/`,{method:'DELETE',headers:{'Authorization':`Token ${token}`}});
+    if (!r.ok) throw new Error();
+    toast('Объявление удалено','ok');
+    loadAdminListings();
+  } catch(e) { toast('Ошибка','err'); }
+}
+
+function openWarnModal(userId, username) {
+  warnUserId=userId;
+  document.getElementById('warn-username').textContent=username;
+  document.getElementById('warn-reason').value='';
+  document.getElementById('warn-ov').classList.add('on');
+  document.body.style.overflow='hidden';
+}
+function closeWarn() { document.getElementById('warn-ov').classList.remove('on'); document.body.style.overflow=''; }
+
+async function sendWarning() {
+  const reason=document.getElementById('warn-reason').value.trim();
+  if (!reason) { toast('Укажите причину','err'); return; }
+  try {
+    await api(`/api/admin/users/${warnUserId}/warn/`,'POST',{reason});
+    closeWarn();
+    toast('Предупреждение отправлено','ok');
+    loadAdminWarns();
+  } catch(e) { toast('Ошибка','err'); }
+}
+
+function switchAdminTab(btn, tabId) {
+  document.querySelectorAll('.admin-tab').forEach(t=>t.classList.remove('on'));
+  document.querySelectorAll('.atab-c').forEach(t=>t.classList.remove('on'));
+  btn.classList.add('on');
+  document.getElementById(tabId).classList.add('on');
+}
+
+// ===== PROFILE TABS =====
+function switchPTab(btn, tabId) {
+  document.querySelectorAll('.ptab').forEach(t=>t.classList.remove('on'));
+  document.querySelectorAll('.ptab-c').forEach(t=>t.classList.remove('on'));
+  btn.classList.add('on');
+  document.getElementById(tabId).classList.add('on');
+}
+
+// ===== HELPERS =====
+async function api(url, method='GET', body=null) {
+  const opts = {headers:{'Authorization':`Token ${token}`,'Content-Type':'application/json'}};
+  if (method!=='GET') opts.method=method;
+  if (body) opts.body=JSON.stringify(body);
+  const r = await fetch(API+url, opts);
+  const data = await r.json();
+  if (!r.ok) throw new Error(Object.values(data).flat().join(', '));
+  return data;
+}
+
+async function apiPublic(url, method='GET', body=null) {
+  const opts = {method, headers:{'Content-Type':'application/json'}};
+  if (body) opts.body=JSON.stringify(body);
+  const r = await fetch(API+url, opts);
+  const data = await r.json();
+  if (!r.ok) throw new Error(Object.values(data).flat().join(', '));
+  return data;
+}
+
+function fmtPrice(p) {
+  return Number(p).toLocaleString('ru-RU')+'  ₸';
+}
+
+function timeAgo(dt) {
+  const d=new Date(dt), now=new Date(), diff=Math.floor((now-d)/1000);
+  if(diff<60) return 'только что';
+  if(diff<3600) return Math.floor(diff/60)+'м назад';
+  if(diff<86400) return Math.floor(diff/3600)+'ч назад';
+  if(diff<604800) return Math.floor(diff/86400)+'д назад';
+  return d.toLocaleDateString('ru');
+}
+
+function toast(msg, type='inf') {
+  const icons={ok:'✅',err:'❌',inf:'ℹ️'};
+  const el=document.createElement('div');
+  el.className=`toast ${type}`;
+  el.innerHTML=`<span class="ti">${icons[type]}</span><span class="tt">${msg}</span>`;
+  document.getElementById('toasts').appendChild(el);
+  setTimeout(()=>el.remove(),3800);
+}
+
+// ===== STATS =====
+async function loadStats() {
+  try {
+    const r=await fetch('/api/listings/?page_size=1');
+    const d=await r.json();
+    if(d.count) document.getElementById('stat-listings').textContent=d.count>999?Math.floor(d.count/1000)+'K+':d.count;
+  } catch(e){}
+}
+loadStats();